@@ -1,6 +1,11 @@
 """數據適配器模組"""
 
 from .base import DataAdapter
-from .mock import MockDataAdapter
+from .async_adapter import AsyncDataAdapter, AsyncAdapterBridge, TokenBucket
+from .mock import MockDataAdapter, AsyncMockDataAdapter
+from .caching import CachingDataAdapter
 
-__all__ = ['DataAdapter', 'MockDataAdapter']
+__all__ = [
+    'DataAdapter', 'MockDataAdapter', 'CachingDataAdapter',
+    'AsyncDataAdapter', 'AsyncAdapterBridge', 'AsyncMockDataAdapter', 'TokenBucket'
+]
@@ -0,0 +1,359 @@
+"""
+異步數據適配器
+
+第三階段的數據源大多是 HTTP API（新聞、Twitter / Discord 等）。異步適配器用協程實作
+所有數據接口，每個數據源有獨立的並發上限和令牌桶限速，服務可以同時為一批地址發出請求。
+"""
+
+import time
+import asyncio
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Hashable
+
+from .base import DataAdapter
+
+
+class TokenBucket:
+    """
+    令牌桶限速器（協程）
+    
+    以每秒 rate 個的速度補充令牌，最多積累 burst 個；每個請求消耗一個令牌，沒有令牌時等待。
+    """
+    
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        初始化限速器
+        
+        Args:
+            rate: 每秒請求數
+            burst: 最多可以連續發出的請求數（默認為 max(1, rate)）
+        """
+        self.rate = rate
+        self.capacity = max(1, burst if burst else int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """取得一個令牌（按請求順序等待）"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class _SourceLimiter:
+    """單個數據源的並發上限和限速（async with 使用）"""
+    
+    def __init__(self, concurrency: int, rate: Optional[float], burst: Optional[int]):
+        """並發上限 concurrency，rate 為每秒請求數（None 表示不限速）"""
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.bucket = TokenBucket(rate, burst) if rate else None
+    
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        if self.bucket is not None:
+            try:
+                await self.bucket.acquire()
+            except BaseException:
+                self.semaphore.release()
+                raise
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self.semaphore.release()
+
+
+class AsyncDataAdapter:
+    """
+    異步數據適配器基礎類
+    
+    方法與 DataAdapter 一一對應（async 版本），默認行為相同：沒有外部數據的方法返回空結果，
+    第二階段方法拋出 NotImplementedError。
+    
+    每個方法屬於一個數據源（SOURCES），同一數據源的請求共享並發上限和令牌桶。
+    單項方法的限速由調用方（call 和默認的批量方法）負責；
+    覆蓋批量方法時，在發出請求前使用 `async with self.limit(source)`。
+    """
+    
+    # 方法 -> 數據源（多個方法使用同一個 API 時可以映射到同一個數據源，共享限速）
+    SOURCES = {
+        'get_holding_period': 'holding_period',
+        'get_trade_timestamps': 'trade_timestamps',
+        'get_position_changes': 'position_changes',
+        'get_market_news': 'market_news',
+        'get_address_social_activity': 'social_activity',
+        'get_price_history': 'price_history',
+        'get_trade_pattern_stats': 'trade_pattern_stats',
+        'get_linked_addresses': 'linked_addresses'
+    }
+    
+    # 未單獨配置的數據源使用的限制（rate 為 None 表示不限速）
+    DEFAULT_LIMITS = {'concurrency': 10, 'rate': None, 'burst': None}
+    
+    def __init__(self, limits: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        初始化異步適配器
+        
+        Args:
+            limits: 數據源 -> {'concurrency': 並發上限, 'rate': 每秒請求數, 'burst': 突發請求數}，
+                    'default' 為其他數據源的限制
+        """
+        self.limits = dict(limits or {})
+        self._limiters: Dict[str, _SourceLimiter] = {}
+    
+    def set_limits(self, limits: Dict[str, Dict[str, Any]]):
+        """
+        更新數據源限制（在第一次請求前調用）
+        
+        Args:
+            limits: 同 __init__
+        """
+        self.limits.update(limits)
+        self._limiters = {}
+    
+    def limit(self, source: str) -> _SourceLimiter:
+        """
+        數據源的並發上限和限速
+        
+        Args:
+            source: 數據源名稱（SOURCES 中的值）
+            
+        Returns:
+            異步上下文管理器，進入時等待並發名額和令牌
+        """
+        limiter = self._limiters.get(source)
+        if limiter is None:
+            config = {**self.DEFAULT_LIMITS, **self.limits.get('default', {}), **self.limits.get(source, {})}
+            limiter = self._limiters[source] = _SourceLimiter(config['concurrency'], config['rate'], config['burst'])
+        return limiter
+    
+    async def call(self, name: str, *args) -> Any:
+        """
+        在數據源的限制內調用單項方法
+        
+        Args:
+            name: 方法名稱（如 'get_price_history'）
+            *args: 方法參數
+            
+        Returns:
+            方法結果
+        """
+        async with self.limit(self.SOURCES[name]):
+            return await getattr(self, name)(*args)
+    
+    async def _gather(self, name: str, keys: List[Hashable], *args) -> Dict[Hashable, Any]:
+        """並發調用單項方法（任一請求失敗時拋出異常）"""
+        keys = list(dict.fromkeys(keys))
+        results = await asyncio.gather(*(self.call(name, key, *args) for key in keys))
+        return dict(zip(keys, results))
+    
+    async def close(self):
+        """釋放資源（如 HTTP 會話），子類按需覆蓋"""
+    
+    # ==================== 第二階段：持倉數據 ====================
+    
+    async def get_holding_period(self, trade_id: int) -> Optional[int]:
+        """獲取交易的持倉時長（秒），見 DataAdapter.get_holding_period"""
+        raise NotImplementedError("主管需要實作此方法")
+    
+    async def get_trade_timestamps(self, address_id: int) -> List[Dict[str, Any]]:
+        """獲取地址的所有交易時間戳，見 DataAdapter.get_trade_timestamps"""
+        raise NotImplementedError("主管需要實作此方法")
+    
+    async def get_position_changes(self, address_id: int) -> List[Dict[str, Any]]:
+        """獲取地址的持倉變化記錄，見 DataAdapter.get_position_changes"""
+        raise NotImplementedError("主管需要實作此方法")
+    
+    # ==================== 第三階段：外部數據 ====================
+    
+    async def get_market_news(self, market_id: int, days: int = 7) -> List[Dict[str, Any]]:
+        """
+        獲取市場相關新聞，見 DataAdapter.get_market_news
+        
+        實作建議：
+            async with self.session.get(f"https://api.news.com/search?q={title}&days={days}") as response:
+                return await response.json()
+        """
+        return []
+    
+    async def get_address_social_activity(self, address: str) -> Dict[str, Any]:
+        """獲取地址的社交媒體活動，見 DataAdapter.get_address_social_activity"""
+        return {
+            'twitter_followers': 0,
+            'twitter_mentions': 0,
+            'discord_messages': 0,
+            'is_verified': False
+        }
+    
+    async def get_price_history(self, market_id: int) -> List[Dict[str, Any]]:
+        """獲取市場的價格歷史，見 DataAdapter.get_price_history"""
+        return []
+    
+    async def get_trade_pattern_stats(self, address_id: int) -> Dict[str, Any]:
+        """獲取地址的交易模式統計，見 DataAdapter.get_trade_pattern_stats"""
+        raise NotImplementedError("主管需要實作此方法")
+    
+    async def get_linked_addresses(self, address_id: int) -> List[int]:
+        """獲取與地址關聯的其他地址，見 DataAdapter.get_linked_addresses"""
+        return []
+    
+    # ==================== 批量查詢 ====================
+    # 默認在數據源限制內並發調用單項方法；數據源支持批量請求時可以覆蓋
+    
+    async def get_holding_period_batch(self, trade_ids: List[int]) -> Dict[int, Optional[int]]:
+        """批量獲取交易的持倉時長"""
+        return await self._gather('get_holding_period', trade_ids)
+    
+    async def get_trade_timestamps_batch(self, address_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """批量獲取地址的交易時間戳"""
+        return await self._gather('get_trade_timestamps', address_ids)
+    
+    async def get_position_changes_batch(self, address_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """批量獲取地址的持倉變化記錄"""
+        return await self._gather('get_position_changes', address_ids)
+    
+    async def get_market_news_batch(self, market_ids: List[int], days: int = 7) -> Dict[int, List[Dict[str, Any]]]:
+        """批量獲取市場相關新聞"""
+        return await self._gather('get_market_news', market_ids, days)
+    
+    async def get_address_social_activity_batch(self, addresses: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量獲取地址的社交媒體活動"""
+        return await self._gather('get_address_social_activity', addresses)
+    
+    async def get_price_history_batch(self, market_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """批量獲取市場的價格歷史"""
+        return await self._gather('get_price_history', market_ids)
+    
+    async def get_trade_pattern_stats_batch(self, address_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """批量獲取地址的交易模式統計"""
+        return await self._gather('get_trade_pattern_stats', address_ids)
+    
+    async def get_linked_addresses_batch(self, address_ids: List[int]) -> Dict[int, List[int]]:
+        """批量獲取與地址關聯的其他地址"""
+        return await self._gather('get_linked_addresses', address_ids)
+
+
+class AsyncAdapterBridge(DataAdapter):
+    """
+    把異步適配器包裝成同步的 DataAdapter
+    
+    在後台線程運行一個事件循環，所有請求都提交到這個循環，數據源的並發上限和令牌桶因此
+    對所有調用方（按批預取、標籤器線程）生效。標籤器通過上下文逐個讀取時走單項方法，
+    按批預取時通過 gather_batches 同時發出一批地址的所有請求。
+    """
+    
+    def __init__(self, adapter: AsyncDataAdapter):
+        """
+        初始化橋接器
+        
+        Args:
+            adapter: 異步數據適配器
+        """
+        self.adapter = adapter
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='async-adapter', daemon=True)
+        self._thread.start()
+    
+    def _run(self, coroutine) -> Any:
+        """在事件循環中執行協程並等待結果"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+    
+    def gather_batches(self, requests: List[Tuple[str, tuple]]) -> List[Any]:
+        """
+        同時執行多個批量方法
+        
+        Args:
+            requests: [(批量方法名稱, 參數)]，如 [('get_price_history_batch', (market_ids,))]
+            
+        Returns:
+            與 requests 順序相同的結果列表，失敗的請求為對應的異常
+        """
+        async def gather():
+            return await asyncio.gather(
+                *(getattr(self.adapter, name)(*args) for name, args in requests),
+                return_exceptions=True
+            )
+        return self._run(gather())
+    
+    def close(self):
+        """關閉異步適配器並停止事件循環"""
+        if self._loop.is_closed():
+            return
+        self._run(self.adapter.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+    
+    # ==================== 單項方法 ====================
+    
+    def get_holding_period(self, trade_id: int) -> Optional[int]:
+        """獲取交易的持倉時長"""
+        return self._run(self.adapter.call('get_holding_period', trade_id))
+    
+    def get_trade_timestamps(self, address_id: int) -> List[Dict[str, Any]]:
+        """獲取地址的所有交易時間戳"""
+        return self._run(self.adapter.call('get_trade_timestamps', address_id))
+    
+    def get_position_changes(self, address_id: int) -> List[Dict[str, Any]]:
+        """獲取地址的持倉變化記錄"""
+        return self._run(self.adapter.call('get_position_changes', address_id))
+    
+    def get_market_news(self, market_id: int, days: int = 7) -> List[Dict[str, Any]]:
+        """獲取市場相關新聞"""
+        return self._run(self.adapter.call('get_market_news', market_id, days))
+    
+    def get_address_social_activity(self, address: str) -> Dict[str, Any]:
+        """獲取地址的社交媒體活動"""
+        return self._run(self.adapter.call('get_address_social_activity', address))
+    
+    def get_price_history(self, market_id: int) -> List[Dict[str, Any]]:
+        """獲取市場的價格歷史"""
+        return self._run(self.adapter.call('get_price_history', market_id))
+    
+    def get_trade_pattern_stats(self, address_id: int) -> Dict[str, Any]:
+        """獲取地址的交易模式統計"""
+        return self._run(self.adapter.call('get_trade_pattern_stats', address_id))
+    
+    def get_linked_addresses(self, address_id: int) -> List[int]:
+        """獲取與地址關聯的其他地址"""
+        return self._run(self.adapter.call('get_linked_addresses', address_id))
+    
+    # ==================== 批量查詢 ====================
+    
+    def get_holding_period_batch(self, trade_ids: List[int]) -> Dict[int, Optional[int]]:
+        """批量獲取交易的持倉時長"""
+        return self._run(self.adapter.get_holding_period_batch(trade_ids))
+    
+    def get_trade_timestamps_batch(self, address_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """批量獲取地址的所有交易時間戳"""
+        return self._run(self.adapter.get_trade_timestamps_batch(address_ids))
+    
+    def get_position_changes_batch(self, address_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """批量獲取地址的持倉變化記錄"""
+        return self._run(self.adapter.get_position_changes_batch(address_ids))
+    
+    def get_market_news_batch(self, market_ids: List[int], days: int = 7) -> Dict[int, List[Dict[str, Any]]]:
+        """批量獲取市場相關新聞"""
+        return self._run(self.adapter.get_market_news_batch(market_ids, days))
+    
+    def get_address_social_activity_batch(self, addresses: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量獲取地址的社交媒體活動"""
+        return self._run(self.adapter.get_address_social_activity_batch(addresses))
+    
+    def get_price_history_batch(self, market_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """批量獲取市場的價格歷史"""
+        return self._run(self.adapter.get_price_history_batch(market_ids))
+    
+    def get_trade_pattern_stats_batch(self, address_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """批量獲取地址的交易模式統計"""
+        return self._run(self.adapter.get_trade_pattern_stats_batch(address_ids))
+    
+    def get_linked_addresses_batch(self, address_ids: List[int]) -> Dict[int, List[int]]:
+        """批量獲取與地址關聯的其他地址"""
+        return self._run(self.adapter.get_linked_addresses_batch(address_ids))
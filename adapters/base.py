@@ -16,6 +16,9 @@ class DataAdapter:
     主管需要繼承此類並實作以下方法：
     - 第二階段方法：get_holding_period, get_trade_timestamps
     - 第三階段方法：get_market_news, get_address_social_activity, get_price_history
+    
+    每個方法都有批量版本（*_batch），默認逐個調用單項方法。
+    數據源支持批量查詢時覆蓋批量版本，服務每批地址只需少量調用。
     """
     
     # ==================== 第二階段：持倉數據 ====================
@@ -248,3 +251,122 @@ class DataAdapter:
         """
         # 默認返回空列表
         return []
+    
+    # ==================== 批量查詢 ====================
+    # 服務按批預取數據時調用以下方法，默認逐個調用單項方法。
+    # 返回結果中缺少的鍵，在標籤器需要時回退到單項方法。
+    
+    def get_holding_period_batch(self, trade_ids: List[int]) -> Dict[int, Optional[int]]:
+        """
+        批量獲取交易的持倉時長
+        
+        Args:
+            trade_ids: 交易 ID 列表
+            
+        Returns:
+            交易 ID -> 持倉時長（秒，未平倉為 None）的字典
+        """
+        return {trade_id: self.get_holding_period(trade_id) for trade_id in trade_ids}
+    
+    def get_trade_timestamps_batch(self, address_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        批量獲取地址的交易時間戳
+        
+        Args:
+            address_ids: 地址 ID 列表
+            
+        Returns:
+            地址 ID -> 交易時間戳列表（格式同 get_trade_timestamps）的字典
+            
+        實作建議：
+            rows = db.query('''
+                SELECT t.address_id, t.id as trade_id, t.timestamp as entry_time, ...
+                FROM address_trades t
+                JOIN markets m ON t.market_id = m.id
+                WHERE t.address_id IN (...)
+            ''', address_ids)
+            # 按 address_id 分組，沒有交易的地址返回空列表
+        """
+        return {address_id: self.get_trade_timestamps(address_id) for address_id in address_ids}
+    
+    def get_position_changes_batch(self, address_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        批量獲取地址的持倉變化記錄
+        
+        Args:
+            address_ids: 地址 ID 列表
+            
+        Returns:
+            地址 ID -> 持倉變化列表（格式同 get_position_changes）的字典
+        """
+        return {address_id: self.get_position_changes(address_id) for address_id in address_ids}
+    
+    def get_market_news_batch(self, market_ids: List[int], days: int = 7) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        批量獲取市場相關新聞
+        
+        Args:
+            market_ids: 市場 ID 列表
+            days: 查詢最近幾天的新聞
+            
+        Returns:
+            市場 ID -> 新聞列表（格式同 get_market_news）的字典
+        """
+        return {market_id: self.get_market_news(market_id, days) for market_id in market_ids}
+    
+    def get_address_social_activity_batch(self, addresses: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量獲取地址的社交媒體活動
+        
+        Args:
+            addresses: 地址列表（0x...）
+            
+        Returns:
+            地址 -> 社交媒體活動數據（格式同 get_address_social_activity）的字典
+        """
+        return {address: self.get_address_social_activity(address) for address in addresses}
+    
+    def get_price_history_batch(self, market_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        批量獲取市場的價格歷史
+        
+        Args:
+            market_ids: 市場 ID 列表
+            
+        Returns:
+            市場 ID -> 價格歷史列表（格式同 get_price_history）的字典
+            
+        實作建議：
+            rows = db.query('''
+                SELECT market_id, timestamp, price, volume
+                FROM market_price_history
+                WHERE market_id IN (...)
+                ORDER BY market_id, timestamp
+            ''', market_ids)
+            # 按 market_id 分組，沒有價格歷史的市場返回空列表
+        """
+        return {market_id: self.get_price_history(market_id) for market_id in market_ids}
+    
+    def get_trade_pattern_stats_batch(self, address_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        批量獲取地址的交易模式統計
+        
+        Args:
+            address_ids: 地址 ID 列表
+            
+        Returns:
+            地址 ID -> 交易模式統計（格式同 get_trade_pattern_stats）的字典
+        """
+        return {address_id: self.get_trade_pattern_stats(address_id) for address_id in address_ids}
+    
+    def get_linked_addresses_batch(self, address_ids: List[int]) -> Dict[int, List[int]]:
+        """
+        批量獲取與地址關聯的其他地址
+        
+        Args:
+            address_ids: 地址 ID 列表
+            
+        Returns:
+            地址 ID -> 關聯地址 ID 列表的字典
+        """
+        return {address_id: self.get_linked_addresses(address_id) for address_id in address_ids}
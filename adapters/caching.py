@@ -0,0 +1,258 @@
+"""
+快取數據適配器
+
+包裝任意數據適配器，按方法快取外部數據（價格歷史、新聞、社交媒體活動、關聯地址）。
+大量地址交易同一批市場，同一市場的數據只需要查詢一次。
+"""
+
+from typing import List, Dict, Any, Optional, Callable, Hashable, Tuple
+
+from utils.query_cache import QueryCache
+from .base import DataAdapter
+
+
+class CachingDataAdapter(DataAdapter):
+    """
+    快取數據適配器（裝飾器）
+    
+    每個快取的方法有獨立的 LRU + TTL 快取（容量和存活時間可分別配置），
+    單項方法和批量方法共用同一份快取：批量方法只為未命中的鍵調用被包裝的適配器。
+    其他方法直接轉發。快取的結果由所有地址共享，取出後應視為只讀。
+    """
+    
+    # 快取的數據源 -> 默認配置（max_entries: 最大條目數，ttl: 存活時間秒數，0 表示不快取）
+    DEFAULT_METHODS = {
+        'price_history': {'max_entries': 10000, 'ttl': 600},
+        'market_news': {'max_entries': 10000, 'ttl': 600},
+        'social_activity': {'max_entries': 100000, 'ttl': 3600},
+        'linked_addresses': {'max_entries': 100000, 'ttl': 3600}
+    }
+    
+    # 批量方法 -> 數據源（gather_batches 按此讀取快取）
+    BATCH_METHODS = {
+        'get_price_history_batch': 'price_history',
+        'get_market_news_batch': 'market_news',
+        'get_address_social_activity_batch': 'social_activity',
+        'get_linked_addresses_batch': 'linked_addresses'
+    }
+    
+    def __init__(self, adapter: DataAdapter, config: Optional[Dict[str, Any]] = None):
+        """
+        初始化快取適配器
+        
+        Args:
+            adapter: 被包裝的數據適配器
+            config: 快取配置，如 {'price_history': {'max_entries': 5000, 'ttl': 300}}，
+                    未配置的數據源使用 DEFAULT_METHODS
+        """
+        self.adapter = adapter
+        config = config or {}
+        
+        self.caches: Dict[str, QueryCache] = {}
+        for name, defaults in self.DEFAULT_METHODS.items():
+            method_config = {**defaults, **config.get(name, {})}
+            self.caches[name] = QueryCache(
+                max_entries=method_config['max_entries'],
+                default_ttl=method_config['ttl']
+            )
+    
+    def _cached(self, name: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """讀取快取，未命中時調用 loader 並寫入快取"""
+        cache = self.caches[name]
+        hit, value = cache.get(key)
+        if hit:
+            return value
+        value = loader()
+        cache.put(key, value)
+        return value
+    
+    def _cached_batch(self, name: str, keys: List[Hashable], make_key: Callable[[Hashable], Hashable],
+                      loader: Callable[[List[Hashable]], Dict[Hashable, Any]]) -> Dict[Hashable, Any]:
+        """
+        批量讀取快取，只為未命中的鍵調用 loader
+        
+        Args:
+            name: 數據源名稱
+            keys: 批量方法的參數（市場 ID、地址等）
+            make_key: 參數 -> 快取鍵
+            loader: 未命中的參數列表 -> {參數: 結果}
+            
+        Returns:
+            {參數: 結果}（loader 沒有返回的參數不出現）
+        """
+        results, missing = self._lookup_batch(name, keys, make_key)
+        if missing:
+            results.update(self._store_batch(name, loader(missing), make_key))
+        return results
+    
+    def _lookup_batch(self, name: str, keys: List[Hashable],
+                      make_key: Callable[[Hashable], Hashable]) -> Tuple[Dict[Hashable, Any], List[Hashable]]:
+        """讀取一批鍵的快取，返回 ({參數: 結果}, 未命中的參數列表)"""
+        cache = self.caches[name]
+        results = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            hit, value = cache.get(make_key(key))
+            if hit:
+                results[key] = value
+            else:
+                missing.append(key)
+        return results, missing
+    
+    def _store_batch(self, name: str, loaded: Dict[Hashable, Any],
+                     make_key: Callable[[Hashable], Hashable]) -> Dict[Hashable, Any]:
+        """把被包裝的適配器返回的結果寫入快取"""
+        cache = self.caches[name]
+        for key, value in loaded.items():
+            cache.put(make_key(key), value)
+        return loaded
+    
+    def _batch_key(self, name: str, args: tuple) -> Callable[[Hashable], Hashable]:
+        """批量方法參數 -> 快取鍵（新聞按市場和天數快取）"""
+        if name == 'market_news':
+            days = args[1] if len(args) > 1 else 7
+            return lambda key: (key, days)
+        return lambda key: key
+    
+    def gather_batches(self, requests: List[Tuple[str, tuple]]) -> List[Any]:
+        """
+        同時執行多個批量方法（被包裝的適配器需支持 gather_batches，如 AsyncAdapterBridge）
+        
+        快取的方法先讀取快取，只把未命中的鍵交給被包裝的適配器，所有請求一起發出。
+        
+        Args:
+            requests: [(批量方法名稱, 參數)]
+            
+        Returns:
+            與 requests 順序相同的結果列表，失敗的請求為對應的異常
+        """
+        plans = []
+        pending = []
+        for name, args in requests:
+            source = self.BATCH_METHODS.get(name)
+            if source is None:
+                plans.append((None, {}, None, len(pending)))
+                pending.append((name, args))
+                continue
+            
+            make_key = self._batch_key(source, args)
+            hits, missing = self._lookup_batch(source, args[0], make_key)
+            index = None
+            if missing:
+                index = len(pending)
+                pending.append((name, (missing,) + tuple(args[1:])))
+            plans.append((source, hits, make_key, index))
+        
+        results = self.adapter.gather_batches(pending) if pending else []
+        
+        gathered = []
+        for source, hits, make_key, index in plans:
+            if index is None:
+                gathered.append(hits)
+                continue
+            result = results[index]
+            if source is not None and not isinstance(result, BaseException):
+                result = {**hits, **self._store_batch(source, result, make_key)}
+            gathered.append(result)
+        return gathered
+    
+    def get_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        獲取各數據源的快取統計
+        
+        Returns:
+            數據源 -> {'entries', 'hits', 'misses', 'evictions', 'expirations', 'invalidations'}
+        """
+        return {name: cache.get_stats() for name, cache in self.caches.items()}
+    
+    def invalidate(self, name: Optional[str] = None):
+        """
+        清空快取
+        
+        Args:
+            name: 數據源名稱（不指定時清空所有數據源）
+        """
+        for cache_name, cache in self.caches.items():
+            if name is None or cache_name == name:
+                cache.invalidate()
+    
+    # ==================== 快取的方法 ====================
+    
+    def get_price_history(self, market_id: int) -> List[Dict[str, Any]]:
+        """獲取市場的價格歷史（快取）"""
+        return self._cached('price_history', market_id, lambda: self.adapter.get_price_history(market_id))
+    
+    def get_price_history_batch(self, market_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """批量獲取市場的價格歷史（快取）"""
+        return self._cached_batch('price_history', market_ids, lambda key: key, self.adapter.get_price_history_batch)
+    
+    def get_market_news(self, market_id: int, days: int = 7) -> List[Dict[str, Any]]:
+        """獲取市場相關新聞（快取，按市場和天數）"""
+        return self._cached(
+            'market_news', (market_id, days), lambda: self.adapter.get_market_news(market_id, days)
+        )
+    
+    def get_market_news_batch(self, market_ids: List[int], days: int = 7) -> Dict[int, List[Dict[str, Any]]]:
+        """批量獲取市場相關新聞（快取，按市場和天數）"""
+        return self._cached_batch(
+            'market_news', market_ids, lambda key: (key, days),
+            lambda missing: self.adapter.get_market_news_batch(missing, days)
+        )
+    
+    def get_address_social_activity(self, address: str) -> Dict[str, Any]:
+        """獲取地址的社交媒體活動（快取）"""
+        return self._cached(
+            'social_activity', address, lambda: self.adapter.get_address_social_activity(address)
+        )
+    
+    def get_address_social_activity_batch(self, addresses: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量獲取地址的社交媒體活動（快取）"""
+        return self._cached_batch(
+            'social_activity', addresses, lambda key: key, self.adapter.get_address_social_activity_batch
+        )
+    
+    def get_linked_addresses(self, address_id: int) -> List[int]:
+        """獲取與地址關聯的其他地址（快取）"""
+        return self._cached(
+            'linked_addresses', address_id, lambda: self.adapter.get_linked_addresses(address_id)
+        )
+    
+    def get_linked_addresses_batch(self, address_ids: List[int]) -> Dict[int, List[int]]:
+        """批量獲取與地址關聯的其他地址（快取）"""
+        return self._cached_batch(
+            'linked_addresses', address_ids, lambda key: key, self.adapter.get_linked_addresses_batch
+        )
+    
+    # ==================== 轉發的方法 ====================
+    
+    def get_holding_period(self, trade_id: int) -> Optional[int]:
+        """獲取交易的持倉時長"""
+        return self.adapter.get_holding_period(trade_id)
+    
+    def get_holding_period_batch(self, trade_ids: List[int]) -> Dict[int, Optional[int]]:
+        """批量獲取交易的持倉時長"""
+        return self.adapter.get_holding_period_batch(trade_ids)
+    
+    def get_trade_timestamps(self, address_id: int) -> List[Dict[str, Any]]:
+        """獲取地址的所有交易時間戳"""
+        return self.adapter.get_trade_timestamps(address_id)
+    
+    def get_trade_timestamps_batch(self, address_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """批量獲取地址的交易時間戳"""
+        return self.adapter.get_trade_timestamps_batch(address_ids)
+    
+    def get_position_changes(self, address_id: int) -> List[Dict[str, Any]]:
+        """獲取地址的持倉變化記錄"""
+        return self.adapter.get_position_changes(address_id)
+    
+    def get_position_changes_batch(self, address_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """批量獲取地址的持倉變化記錄"""
+        return self.adapter.get_position_changes_batch(address_ids)
+    
+    def get_trade_pattern_stats(self, address_id: int) -> Dict[str, Any]:
+        """獲取地址的交易模式統計"""
+        return self.adapter.get_trade_pattern_stats(address_id)
+    
+    def get_trade_pattern_stats_batch(self, address_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """批量獲取地址的交易模式統計"""
+        return self.adapter.get_trade_pattern_stats_batch(address_ids)
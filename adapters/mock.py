@@ -8,7 +8,9 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import random
+import asyncio
 from .base import DataAdapter
+from .async_adapter import AsyncDataAdapter
 
 
 class MockDataAdapter(DataAdapter):
@@ -265,3 +267,62 @@ class MockDataAdapter(DataAdapter):
         
         num_linked = random.randint(1, 5)
         return [address_id + i + 1 for i in range(num_linked)]
+
+
+class AsyncMockDataAdapter(AsyncDataAdapter):
+    """
+    異步模擬數據適配器
+    
+    返回與 MockDataAdapter 相同的數據，每個請求先等待 latency 秒模擬網絡延遲，
+    用於測試異步路徑的並發和限速（結果應與同步路徑相同）。
+    """
+    
+    def __init__(self, latency: float = 0.0, limits: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        初始化異步模擬適配器
+        
+        Args:
+            latency: 每個請求的模擬延遲（秒）
+            limits: 數據源限制（見 AsyncDataAdapter）
+        """
+        super().__init__(limits)
+        self.latency = latency
+        self.mock = MockDataAdapter()
+    
+    async def _respond(self, method, *args) -> Any:
+        """等待模擬延遲後返回模擬數據（生成數據時不讓出事件循環，隨機種子不會交錯）"""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return method(*args)
+    
+    async def get_holding_period(self, trade_id: int) -> Optional[int]:
+        """返回模擬的持倉時長（同 MockDataAdapter）"""
+        return await self._respond(self.mock.get_holding_period, trade_id)
+    
+    async def get_trade_timestamps(self, address_id: int) -> List[Dict[str, Any]]:
+        """返回模擬的交易時間戳（同 MockDataAdapter）"""
+        return await self._respond(self.mock.get_trade_timestamps, address_id)
+    
+    async def get_position_changes(self, address_id: int) -> List[Dict[str, Any]]:
+        """返回模擬的持倉變化記錄（同 MockDataAdapter）"""
+        return await self._respond(self.mock.get_position_changes, address_id)
+    
+    async def get_market_news(self, market_id: int, days: int = 7) -> List[Dict[str, Any]]:
+        """返回模擬的市場新聞（同 MockDataAdapter）"""
+        return await self._respond(self.mock.get_market_news, market_id, days)
+    
+    async def get_address_social_activity(self, address: str) -> Dict[str, Any]:
+        """返回模擬的社交媒體活動（同 MockDataAdapter）"""
+        return await self._respond(self.mock.get_address_social_activity, address)
+    
+    async def get_price_history(self, market_id: int) -> List[Dict[str, Any]]:
+        """返回模擬的價格歷史（同 MockDataAdapter）"""
+        return await self._respond(self.mock.get_price_history, market_id)
+    
+    async def get_trade_pattern_stats(self, address_id: int) -> Dict[str, Any]:
+        """返回模擬的交易模式統計（同 MockDataAdapter）"""
+        return await self._respond(self.mock.get_trade_pattern_stats, address_id)
+    
+    async def get_linked_addresses(self, address_id: int) -> List[int]:
+        """返回模擬的關聯地址（同 MockDataAdapter）"""
+        return await self._respond(self.mock.get_linked_addresses, address_id)
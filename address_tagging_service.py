@@ -6,18 +6,30 @@ Polymarket 地址標籤自動標記服務 V2
 使用適配器模式，主管只需實作數據適配器即可使用。
 """
 
+import os
+import sys
 import json
 import argparse
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # 導入工具模組
-from utils.database import DatabaseAdapter
+from utils.database import create_database_adapter
 from utils.confidence import ConfidenceCalculator
-from utils.logger import Logger
+from utils.logger import setup_logger
+from utils.context import AddressContext
+from utils.stats import merge_stats
+from utils.checkpoint import Checkpoint
+from utils.tag_writer import TagWriter
+from utils.keyword_index import KeywordIndex
+from utils.schema import SchemaManager
+from utils.snapshot import SnapshotDataSource, export_snapshot
 
 # 導入數據適配器
-from adapters import DataAdapter, MockDataAdapter
+from adapters import (
+    DataAdapter, MockDataAdapter, CachingDataAdapter, AsyncDataAdapter, AsyncAdapterBridge, AsyncMockDataAdapter
+)
 
 # 導入標籤器（第一階段）
 from tags.trading_style import TradingStyleTagger
@@ -43,25 +55,35 @@ class AddressTaggingService:
     使用適配器模式，可以靈活配置數據源。
     """
     
-    def __init__(self, config_path: str = 'config.json', data_adapter: Optional[DataAdapter] = None):
+    def __init__(self, config_path: str = 'config.json',
+                 data_adapter: Optional[Union[DataAdapter, AsyncDataAdapter]] = None,
+                 snapshot_path: Optional[str] = None):
         """
         初始化服務
         
         Args:
             config_path: 配置文件路徑
-            data_adapter: 數據適配器（如果為 None，使用 MockDataAdapter）
+            data_adapter: 數據適配器（如果為 None，使用 MockDataAdapter），也可以是 AsyncDataAdapter
+            snapshot_path: 交易快照目錄（可選，指定時從快照讀取數據，不連接數據庫）
         """
         # 載入配置
         with open(config_path, 'r', encoding='utf-8') as f:
             self.config = json.load(f)
         
         # 初始化日誌
-        self.logger = Logger(self.config['logging'])
+        self.logger = setup_logger(
+            self.config.get('logging', {}).get('level', 'INFO'),
+            self.config.get('logging', {}).get('file')
+        )
         self.logger.info("=== 地址標籤自動標記服務啟動 ===")
         
-        # 初始化數據庫適配器
-        self.db = DatabaseAdapter(self.config['database'])
-        self.logger.info(f"數據庫連接：{self.config['database']['url']}")
+        # 初始化數據庫適配器（按 URL 選擇 MySQL 或 SQLite），或只讀的交易快照
+        if snapshot_path:
+            self.db = SnapshotDataSource(snapshot_path, self.config['database'].get('lookback_days'))
+            self.logger.info(f"交易快照：{snapshot_path}（導出時間 {self.db.meta['exported_at']}）")
+        else:
+            self.db = create_database_adapter(self.config)
+            self.logger.info(f"數據庫連接：{self.config['database']['url']}")
         
         # 初始化數據適配器
         if data_adapter is None:
@@ -71,12 +93,44 @@ class AddressTaggingService:
             self.data_adapter = data_adapter
             self.logger.info(f"使用數據適配器：{type(data_adapter).__name__}")
         
+        # 異步適配器：在後台事件循環中執行，每個數據源按配置限制並發和速率
+        self._async_bridge = None
+        if isinstance(self.data_adapter, AsyncDataAdapter):
+            limits = self.config.get('concurrency', {}).get('adapter_limits')
+            if limits:
+                self.data_adapter.set_limits(limits)
+            self._async_bridge = self.data_adapter = AsyncAdapterBridge(self.data_adapter)
+        
+        # 適配器快取（可選）：同一市場的價格歷史、新聞等只向數據源查詢一次
+        adapter_cache = self.config.get('adapter_cache', {})
+        if adapter_cache.get('enabled'):
+            self.data_adapter = CachingDataAdapter(self.data_adapter, adapter_cache.get('methods', {}))
+            self.logger.info("已啟用適配器快取")
+        
         # 初始化信心分數計算器
         self.confidence_calc = ConfidenceCalculator(self.config['confidence'])
         
         # 初始化標籤器
         self._init_taggers()
         
+        # 標籤器並行執行（數據適配器依賴網絡 API 時可縮短單個地址的處理時間）
+        self.tagger_threads = self.config.get('concurrency', {}).get('tagger_threads', 1)
+        self._tagger_pool = None
+        
+        # 批量特徵提取規格（--init 時按批次預計算第一階段特徵）
+        self.batch_config = self.config.get('batch', {})
+        self.feature_spec = self._build_feature_spec()
+        
+        # 適配器數據預取（每批地址對每個數據源只調用一次批量方法）
+        self.prefetch_sources = self._build_prefetch_sources()
+        
+        # 市場關鍵詞索引（第一次需要時建立 / 增量刷新；多進程模式由主進程刷新，見 run_parallel）
+        self.keyword_index = None
+        self.refresh_keyword_index_on_demand = True
+        
+        # 查詢統計輸出文件（可選，多進程模式下每個分片一個文件）
+        self.query_stats_file = self.config['database'].get('query_stats', {}).get('dump_file')
+        
         self.logger.info(f"已載入 {len(self.taggers)} 個標籤器")
     
     def _init_taggers(self):
@@ -98,12 +152,272 @@ class AddressTaggingService:
         self.taggers.append(SpecialPhase3Tagger(self.db, self.data_adapter, self.config, self.confidence_calc))
         self.taggers.append(SocialPhase3Tagger(self.db, self.data_adapter, self.config, self.confidence_calc))
     
-    def tag_address(self, address_id: int) -> List[Dict[str, Any]]:
+    def _build_feature_spec(self) -> Dict[str, Any]:
+        """
+        根據標籤配置生成批量特徵規格
+        
+        Returns:
+            特徵規格（見 DatabaseAdapter.extract_features）
+        """
+        tags_config = self.config['tags']
+        
+        # 關鍵詞專家
+        keyword_groups = {
+            tag_name: {'keywords': cfg['keywords'], 'parent_category': cfg.get('parent_category')}
+            for tag_name, cfg in tags_config.get('專長類別', {}).items()
+            if cfg.get('enabled') and cfg.get('keywords')
+        }
+        
+        # 高頻交易的回看窗口，以及第二、三階段簡化版邏輯使用的 7、30、90 天窗口
+        recent_days = {7, 30, 90}
+        high_frequency = tags_config.get('交易風格', {}).get('高頻交易', {})
+        if 'lookback_days' in high_frequency:
+            recent_days.add(high_frequency['lookback_days'])
+        
+        # 掃尾盤和早期進場
+        strategy = tags_config.get('策略類型', {})
+        
+        return {
+            'keyword_groups': keyword_groups,
+            'recent_days': sorted(recent_days),
+            'late_entry_days': [strategy.get('掃尾盤', {}).get('days_before_close', 3)],
+            'early_entry_hours': [strategy.get('早期進場', {}).get('hours_after_creation', 48)]
+        }
+    
+    def _build_prefetch_sources(self) -> List[Any]:
+        """
+        根據已啟用的標籤決定每批預取的適配器數據源
+        
+        每個標籤器在 ADAPTER_SOURCES 中聲明它讀取的數據源和使用該數據源的標籤，
+        新聞按查詢天數區分：('market_news', 天數)。
+        
+        Returns:
+            至少有一個使用它的標籤啟用的數據源（batch.prefetch_adapter_data 為 false 時為空）
+        """
+        if not self.batch_config.get('prefetch_adapter_data', True):
+            return []
+        
+        sources = []
+        for tagger in self.taggers:
+            for source, tag_names in getattr(tagger, 'ADAPTER_SOURCES', {}).items():
+                if source not in sources and any(tagger.config.get(name, {}).get('enabled') for name in tag_names):
+                    sources.append(source)
+        return sources
+    
+    def _fetch_batches(self, requests: List[Tuple[Any, str, tuple]]) -> List[Dict[Any, Any]]:
+        """
+        執行一批適配器批量方法
+        
+        異步適配器同時發出所有請求（受各數據源的並發上限和限速約束），同步適配器依次調用。
+        失敗的請求返回空字典，標籤器需要時回退到逐個查詢。
+        
+        Args:
+            requests: [(數據源, 批量方法名稱, 參數)]
+            
+        Returns:
+            與 requests 順序相同的結果列表
+        """
+        if self._async_bridge is not None:
+            # 適配器快取包裝在異步適配器外層時，由快取轉發未命中的請求
+            results = self.data_adapter.gather_batches([(name, args) for _, name, args in requests])
+        else:
+            results = []
+            for _, name, args in requests:
+                try:
+                    results.append(getattr(self.data_adapter, name)(*args))
+                except Exception as e:
+                    results.append(e)
+        
+        fetched = []
+        for (source, _, _), result in zip(requests, results):
+            if isinstance(result, BaseException):
+                self.logger.warning(f"預取 {source} 失敗，回退到逐個查詢：{str(result)}")
+                result = {}
+            fetched.append(result)
+        return fetched
+    
+    def _prefetch_adapter_data(self, address_ids: List[int],
+                               address_rows: Dict[int, Dict[str, Any]]) -> Dict[int, Dict[Any, Any]]:
+        """
+        為一批地址批量預取適配器數據
+        
+        需要市場數據時先批量載入本批地址的交易，收集涉及的市場 ID，
+        再對每個數據源調用一次批量方法，結果按 AddressContext 的快取鍵分給各地址。
+        
+        Args:
+            address_ids: 地址 ID 列表
+            address_rows: 地址 ID -> 地址數據（社交媒體活動按地址字符串查詢）
+            
+        Returns:
+            地址 ID -> 預取數據（傳給 AddressContext 的 preloaded）
+        """
+        preloaded = {address_id: {} for address_id in address_ids}
+        sources = self.prefetch_sources
+        if not sources or not address_ids:
+            return preloaded
+        
+        # 地址級數據
+        requests = [
+            (source, f'get_{source}_batch', (address_ids,))
+            for source in ('trade_timestamps', 'position_changes', 'trade_pattern_stats', 'linked_addresses')
+            if source in sources
+        ]
+        
+        addresses = {}
+        if 'social_activity' in sources:
+            addresses = {
+                address_id: address_rows[address_id].get('address', '')
+                for address_id in address_ids if address_id in address_rows
+            }
+            requests.append(
+                ('social_activity', 'get_address_social_activity_batch', (sorted(set(addresses.values())),))
+            )
+        
+        # 市場級數據：按本批交易涉及的市場預取，交易記錄也一併交給上下文
+        address_markets = {}
+        news_days = [source[1] for source in sources if isinstance(source, tuple)]
+        if 'price_history' in sources or news_days:
+            trades = self.db.get_address_trades_bulk(address_ids)
+            for address_id, rows in trades.items():
+                preloaded[address_id]['trades'] = rows
+                address_markets[address_id] = {trade['market_id'] for trade in rows}
+            market_ids = sorted(set().union(*address_markets.values()))
+            
+            if 'price_history' in sources:
+                requests.append(('price_history', 'get_price_history_batch', (market_ids,)))
+            for days in news_days:
+                requests.append((('market_news', days), 'get_market_news_batch', (market_ids, days)))
+        
+        for (source, _, _), result in zip(requests, self._fetch_batches(requests)):
+            if source == 'social_activity':
+                for address_id, address in addresses.items():
+                    if address in result:
+                        preloaded[address_id]['social_activity'] = result[address]
+            elif source == 'price_history' or isinstance(source, tuple):
+                for address_id, markets in address_markets.items():
+                    for market_id in markets:
+                        if market_id in result:
+                            key = ('price_history', market_id) if source == 'price_history' \
+                                else ('market_news', market_id, source[1])
+                            preloaded[address_id][key] = result[market_id]
+            else:
+                for address_id in address_ids:
+                    if address_id in result:
+                        preloaded[address_id][source] = result[address_id]
+        
+        return preloaded
+    
+    def refresh_keyword_index(self) -> KeywordIndex:
+        """
+        刷新市場關鍵詞索引
+        
+        用 Aho-Corasick 自動機為市場標題分類，結果以位掩碼保存在 market_keyword_tags 表。
+        關鍵詞配置未變時只處理上次刷新後新增的市場；配置改變時重建整個表。
+        刷新後關鍵詞專家的統計改為整數 JOIN（見 DatabaseAdapter.get_keyword_mask_trades）。
+        
+        Returns:
+            關鍵詞索引
+        """
+        index = KeywordIndex(self.feature_spec['keyword_groups'])
+        
+        self.db.create_state_table()
+        self.db.create_market_keyword_table()
+        
+        after_id = None
+        if self.db.get_state('market_keyword_tags.signature') == index.signature:
+            after_id = int(self.db.get_state('market_keyword_tags.last_market_id') or 0)
+        else:
+            # 清空和重置刷新進度一起提交：重建中途中斷時，下次從已提交的頁繼續
+            self.logger.info("關鍵詞配置已改變，重建市場關鍵詞索引")
+            with self.db.transaction():
+                self.db.clear_market_keyword_masks()
+                self.db.set_state('market_keyword_tags.last_market_id', 0)
+                self.db.set_state('market_keyword_tags.signature', index.signature)
+        
+        classified = 0
+        for page in self.db.iter_market_pages(after_id=after_id):
+            rows = []
+            for market in page:
+                mask = index.classify(market['title'], market['category'])
+                if mask:
+                    rows.append((market['id'], mask))
+            
+            # 掩碼和刷新進度一起提交
+            with self.db.transaction():
+                self.db.upsert_market_keyword_masks(rows)
+                self.db.set_state('market_keyword_tags.last_market_id', page[-1]['id'])
+                self.db.set_state('market_keyword_tags.signature', index.signature)
+            classified += len(page)
+        
+        self.logger.info(f"市場關鍵詞索引已刷新：新分類 {classified} 個市場")
+        
+        self.keyword_index = index
+        self.feature_spec['keyword_bits'] = index.bits
+        return index
+    
+    def use_refreshed_keyword_index(self):
+        """
+        使用已刷新的市場關鍵詞索引，不再自行刷新（多進程模式的工作進程）
+        
+        索引表的簽名與當前關鍵詞配置不符時不使用索引，關鍵詞專家回退到按標題匹配。
+        """
+        self.refresh_keyword_index_on_demand = False
+        if not self.batch_config.get('keyword_index', True) or self.db.READ_ONLY:
+            return
+        
+        index = KeywordIndex(self.feature_spec['keyword_groups'])
+        if self.db.get_state('market_keyword_tags.signature') == index.signature:
+            self.keyword_index = index
+            self.feature_spec['keyword_bits'] = index.bits
+        else:
+            self.logger.warning("市場關鍵詞索引與關鍵詞配置不符，關鍵詞專家按市場標題匹配")
+    
+    def _ensure_keyword_index(self):
+        """啟用市場關鍵詞索引時，在第一次需要時刷新（只讀數據源不建立索引）"""
+        if (self.keyword_index is None and self.refresh_keyword_index_on_demand
+                and self.batch_config.get('keyword_index', True) and not self.db.READ_ONLY):
+            self.refresh_keyword_index()
+    
+    def _create_tag_writer(self) -> TagWriter:
+        """按批量配置建立標籤寫入器（啟用標籤統計表時先確保統計表已建立）"""
+        if self.db.tag_stats and self.db.ensure_tag_stats():
+            self.logger.info("已從標籤表重建標籤統計")
+        return TagWriter(
+            self.db,
+            max_rows=self.batch_config.get('write_buffer_rows', 1000),
+            flush_interval=self.batch_config.get('write_flush_seconds', 5.0),
+            logger=self.logger
+        )
+    
+    def _get_tagger_pool(self) -> ThreadPoolExecutor:
+        """獲取標籤器線程池（第一次使用時建立）"""
+        if self._tagger_pool is None:
+            self._tagger_pool = ThreadPoolExecutor(
+                max_workers=self.tagger_threads,
+                thread_name_prefix='tagger'
+            )
+        return self._tagger_pool
+    
+    def close(self):
+        """釋放服務資源（標籤器線程池、異步適配器和數據庫連接）"""
+        if self._tagger_pool is not None:
+            self._tagger_pool.shutdown()
+            self._tagger_pool = None
+        if self._async_bridge is not None:
+            self._async_bridge.close()
+        self.db.close()
+    
+    def tag_address(self, address_id: int, address_data: Optional[Dict[str, Any]] = None,
+                    features: Optional[Dict[str, Any]] = None,
+                    preloaded: Optional[Dict[Any, Any]] = None) -> List[Dict[str, Any]]:
         """
         為單個地址打標籤
         
         Args:
             address_id: 地址 ID
+            address_data: 已載入的地址數據（可選）
+            features: 批量預計算的特徵（可選）
+            preloaded: 批量預取的數據（可選，見 _prefetch_adapter_data）
             
         Returns:
             標籤列表
@@ -111,16 +425,32 @@ class AddressTaggingService:
         self.logger.info(f"開始為地址 {address_id} 打標籤...")
         
         # 獲取地址數據
-        address_data = self.db.get_address(address_id)
+        if address_data is None:
+            address_data = self.db.get_address(address_id)
         if not address_data:
             self.logger.warning(f"地址 {address_id} 不存在")
             return []
         
-        # 應用所有標籤器
+        # 沒有批量特徵時，已載入市場關鍵詞索引則仍然走索引（單個地址查詢不為此建立索引）
+        if features is None and self.keyword_index is not None:
+            features = {
+                'keyword_trades': self.db.get_keyword_mask_trades([address_id], self.keyword_index.bits)[address_id]
+            }
+        
+        # 建立地址上下文，所有標籤器共享同一份數據
+        context = AddressContext(address_id, self.db, self.data_adapter, address_data, features, preloaded)
+        
+        # 應用所有標籤器（並行時仍按標籤器順序合併結果）
         all_tags = []
-        for tagger in self.taggers:
+        if self.tagger_threads > 1:
+            pool = self._get_tagger_pool()
+            futures = [pool.submit(tagger.tag, address_data, context) for tagger in self.taggers]
+        else:
+            futures = None
+        
+        for index, tagger in enumerate(self.taggers):
             try:
-                tags = tagger.tag(address_data)
+                tags = futures[index].result() if futures else tagger.tag(address_data, context)
                 all_tags.extend(tags)
             except Exception as e:
                 self.logger.error(f"標籤器 {type(tagger).__name__} 出錯：{str(e)}")
@@ -128,26 +458,35 @@ class AddressTaggingService:
         self.logger.info(f"地址 {address_id} 獲得 {len(all_tags)} 個標籤")
         return all_tags
     
-    def tag_all_addresses(self, limit: Optional[int] = None) -> Dict[str, Any]:
+    def tag_all_addresses(self, limit: Optional[int] = None,
+                          shard: Optional[Tuple[int, int]] = None,
+                          resume: bool = False) -> Dict[str, Any]:
         """
         為所有地址打標籤
         
         Args:
             limit: 限制處理的地址數量（用於測試）
+            shard: (分片序號, 分片總數)，只處理屬於該分片的地址（多進程模式）
+            resume: 是否從檢查點繼續（跳過已提交的地址並沿用累計統計）
             
         Returns:
             統計信息
         """
         self.logger.info("=== 開始批量打標籤 ===")
+        self._ensure_keyword_index()
+        self._refresh_daily_stats()
         
-        # 獲取所有地址
-        addresses = self.db.get_all_addresses(limit=limit)
-        total_addresses = len(addresses)
-        self.logger.info(f"共 {total_addresses} 個地址待處理")
+        # 統計地址數量（地址 ID 按批次流式讀取，不一次載入全部）
+        total_addresses = self.db.count_addresses(shard=shard)
+        if limit:
+            total_addresses = min(total_addresses, limit)
+        chunk_size = self.batch_config.get('chunk_size', 2000)
+        self.logger.info(f"共 {total_addresses} 個地址待處理（每批 {chunk_size} 個）")
         
         # 統計信息
         stats = {
             'total_addresses': total_addresses,
+            'processed_addresses': 0,
             'tagged_addresses': 0,
             'total_tags': 0,
             'tag_distribution': {},
@@ -155,29 +494,58 @@ class AddressTaggingService:
             'end_time': None
         }
         
-        # 逐個處理
-        for i, address in enumerate(addresses, 1):
-            address_id = address['id']
-            
-            # 打標籤
-            tags = self.tag_address(address_id)
-            
-            if tags:
-                stats['tagged_addresses'] += 1
-                stats['total_tags'] += len(tags)
+        # 檢查點：每批提交後記錄進度，中斷後可用 --resume 繼續
+        checkpoint = Checkpoint(self.batch_config.get('checkpoint_file', 'tagging_checkpoint.json'), shard)
+        state = checkpoint.load() if resume else None
+        after_id = None
+        if state:
+            stats = state['stats']
+            total_addresses = stats['total_addresses']
+            after_id = state['last_address_id']
+            self.logger.info(
+                f"從檢查點繼續：已處理 {stats['processed_addresses']} 個地址，"
+                f"最後地址 ID {after_id}"
+            )
+        
+        # 按批次處理：每批先批量載入地址數據、第一階段特徵和適配器數據，再逐個打標籤
+        # 標籤由寫入器跨地址緩衝、多行寫入
+        processed = stats['processed_addresses']
+        remaining = limit - processed if limit else None
+        with self._create_tag_writer() as writer:
+            for chunk in self.db.iter_address_id_pages(chunk_size, after_id=after_id, shard=shard, limit=remaining):
+                address_rows = self.db.get_addresses(chunk)
+                features = self.db.extract_features(chunk, self.feature_spec)
+                preloaded = self._prefetch_adapter_data(chunk, address_rows)
                 
-                # 保存到數據庫
-                self.db.save_tags(address_id, tags)
+                for address_id in chunk:
+                    # 打標籤
+                    tags = self.tag_address(
+                        address_id, address_rows.get(address_id), features.get(address_id), preloaded[address_id]
+                    )
+                    
+                    if tags:
+                        stats['tagged_addresses'] += 1
+                        stats['total_tags'] += len(tags)
+                        
+                        # 加入寫入緩衝
+                        writer.add(address_id, tags)
+                        
+                        # 統計標籤分布
+                        for tag in tags:
+                            tag_name = tag['tag_name']
+                            stats['tag_distribution'][tag_name] = stats['tag_distribution'].get(tag_name, 0) + 1
+                    
+                    # 進度報告
+                    processed += 1
+                    if processed % 100 == 0:
+                        self.logger.info(f"進度：{processed}/{total_addresses} ({processed/total_addresses*100:.1f}%)")
                 
-                # 統計標籤分布
-                for tag in tags:
-                    tag_name = tag['tag_name']
-                    stats['tag_distribution'][tag_name] = stats['tag_distribution'].get(tag_name, 0) + 1
-            
-            # 進度報告
-            if i % 100 == 0:
-                self.logger.info(f"進度：{i}/{total_addresses} ({i/total_addresses*100:.1f}%)")
+                # 寫入本批剩餘的標籤後再記錄檢查點
+                writer.flush()
+                stats['processed_addresses'] = processed
+                checkpoint.save(chunk[-1], stats)
         
+        checkpoint.clear()
         stats['end_time'] = datetime.now()
         duration = (stats['end_time'] - stats['start_time']).total_seconds()
         
@@ -185,43 +553,89 @@ class AddressTaggingService:
         self.logger.info(f"處理時間：{duration:.2f} 秒")
         self.logger.info(f"已標記地址：{stats['tagged_addresses']}/{total_addresses}")
         self.logger.info(f"總標籤數：{stats['total_tags']}")
+        self._log_db_stats(stats, shard)
         
         return stats
     
-    def update_tags(self) -> Dict[str, Any]:
+    def update_tags(self, shard: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
         """
-        更新最近活躍地址的標籤
+        更新上次更新後有新交易的地址的標籤
         
+        Args:
+            shard: (分片序號, 分片總數)，只處理屬於該分片的地址（多進程模式）
+            
         Returns:
             統計信息
         """
         self.logger.info("=== 開始更新標籤 ===")
+        self._ensure_keyword_index()
         
-        # 獲取最近活躍的地址（最近 7 天有交易）
-        active_addresses = self.db.get_recently_active_addresses(days=7)
+        # 獲取上次更新後有新交易的地址（交易 ID 在 (水位, 當前最大交易 ID] 範圍內）
+        # 還沒有水位時（首次運行或分片數改變），回退到最近 N 天有交易的地址
+        self.db.create_state_table()
+        watermark_key = self._watermark_key(shard)
+        watermark = self.db.get_state(watermark_key)
+        max_trade_id = self.db.get_max_trade_id()
+        self._refresh_daily_stats(max_trade_id)
+        if watermark is None:
+            fallback_days = self.batch_config.get('update_fallback_days', 7)
+            self.logger.info(f"沒有增量更新水位，處理最近 {fallback_days} 天有交易的地址")
+            active_addresses = self.db.get_recently_active_addresses(days=fallback_days, shard=shard)
+        else:
+            self.logger.info(f"增量更新：交易 ID {watermark} → {max_trade_id}")
+            active_addresses = self.db.get_addresses_traded_between(int(watermark), max_trade_id, shard=shard)
         self.logger.info(f"共 {len(active_addresses)} 個活躍地址需要更新")
         
-        # 刪除舊標籤並重新打標籤
+        # 重新打標籤，只寫入與現有標籤不同的行
         stats = {
             'updated_addresses': 0,
             'total_tags': 0,
+            'added_tags': 0,
+            'removed_tags': 0,
+            'changed_tags': 0,
+            'unchanged_tags': 0,
+            'rows_written': 0,
+            'rows_avoided': 0,
             'start_time': datetime.now(),
             'end_time': None
         }
         
-        for address in active_addresses:
-            address_id = address['id']
-            
-            # 刪除舊標籤
-            self.db.delete_tags(address_id)
-            
-            # 重新打標籤
-            tags = self.tag_address(address_id)
+        chunk_size = self.batch_config.get('chunk_size', 2000)
+        epsilon = self.batch_config.get('update_confidence_epsilon', 0.01)
+        
+        with self._create_tag_writer() as writer:
+            for start in range(0, len(active_addresses), chunk_size):
+                chunk = active_addresses[start:start + chunk_size]
+                existing_tags = self.db.get_existing_tags(chunk)
+                address_rows = self.db.get_addresses(chunk)
+                preloaded = self._prefetch_adapter_data(chunk, address_rows)
+                
+                for address_id in chunk:
+                    # 重新打標籤
+                    tags = self.tag_address(address_id, address_rows.get(address_id), preloaded=preloaded[address_id])
+                    
+                    if tags:
+                        stats['updated_addresses'] += 1
+                        stats['total_tags'] += len(tags)
+                    
+                    # 計算差異
+                    existing = existing_tags.get(address_id, {})
+                    diff = self._diff_tags(existing, tags, epsilon)
+                    writer.add(address_id, diff['added'] + diff['changed'])
+                    writer.remove(address_id, diff['removed'])
+                    
+                    # 全量刪除再寫入需要的行數 - 實際寫入的行數
+                    written = len(diff['added']) + len(diff['changed']) + len(diff['removed'])
+                    automatic = sum(1 for tag in existing.values() if not tag['is_manual'])
+                    stats['added_tags'] += len(diff['added'])
+                    stats['removed_tags'] += len(diff['removed'])
+                    stats['changed_tags'] += len(diff['changed'])
+                    stats['unchanged_tags'] += diff['unchanged']
+                    stats['rows_written'] += written
+                    stats['rows_avoided'] += automatic + len(tags) - written
             
-            if tags:
-                self.db.save_tags(address_id, tags)
-                stats['updated_addresses'] += 1
-                stats['total_tags'] += len(tags)
+            # 水位與最後一批標籤在同一事務內推進
+            writer.set_state(watermark_key, max_trade_id)
         
         stats['end_time'] = datetime.now()
         duration = (stats['end_time'] - stats['start_time']).total_seconds()
@@ -230,9 +644,246 @@ class AddressTaggingService:
         self.logger.info(f"處理時間：{duration:.2f} 秒")
         self.logger.info(f"已更新地址：{stats['updated_addresses']}")
         self.logger.info(f"總標籤數：{stats['total_tags']}")
+        self.logger.info(
+            f"標籤變化：新增 {stats['added_tags']}，刪除 {stats['removed_tags']}，"
+            f"信心分數變化 {stats['changed_tags']}，未變 {stats['unchanged_tags']}"
+        )
+        self.logger.info(f"寫入行數：{stats['rows_written']}（避免 {stats['rows_avoided']} 行）")
+        self._log_db_stats(stats, shard)
         
         return stats
     
+    def export_snapshot(self, path: str) -> Dict[str, int]:
+        """
+        把地址、交易和市場數據導出為交易快照（見 utils.snapshot）
+        
+        Args:
+            path: 快照目錄
+            
+        Returns:
+            {'addresses': int, 'trades': int, 'markets': int}
+        """
+        self.logger.info(f"=== 導出交易快照到 {path} ===")
+        counts = export_snapshot(self.db, path, page_size=self.batch_config.get('chunk_size', 2000), logger=self.logger)
+        self.logger.info(f"快照已導出：{counts['addresses']} 個地址，{counts['trades']} 筆交易，{counts['markets']} 個市場")
+        return counts
+    
+    def tag_snapshot(self, limit: Optional[int] = None, output_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        從交易快照為所有地址打標籤（不連接數據庫，不寫入標籤表）
+        
+        用於調整閾值和回填：結果寫入 JSON Lines 文件（每行一個地址），統計信息與 --init 相同。
+        
+        Args:
+            limit: 限制處理的地址數量（用於測試）
+            output_path: 標籤輸出文件（可選）
+            
+        Returns:
+            統計信息
+        """
+        self.logger.info("=== 開始從快照打標籤 ===")
+        
+        total_addresses = self.db.count_addresses()
+        if limit:
+            total_addresses = min(total_addresses, limit)
+        chunk_size = self.batch_config.get('chunk_size', 2000)
+        
+        stats = {
+            'total_addresses': total_addresses,
+            'processed_addresses': 0,
+            'tagged_addresses': 0,
+            'total_tags': 0,
+            'tag_distribution': {},
+            'start_time': datetime.now(),
+            'end_time': None
+        }
+        
+        output = open(output_path, 'w', encoding='utf-8') if output_path else None
+        try:
+            for chunk in self.db.iter_address_id_pages(chunk_size, limit=limit):
+                address_rows = self.db.get_addresses(chunk)
+                features = self.db.extract_features(chunk, self.feature_spec)
+                preloaded = self._prefetch_adapter_data(chunk, address_rows)
+                
+                for address_id in chunk:
+                    tags = self.tag_address(
+                        address_id, address_rows.get(address_id), features.get(address_id), preloaded[address_id]
+                    )
+                    
+                    if tags:
+                        stats['tagged_addresses'] += 1
+                        stats['total_tags'] += len(tags)
+                        for tag in tags:
+                            tag_name = tag['tag_name']
+                            stats['tag_distribution'][tag_name] = stats['tag_distribution'].get(tag_name, 0) + 1
+                        if output:
+                            output.write(json.dumps({'address_id': address_id, 'tags': tags}, ensure_ascii=False) + '\n')
+                    
+                    stats['processed_addresses'] += 1
+                    if stats['processed_addresses'] % 100 == 0:
+                        processed = stats['processed_addresses']
+                        self.logger.info(f"進度：{processed}/{total_addresses} ({processed/total_addresses*100:.1f}%)")
+        finally:
+            if output:
+                output.close()
+        
+        stats['end_time'] = datetime.now()
+        duration = (stats['end_time'] - stats['start_time']).total_seconds()
+        
+        self.logger.info("=== 從快照打標籤完成 ===")
+        self.logger.info(f"處理時間：{duration:.2f} 秒")
+        self.logger.info(f"已標記地址：{stats['tagged_addresses']}/{total_addresses}")
+        self.logger.info(f"總標籤數：{stats['total_tags']}")
+        
+        return stats
+    
+    def _log_db_stats(self, stats: Dict[str, Any], shard: Optional[Tuple[int, int]] = None):
+        """
+        記錄數據庫連接、查詢快取和各查詢模板的使用情況
+        
+        Args:
+            stats: 運行統計（啟用查詢快取時加入 'query_cache'，啟用適配器快取時加入 'adapter_cache'）
+            shard: (分片序號, 分片總數)，用於區分各分片的查詢統計文件
+        """
+        pool = self.db.get_pool_stats()
+        self.logger.info(
+            f"數據庫連接（{pool['mode']}，{pool['pool_size']} 個）：借出 {pool['checkouts']} 次，"
+            f"平均等待 {pool['wait_time_avg_ms']:.2f} 毫秒，最長等待 {pool['wait_time_max_ms']:.2f} 毫秒，"
+            f"峰值 {pool['peak_in_use']} 個，使用率 {pool['utilization']*100:.1f}%"
+        )
+        for replica in pool['replicas']:
+            lag = f"，延遲 {replica['lag_seconds']:.0f} 秒" if replica['lag_seconds'] is not None else ''
+            self.logger.info(
+                f"只讀副本 {replica['name']}（{'健康' if replica['healthy'] else '不可用'}）："
+                f"讀取 {replica['reads']} 次，失敗 {replica['failures']} 次{lag}"
+            )
+        
+        cache = self.db.get_cache_stats()
+        if cache is not None:
+            stats['query_cache'] = cache
+            lookups = cache['hits'] + cache['misses']
+            self.logger.info(
+                f"查詢快取：命中 {cache['hits']} 次，未命中 {cache['misses']} 次"
+                f"（命中率 {cache['hits']/lookups*100 if lookups else 0:.1f}%），"
+                f"淘汰 {cache['evictions']}，過期 {cache['expirations']}，失效 {cache['invalidations']}"
+            )
+        
+        if isinstance(self.data_adapter, CachingDataAdapter):
+            stats['adapter_cache'] = self.data_adapter.get_cache_stats()
+            for name, cache in stats['adapter_cache'].items():
+                lookups = cache['hits'] + cache['misses']
+                self.logger.info(
+                    f"適配器快取 {name}：命中 {cache['hits']} 次，未命中 {cache['misses']} 次"
+                    f"（命中率 {cache['hits']/lookups*100 if lookups else 0:.1f}%），"
+                    f"淘汰 {cache['evictions']}，過期 {cache['expirations']}，當前 {cache['entries']} 條"
+                )
+        
+        query_stats = self.db.get_query_stats()
+        if query_stats is not None:
+            self._log_query_stats(query_stats, shard)
+    
+    def _log_query_stats(self, query_stats: Dict[str, Any], shard: Optional[Tuple[int, int]] = None):
+        """
+        記錄按模板匯總的查詢統計（總耗時最高的模板和慢查詢），並按配置寫入 JSON 文件
+        
+        Args:
+            query_stats: DatabaseAdapter.get_query_stats() 的結果
+            shard: (分片序號, 分片總數)
+        """
+        top = self.config['database'].get('query_stats', {}).get('log_top', 10)
+        for name, entry in list(query_stats['templates'].items())[:top]:
+            self.logger.info(
+                f"查詢 {name}：{entry['calls']} 次，共 {entry['total_ms']:.0f} 毫秒，"
+                f"p50 {entry['p50_ms']:.2f} / p95 {entry['p95_ms']:.2f} / p99 {entry['p99_ms']:.2f} 毫秒，"
+                f"返回 {entry['rows']} 行，慢查詢 {entry['slow_calls']} 次"
+            )
+        for query in query_stats['slow_queries']:
+            self.logger.warning(f"慢查詢 {query['template']}：{query['elapsed_ms']:.0f} 毫秒，執行計劃 {query['explain']}")
+        for name, partitions in query_stats.get('partitions', {}).items():
+            tables = '；'.join(f"{table} {','.join(names)}" for table, names in partitions.items())
+            self.logger.info(f"查詢 {name} 訪問分區：{tables}")
+        
+        if self.query_stats_file:
+            path = self.query_stats_file
+            if shard and shard[1] > 1:
+                root, ext = os.path.splitext(path)
+                path = f"{root}.shard{shard[0]}of{shard[1]}{ext or '.json'}"
+            self.db.query_stats.dump(path)
+            self.logger.info(f"查詢統計已寫入 {path}")
+    
+    def _refresh_daily_stats(self, upto_trade_id: Optional[int] = None):
+        """
+        啟用每日彙總時，把新交易累加到 address_daily_stats
+        
+        近期交易數、月度盈虧和近期活躍地址隨後從彙總表讀取。
+        
+        Args:
+            upto_trade_id: 處理到的交易 ID，None 表示主庫當前最大交易 ID
+        """
+        if not self.db.daily_rollup:
+            return
+        
+        batch_size = self.config['database'].get('daily_rollup', {}).get('batch_size', 100000)
+        last_trade_id = self.db.refresh_daily_stats(upto_trade_id, batch_size=batch_size)
+        self.logger.info(f"每日彙總已更新至交易 ID {last_trade_id}")
+    
+    def _watermark_key(self, shard: Optional[Tuple[int, int]] = None) -> str:
+        """
+        增量更新水位的狀態名稱（每個分片獨立）
+        
+        Args:
+            shard: (分片序號, 分片總數)
+            
+        Returns:
+            狀態名稱
+        """
+        if shard and shard[1] > 1:
+            return f"update_watermark.shard{shard[0]}of{shard[1]}"
+        return "update_watermark"
+    
+    def _diff_tags(self, existing: Dict[str, Dict[str, Any]], tags: List[Dict[str, Any]],
+                   epsilon: float) -> Dict[str, Any]:
+        """
+        比較地址現有標籤和新計算的標籤
+        
+        手動標籤不會被新增、更新或刪除。
+        
+        Args:
+            existing: 現有標籤（見 DatabaseAdapter.get_existing_tags）
+            tags: 新計算的標籤列表
+            epsilon: 信心分數變化超過此值才更新
+            
+        Returns:
+            {
+                'added': List[Dict],  # 新增的標籤
+                'changed': List[Dict],  # 類別或信心分數變化的標籤
+                'removed': List[str],  # 要刪除的標籤名稱
+                'unchanged': int  # 未變化的標籤數量
+            }
+        """
+        diff = {'added': [], 'changed': [], 'removed': [], 'unchanged': 0}
+        new_names = set()
+        
+        for tag in tags:
+            new_names.add(tag['tag_name'])
+            current = existing.get(tag['tag_name'])
+            if current is None:
+                diff['added'].append(tag)
+            elif current['is_manual']:
+                continue
+            elif (current['category'] != tag['category'] or
+                  abs(current['confidence_score'] - tag['confidence_score']) > epsilon):
+                diff['changed'].append(tag)
+            else:
+                diff['unchanged'] += 1
+        
+        diff['removed'] = [
+            tag_name for tag_name, current in existing.items()
+            if tag_name not in new_names and not current['is_manual']
+        ]
+        
+        return diff
+    
     def generate_report(self) -> Dict[str, Any]:
         """
         生成標籤統計報告
@@ -254,12 +905,21 @@ class AddressTaggingService:
         for tag_name, count in list(report['tag_distribution'].items())[:10]:
             self.logger.info(f"  {tag_name}: {count}")
         
+        self.logger.info("\n類別分布：")
+        for category, count in report['category_distribution'].items():
+            self.logger.info(f"  {category}: {count}")
+        
+        self.logger.info("\n信心分數分布：")
+        width = 1 / len(report['confidence_histogram'])
+        for bucket, count in enumerate(report['confidence_histogram']):
+            self.logger.info(f"  {bucket * width:.1f}-{(bucket + 1) * width:.1f}: {count}")
+        
         return report
     
     def export_json(self, output_path: str):
         """導出標籤為 JSON 格式"""
         self.logger.info(f"導出標籤到 {output_path}...")
-        tags = self.db.export_all_tags()
+        tags = self.db.get_all_tags()
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(tags, f, indent=2, ensure_ascii=False, default=str)
         self.logger.info(f"✅ 已導出 {len(tags)} 條標籤記錄")
@@ -268,7 +928,7 @@ class AddressTaggingService:
         """導出標籤為 CSV 格式"""
         import csv
         self.logger.info(f"導出標籤到 {output_path}...")
-        tags = self.db.export_all_tags()
+        tags = self.db.get_all_tags()
         
         with open(output_path, 'w', newline='', encoding='utf-8') as f:
             if tags:
@@ -279,6 +939,70 @@ class AddressTaggingService:
         self.logger.info(f"✅ 已導出 {len(tags)} 條標籤記錄")
 
 
+def _run_shard(config_path: str, data_adapter: Optional[Union[DataAdapter, AsyncDataAdapter]], mode: str,
+               shard: Tuple[int, int], limit: Optional[int], resume: bool = False) -> Dict[str, Any]:
+    """
+    在工作進程中處理一個分片
+    
+    每個工作進程建立自己的服務實例（獨立的數據庫連接和標籤器）。
+    """
+    service = AddressTaggingService(config_path=config_path, data_adapter=data_adapter)
+    try:
+        service.use_refreshed_keyword_index()
+        if mode == 'init':
+            return service.tag_all_addresses(limit=limit, shard=shard, resume=resume)
+        return service.update_tags(shard=shard)
+    finally:
+        service.close()
+
+
+def run_parallel(config_path: str, mode: str, workers: int,
+                 data_adapter: Optional[Union[DataAdapter, AsyncDataAdapter]] = None,
+                 limit: Optional[int] = None, resume: bool = False) -> Dict[str, Any]:
+    """
+    多進程分片打標籤
+    
+    地址 ID 按取模分成 N 個分片，每個分片由一個工作進程處理，
+    最後合併各進程的統計信息。
+    
+    Args:
+        config_path: 配置文件路徑
+        mode: 'init'（為所有地址打標籤）或 'update'（更新上次更新後有新交易的地址）
+        workers: 工作進程數
+        data_adapter: 數據適配器（必須可序列化，會複製到每個工作進程）
+        limit: 限制處理的地址總數（平均分配到各分片）
+        resume: 是否從各分片的檢查點繼續（僅 'init'）
+        
+    Returns:
+        合併後的統計信息
+    """
+    shards = []
+    for index in range(workers):
+        shard_limit = None
+        if limit:
+            shard_limit = limit // workers + (1 if index < limit % workers else 0)
+            if shard_limit == 0:
+                continue
+        shards.append(((index, workers), shard_limit))
+    
+    # 市場關鍵詞索引只在主進程刷新一次：各進程自行刷新時，
+    # 一個進程重建索引表會清掉其他進程已寫入的掩碼
+    service = AddressTaggingService(config_path=config_path)
+    try:
+        service._ensure_keyword_index()
+    finally:
+        service.close()
+    
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+        futures = [
+            pool.submit(_run_shard, config_path, data_adapter, mode, shard, shard_limit, resume)
+            for shard, shard_limit in shards
+        ]
+        results = [future.result() for future in futures]
+    
+    return merge_stats(results)
+
+
 def main():
     """主函數"""
     parser = argparse.ArgumentParser(description='Polymarket 地址標籤自動標記服務')
@@ -288,27 +1012,95 @@ def main():
     
     # 操作模式
     parser.add_argument('--init', action='store_true', help='初始化：為所有地址打標籤')
-    parser.add_argument('--update', action='store_true', help='更新：為最近活躍地址更新標籤')
+    parser.add_argument('--update', action='store_true', help='更新：為上次更新後有新交易的地址更新標籤')
     parser.add_argument('--address', type=int, help='為指定地址打標籤')
     parser.add_argument('--report', action='store_true', help='生成統計報告')
+    parser.add_argument('--show-sql', action='store_true', help='顯示按配置編譯的查詢模板')
+    parser.add_argument('--bootstrap-schema', action='store_true', help='創建服務使用的表和推薦索引')
+    parser.add_argument('--check-indexes', action='store_true',
+                        help='檢查推薦索引並 EXPLAIN 所有查詢模板，有缺少的索引或全表掃描時以狀態碼 1 退出')
+    
+    # 並行選項
+    parser.add_argument('--workers', type=int, default=1, help='工作進程數（--init / --update 按地址 ID 分片並行）')
+    parser.add_argument('--resume', action='store_true', help='從檢查點繼續中斷的 --init')
+    parser.add_argument('--query-stats', help='把按模板匯總的查詢統計寫入 JSON 文件（覆蓋 database.query_stats.dump_file）')
+    parser.add_argument('--tagger-threads', type=int, help='單個地址內並行執行標籤器的線程數（覆蓋 concurrency.tagger_threads）')
     
     # 導出選項
     parser.add_argument('--export-json', help='導出標籤為 JSON 文件')
     parser.add_argument('--export-csv', help='導出標籤為 CSV 文件')
     
+    # 交易快照
+    parser.add_argument('--snapshot-export', metavar='DIR', help='把地址、交易和市場數據導出為交易快照')
+    parser.add_argument('--snapshot', metavar='DIR', help='從交易快照為所有地址打標籤（不連接數據庫）')
+    parser.add_argument('--snapshot-output', metavar='FILE', help='--snapshot 的標籤輸出文件（JSON Lines）')
+    
     # 測試選項
     parser.add_argument('--limit', type=int, help='限制處理的地址數量（用於測試）')
     parser.add_argument('--use-mock', action='store_true', help='使用模擬數據適配器（用於測試）')
+    parser.add_argument('--use-async-mock', action='store_true', help='使用異步模擬數據適配器（用於測試異步路徑）')
+    parser.add_argument('--sqlite-seed', type=int, metavar='N',
+                        help='在 SQLite 數據庫中生成 N 個地址的模擬交易數據（database.url 需為 sqlite:///）')
     
     args = parser.parse_args()
     
+    if args.resume and not args.init:
+        parser.error('--resume 需要與 --init 一起使用')
+    if args.snapshot_output and not args.snapshot:
+        parser.error('--snapshot-output 需要與 --snapshot 一起使用')
+    
+    data_adapter = None
+    if args.use_async_mock:
+        data_adapter = AsyncMockDataAdapter()
+    elif args.use_mock:
+        data_adapter = MockDataAdapter()
+    
+    # 多進程模式：每個工作進程建立自己的服務實例
+    if args.workers > 1 and (args.init or args.update):
+        mode = 'init' if args.init else 'update'
+        stats = run_parallel(args.config, mode, args.workers, data_adapter=data_adapter,
+                             limit=args.limit, resume=args.resume)
+        duration = (stats['end_time'] - stats['start_time']).total_seconds()
+        print(f"\n✅ {'初始化' if args.init else '更新'}完成（{stats['workers']} 個工作進程，{duration:.2f} 秒）")
+        if args.init:
+            print(f"   已標記地址：{stats['tagged_addresses']}/{stats['total_addresses']}")
+        else:
+            print(f"   已更新地址：{stats['updated_addresses']}")
+            print(f"   寫入行數：{stats['rows_written']}（避免 {stats['rows_avoided']} 行）")
+        print(f"   總標籤數：{stats['total_tags']}")
+        return
+    
+    # 從快照打標籤：不連接數據庫
+    if args.snapshot:
+        service = AddressTaggingService(config_path=args.config, data_adapter=data_adapter, snapshot_path=args.snapshot)
+        if args.tagger_threads:
+            service.tagger_threads = args.tagger_threads
+        stats = service.tag_snapshot(limit=args.limit, output_path=args.snapshot_output)
+        duration = (stats['end_time'] - stats['start_time']).total_seconds()
+        print(f"\n✅ 快照打標籤完成（{duration:.2f} 秒）")
+        print(f"   已標記地址：{stats['tagged_addresses']}/{stats['total_addresses']}")
+        print(f"   總標籤數：{stats['total_tags']}")
+        if args.snapshot_output:
+            print(f"   標籤已寫入 {args.snapshot_output}")
+        service.close()
+        return
+    
     # 初始化服務
-    data_adapter = MockDataAdapter() if args.use_mock else None
     service = AddressTaggingService(config_path=args.config, data_adapter=data_adapter)
+    if args.tagger_threads:
+        service.tagger_threads = args.tagger_threads
+    if args.query_stats:
+        service.query_stats_file = args.query_stats
+    
+    if args.sqlite_seed:
+        if not hasattr(service.db, 'populate_synthetic_data'):
+            parser.error('--sqlite-seed 需要 SQLite 數據庫（database.url 為 sqlite:///路徑）')
+        counts = service.db.populate_synthetic_data(addresses=args.sqlite_seed)
+        print(f"\n✅ 已生成 {counts['addresses']} 個地址、{counts['markets']} 個市場、{counts['trades']} 筆交易")
     
     # 執行操作
     if args.init:
-        stats = service.tag_all_addresses(limit=args.limit)
+        stats = service.tag_all_addresses(limit=args.limit, resume=args.resume)
         print(f"\n✅ 初始化完成")
         print(f"   已標記地址：{stats['tagged_addresses']}/{stats['total_addresses']}")
         print(f"   總標籤數：{stats['total_tags']}")
@@ -318,6 +1110,7 @@ def main():
         print(f"\n✅ 更新完成")
         print(f"   已更新地址：{stats['updated_addresses']}")
         print(f"   總標籤數：{stats['total_tags']}")
+        print(f"   寫入行數：{stats['rows_written']}（避免 {stats['rows_avoided']} 行）")
     
     elif args.address:
         tags = service.tag_address(args.address)
@@ -334,6 +1127,34 @@ def main():
         print(f"   總標籤數：{report['total_tags']}")
         print(f"   平均每地址標籤數：{report['avg_tags_per_address']:.2f}")
     
+    elif args.show_sql:
+        for name, sql in service.db.get_compiled_sql().items():
+            print(f"\n-- {name}")
+            print(sql.strip())
+    
+    elif args.bootstrap_schema or args.check_indexes:
+        schema = SchemaManager(service.db, service.logger)
+        if args.bootstrap_schema:
+            created = schema.bootstrap()
+            print(f"\n✅ 表結構已就緒，新建 {len(created)} 個索引")
+            for index in created:
+                print(f"   {index['name']} ({', '.join(index['columns'])})")
+        
+        result = schema.check()
+        print(f"\n🔍 索引檢查")
+        print(f"   缺少的推薦索引：{len(result['missing_indexes'])}")
+        for index in result['missing_indexes']:
+            print(f"     {index['ddl']};  -- {', '.join(index['used_by'])}")
+        print(f"   全量掃描的查詢模板：{len(result['full_scans'])}")
+        for scan in result['full_scans']:
+            print(f"     {scan['template']}: {', '.join(scan['tables'])}")
+        if result['unexplained']:
+            print(f"   無法 EXPLAIN 的模板：{', '.join(result['unexplained'])}")
+        
+        if args.check_indexes and (result['missing_indexes'] or result['full_scans']):
+            service.close()
+            sys.exit(1)
+    
     elif args.export_json:
         service.export_json(args.export_json)
         print(f"\n✅ 已導出到 {args.export_json}")
@@ -342,8 +1163,15 @@ def main():
         service.export_csv(args.export_csv)
         print(f"\n✅ 已導出到 {args.export_csv}")
     
-    else:
+    elif args.snapshot_export:
+        counts = service.export_snapshot(args.snapshot_export)
+        print(f"\n✅ 快照已導出到 {args.snapshot_export}")
+        print(f"   {counts['addresses']} 個地址、{counts['trades']} 筆交易、{counts['markets']} 個市場")
+    
+    elif not args.sqlite_seed:
         parser.print_help()
+    
+    service.close()
 
 
 if __name__ == '__main__':
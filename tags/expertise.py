@@ -14,7 +14,9 @@
 - 全能型
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from utils.context import AddressContext
 
 
 class ExpertiseTagger:
@@ -33,18 +35,19 @@ class ExpertiseTagger:
         self.config = config['tags']['專長類別']
         self.confidence_calc = confidence_calc
     
-    def tag(self, address_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def tag(self, address_data: Dict[str, Any], context: Optional[AddressContext] = None) -> List[Dict[str, Any]]:
         """
         為地址打上專長類別標籤
         
         Args:
             address_data: 地址數據
+            context: 地址上下文（可選，未提供時自行建立）
             
         Returns:
             標籤列表
         """
         tags = []
-        address_id = address_data['id']
+        ctx = context or AddressContext(address_data['id'], self.db, address_data=address_data)
         total_trades = address_data.get('total_trades', 0)
         
         if total_trades == 0:
@@ -53,26 +56,26 @@ class ExpertiseTagger:
         # 基礎類別專家標籤
         for tag_name in ['政治專家', '體育專家', '加密專家', '娛樂專家', '經濟專家']:
             if self.config[tag_name]['enabled']:
-                tag = self._tag_category_expert(address_id, total_trades, tag_name)
+                tag = self._tag_category_expert(ctx, total_trades, tag_name)
                 if tag:
                     tags.append(tag)
         
         # 關鍵詞類別專家標籤
         for tag_name in ['選舉專家', 'NFL專家', 'NBA專家', '足球專家']:
             if self.config[tag_name]['enabled']:
-                tag = self._tag_keyword_expert(address_id, total_trades, tag_name)
+                tag = self._tag_keyword_expert(ctx, total_trades, tag_name)
                 if tag:
                     tags.append(tag)
         
         # 全能型
         if self.config['全能型']['enabled']:
-            tag = self._tag_all_rounder(address_id, total_trades)
+            tag = self._tag_all_rounder(ctx, total_trades)
             if tag:
                 tags.append(tag)
         
         return tags
     
-    def _tag_category_expert(self, address_id: int, total_trades: int, tag_name: str) -> Dict[str, Any]:
+    def _tag_category_expert(self, ctx: AddressContext, total_trades: int, tag_name: str) -> Dict[str, Any]:
         """
         基礎類別專家標籤
         
@@ -83,7 +86,7 @@ class ExpertiseTagger:
         cfg = self.config[tag_name]
         category = cfg['category']
         
-        category_trades = self.db.get_category_trades(address_id, category)
+        category_trades = ctx.category_trades(category)
         category_ratio = category_trades / total_trades if total_trades > 0 else 0
         
         if (category_ratio >= cfg['ratio_threshold'] and
@@ -102,7 +105,7 @@ class ExpertiseTagger:
         
         return None
     
-    def _tag_keyword_expert(self, address_id: int, total_trades: int, tag_name: str) -> Dict[str, Any]:
+    def _tag_keyword_expert(self, ctx: AddressContext, total_trades: int, tag_name: str) -> Dict[str, Any]:
         """
         關鍵詞類別專家標籤
         
@@ -114,7 +117,7 @@ class ExpertiseTagger:
         keywords = cfg['keywords']
         parent_category = cfg.get('parent_category')
         
-        keyword_trades = self.db.get_keyword_trades(address_id, keywords, parent_category)
+        keyword_trades = ctx.keyword_trades(tag_name, keywords, parent_category)
         keyword_ratio = keyword_trades / total_trades if total_trades > 0 else 0
         
         if (keyword_ratio >= cfg['ratio_threshold'] and
@@ -133,7 +136,7 @@ class ExpertiseTagger:
         
         return None
     
-    def _tag_all_rounder(self, address_id: int, total_trades: int) -> Dict[str, Any]:
+    def _tag_all_rounder(self, ctx: AddressContext, total_trades: int) -> Dict[str, Any]:
         """
         全能型標籤
         
@@ -147,14 +150,14 @@ class ExpertiseTagger:
         if total_trades < cfg['min_trades']:
             return None
         
-        # 獲取各類別的交易次數
+        # 獲取各類別的交易次數（與類別專家共用同一份類別直方圖）
         categories = ['Politics', 'Sports', 'Crypto', 'Entertainment', 'Economics']
-        category_counts = {}
-        
-        for category in categories:
-            count = self.db.get_category_trades(address_id, category)
-            if count > 0:
-                category_counts[category] = count
+        histogram = ctx.category_histogram
+        category_counts = {
+            category: histogram[category]
+            for category in categories
+            if histogram.get(category, 0) > 0
+        }
         
         if len(category_counts) < cfg['min_categories']:
             return None
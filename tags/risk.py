@@ -6,7 +6,9 @@
 - 高風險
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from utils.context import AddressContext
 
 
 class RiskTagger:
@@ -25,34 +27,35 @@ class RiskTagger:
         self.config = config['tags']['風險偏好']
         self.confidence_calc = confidence_calc
     
-    def tag(self, address_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def tag(self, address_data: Dict[str, Any], context: Optional[AddressContext] = None) -> List[Dict[str, Any]]:
         """
         為地址打上風險偏好標籤
         
         Args:
             address_data: 地址數據
+            context: 地址上下文（可選，未提供時自行建立）
             
         Returns:
             標籤列表
         """
         tags = []
-        address_id = address_data['id']
+        ctx = context or AddressContext(address_data['id'], self.db, address_data=address_data)
         
         # 低風險
         if self.config['低風險']['enabled']:
-            tag = self._tag_low_risk(address_id)
+            tag = self._tag_low_risk(ctx)
             if tag:
                 tags.append(tag)
         
         # 高風險
         if self.config['高風險']['enabled']:
-            tag = self._tag_high_risk(address_id)
+            tag = self._tag_high_risk(ctx)
             if tag:
                 tags.append(tag)
         
         return tags
     
-    def _tag_low_risk(self, address_id: int) -> Dict[str, Any]:
+    def _tag_low_risk(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         低風險標籤
         
@@ -61,7 +64,7 @@ class RiskTagger:
         - 交易次數 >= 最小值
         """
         cfg = self.config['低風險']
-        price_data = self.db.get_price_distribution(address_id)
+        price_data = ctx.price_distribution
         
         if not price_data or len(price_data) < cfg['min_trades']:
             return None
@@ -88,7 +91,7 @@ class RiskTagger:
         
         return None
     
-    def _tag_high_risk(self, address_id: int) -> Dict[str, Any]:
+    def _tag_high_risk(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         高風險標籤
         
@@ -97,7 +100,7 @@ class RiskTagger:
         - 交易次數 >= 最小值
         """
         cfg = self.config['高風險']
-        price_data = self.db.get_price_distribution(address_id)
+        price_data = ctx.price_distribution
         
         if not price_data or len(price_data) < cfg['min_trades']:
             return None
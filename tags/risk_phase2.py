@@ -10,45 +10,52 @@
 - 持倉時長和價格分布（通過 DataAdapter 獲取）
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import statistics
 
+from utils.context import AddressContext
+
 
 class RiskPhase2Tagger:
     """風險偏好標籤器（第二階段）"""
     
+    # 讀取的適配器數據源 -> 使用它的標籤
+    ADAPTER_SOURCES = {
+        'trade_timestamps': ['均衡型', '保守型', '激進型']
+    }
+    
     def __init__(self, db, data_adapter, config: Dict[str, Any], confidence_calc):
         self.db = db
         self.data_adapter = data_adapter
         self.config = config['tags']['風險偏好']
         self.confidence_calc = confidence_calc
     
-    def tag(self, address_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def tag(self, address_data: Dict[str, Any], context: Optional[AddressContext] = None) -> List[Dict[str, Any]]:
         """為地址打上風險偏好標籤（第二階段）"""
         tags = []
-        address_id = address_data['id']
+        ctx = context or AddressContext(address_data['id'], self.db, self.data_adapter, address_data)
         
         # 均衡型
         if self.config['均衡型']['enabled']:
-            tag = self._tag_balanced(address_id)
+            tag = self._tag_balanced(ctx)
             if tag:
                 tags.append(tag)
         
         # 保守型
         if self.config['保守型']['enabled']:
-            tag = self._tag_conservative(address_id)
+            tag = self._tag_conservative(ctx)
             if tag:
                 tags.append(tag)
         
         # 激進型
         if self.config['激進型']['enabled']:
-            tag = self._tag_aggressive(address_id)
+            tag = self._tag_aggressive(ctx)
             if tag:
                 tags.append(tag)
         
         return tags
     
-    def _tag_balanced(self, address_id: int) -> Dict[str, Any]:
+    def _tag_balanced(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         均衡型標籤
         
@@ -61,7 +68,7 @@ class RiskPhase2Tagger:
         
         try:
             # 獲取交易價格分布
-            trades = self.db.get_address_trades(address_id)
+            trades = ctx.trades
             if len(trades) < cfg['min_trades']:
                 return None
             
@@ -74,7 +81,7 @@ class RiskPhase2Tagger:
             price_ratio = price_in_range / len(prices)
             
             # 獲取持倉時長
-            timestamps = self.data_adapter.get_trade_timestamps(address_id)
+            timestamps = ctx.trade_timestamps
             holding_periods = []
             for trade in timestamps:
                 if trade['exit_time']:
@@ -99,11 +106,11 @@ class RiskPhase2Tagger:
                 }
         
         except NotImplementedError:
-            return self._tag_balanced_simplified(address_id)
+            return self._tag_balanced_simplified(ctx)
         
         return None
     
-    def _tag_conservative(self, address_id: int) -> Dict[str, Any]:
+    def _tag_conservative(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         保守型標籤
         
@@ -115,7 +122,7 @@ class RiskPhase2Tagger:
         cfg = self.config['保守型']
         
         try:
-            trades = self.db.get_address_trades(address_id)
+            trades = ctx.trades
             if len(trades) < cfg['min_trades']:
                 return None
             
@@ -124,7 +131,7 @@ class RiskPhase2Tagger:
             high_prob_ratio = high_prob_trades / len(trades)
             
             # 獲取持倉時長
-            timestamps = self.data_adapter.get_trade_timestamps(address_id)
+            timestamps = ctx.trade_timestamps
             holding_periods = []
             for trade in timestamps:
                 if trade['exit_time']:
@@ -149,11 +156,11 @@ class RiskPhase2Tagger:
                 }
         
         except NotImplementedError:
-            return self._tag_conservative_simplified(address_id)
+            return self._tag_conservative_simplified(ctx)
         
         return None
     
-    def _tag_aggressive(self, address_id: int) -> Dict[str, Any]:
+    def _tag_aggressive(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         激進型標籤
         
@@ -165,7 +172,7 @@ class RiskPhase2Tagger:
         cfg = self.config['激進型']
         
         try:
-            trades = self.db.get_address_trades(address_id)
+            trades = ctx.trades
             if len(trades) < cfg['min_trades']:
                 return None
             
@@ -174,7 +181,7 @@ class RiskPhase2Tagger:
             low_prob_ratio = low_prob_trades / len(trades)
             
             # 獲取持倉時長
-            timestamps = self.data_adapter.get_trade_timestamps(address_id)
+            timestamps = ctx.trade_timestamps
             holding_periods = []
             for trade in timestamps:
                 if trade['exit_time']:
@@ -199,16 +206,16 @@ class RiskPhase2Tagger:
                 }
         
         except NotImplementedError:
-            return self._tag_aggressive_simplified(address_id)
+            return self._tag_aggressive_simplified(ctx)
         
         return None
     
     # ==================== 簡化版邏輯 ====================
     
-    def _tag_balanced_simplified(self, address_id: int) -> Dict[str, Any]:
+    def _tag_balanced_simplified(self, ctx: AddressContext) -> Dict[str, Any]:
         """均衡型標籤（簡化版）"""
         cfg = self.config['均衡型']
-        trades = self.db.get_address_trades(address_id)
+        trades = ctx.trades
         
         if len(trades) < cfg['min_trades']:
             return None
@@ -229,10 +236,10 @@ class RiskPhase2Tagger:
         
         return None
     
-    def _tag_conservative_simplified(self, address_id: int) -> Dict[str, Any]:
+    def _tag_conservative_simplified(self, ctx: AddressContext) -> Dict[str, Any]:
         """保守型標籤（簡化版）"""
         cfg = self.config['保守型']
-        trades = self.db.get_address_trades(address_id)
+        trades = ctx.trades
         
         if len(trades) < cfg['min_trades']:
             return None
@@ -249,10 +256,10 @@ class RiskPhase2Tagger:
         
         return None
     
-    def _tag_aggressive_simplified(self, address_id: int) -> Dict[str, Any]:
+    def _tag_aggressive_simplified(self, ctx: AddressContext) -> Dict[str, Any]:
         """激進型標籤（簡化版）"""
         cfg = self.config['激進型']
-        trades = self.db.get_address_trades(address_id)
+        trades = ctx.trades
         
         if len(trades) < cfg['min_trades']:
             return None
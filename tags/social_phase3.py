@@ -11,51 +11,57 @@
 - 社交媒體 API（Twitter、Discord）
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from utils.context import AddressContext
 
 
 class SocialPhase3Tagger:
     """社交影響力標籤器（第三階段）"""
     
+    # 讀取的適配器數據源 -> 使用它的標籤
+    ADAPTER_SOURCES = {
+        'social_activity': ['KOL', '社群領袖', '跟單目標', '隱形巨鯨']
+    }
+    
     def __init__(self, db, data_adapter, config: Dict[str, Any], confidence_calc):
         self.db = db
         self.data_adapter = data_adapter
         self.config = config['tags']['社交影響力']
         self.confidence_calc = confidence_calc
     
-    def tag(self, address_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def tag(self, address_data: Dict[str, Any], context: Optional[AddressContext] = None) -> List[Dict[str, Any]]:
         """為地址打上社交影響力標籤（第三階段）"""
         tags = []
-        address_id = address_data['id']
-        address = address_data.get('address', '')
+        ctx = context or AddressContext(address_data['id'], self.db, self.data_adapter, address_data)
         
         # KOL
         if self.config['KOL']['enabled']:
-            tag = self._tag_kol(address)
+            tag = self._tag_kol(ctx)
             if tag:
                 tags.append(tag)
         
         # 社群領袖
         if self.config['社群領袖']['enabled']:
-            tag = self._tag_community_leader(address)
+            tag = self._tag_community_leader(ctx)
             if tag:
                 tags.append(tag)
         
         # 跟單目標
         if self.config['跟單目標']['enabled']:
-            tag = self._tag_copy_target(address_id, address_data)
+            tag = self._tag_copy_target(ctx, address_data)
             if tag:
                 tags.append(tag)
         
         # 隱形巨鯨
         if self.config['隱形巨鯨']['enabled']:
-            tag = self._tag_silent_whale(address, address_data)
+            tag = self._tag_silent_whale(ctx, address_data)
             if tag:
                 tags.append(tag)
         
         return tags
     
-    def _tag_kol(self, address: str) -> Dict[str, Any]:
+    def _tag_kol(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         KOL 標籤
         
@@ -67,7 +73,7 @@ class SocialPhase3Tagger:
         cfg = self.config['KOL']
         
         try:
-            social_data = self.data_adapter.get_address_social_activity(address)
+            social_data = ctx.social_activity
             
             if (social_data['twitter_followers'] >= cfg['min_followers'] and
                 social_data['twitter_mentions'] >= cfg['min_mentions'] and
@@ -89,7 +95,7 @@ class SocialPhase3Tagger:
         
         return None
     
-    def _tag_community_leader(self, address: str) -> Dict[str, Any]:
+    def _tag_community_leader(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         社群領袖標籤
         
@@ -101,7 +107,7 @@ class SocialPhase3Tagger:
         cfg = self.config['社群領袖']
         
         try:
-            social_data = self.data_adapter.get_address_social_activity(address)
+            social_data = ctx.social_activity
             
             if (social_data['discord_messages'] >= cfg['min_discord_messages'] and
                 social_data['twitter_mentions'] >= cfg['min_mentions']):
@@ -122,7 +128,7 @@ class SocialPhase3Tagger:
         
         return None
     
-    def _tag_copy_target(self, address_id: int, address_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _tag_copy_target(self, ctx: AddressContext, address_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         跟單目標標籤
         
@@ -138,9 +144,8 @@ class SocialPhase3Tagger:
             address_data['total_trades'] >= cfg['min_trades']):
             
             # 檢查社交媒體
-            address = address_data.get('address', '')
             try:
-                social_data = self.data_adapter.get_address_social_activity(address)
+                social_data = ctx.social_activity
                 has_social_presence = (social_data['twitter_followers'] > 0 or
                                       social_data['discord_messages'] > 0)
             except:
@@ -160,7 +165,7 @@ class SocialPhase3Tagger:
         
         return None
     
-    def _tag_silent_whale(self, address: str, address_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _tag_silent_whale(self, ctx: AddressContext, address_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         隱形巨鯨標籤
         
@@ -176,7 +181,7 @@ class SocialPhase3Tagger:
             
             # 檢查社交媒體（應該沒有或很少）
             try:
-                social_data = self.data_adapter.get_address_social_activity(address)
+                social_data = ctx.social_activity
                 is_silent = (social_data['twitter_followers'] < cfg['max_followers'] and
                            social_data['twitter_mentions'] < cfg['max_mentions'])
             except:
@@ -17,89 +17,100 @@
 - 新聞 API、社交媒體 API、交易模式分析
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import statistics
 
+from utils.context import AddressContext
+
 
 class SpecialPhase3Tagger:
     """特殊標記標籤器（第三階段）"""
     
+    # 讀取的適配器數據源 -> 使用它的標籤（疑似內線查 3 天內的新聞，新聞追蹤查 1 天內的）
+    ADAPTER_SOURCES = {
+        ('market_news', 3): ['疑似內線'],
+        ('market_news', 1): ['新聞追蹤'],
+        'social_activity': ['名人'],
+        'trade_pattern_stats': ['機器人/腳本'],
+        'linked_addresses': ['多帳號操作'],
+        'position_changes': ['市場操縱嫌疑']
+    }
+    
     def __init__(self, db, data_adapter, config: Dict[str, Any], confidence_calc):
         self.db = db
         self.data_adapter = data_adapter
         self.config = config['tags']['特殊標記']
         self.confidence_calc = confidence_calc
     
-    def tag(self, address_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def tag(self, address_data: Dict[str, Any], context: Optional[AddressContext] = None) -> List[Dict[str, Any]]:
         """為地址打上特殊標記標籤（第三階段）"""
         tags = []
-        address_id = address_data['id']
-        address = address_data.get('address', '')
+        ctx = context or AddressContext(address_data['id'], self.db, self.data_adapter, address_data)
         
         # 疑似內線
         if self.config['疑似內線']['enabled']:
-            tag = self._tag_insider(address_id)
+            tag = self._tag_insider(ctx)
             if tag:
                 tags.append(tag)
         
         # 新聞追蹤
         if self.config['新聞追蹤']['enabled']:
-            tag = self._tag_news_trader(address_id)
+            tag = self._tag_news_trader(ctx)
             if tag:
                 tags.append(tag)
         
         # 名人
         if self.config['名人']['enabled']:
-            tag = self._tag_celebrity(address)
+            tag = self._tag_celebrity(ctx)
             if tag:
                 tags.append(tag)
         
         # 機器人/腳本
         if self.config['機器人/腳本']['enabled']:
-            tag = self._tag_bot(address_id)
+            tag = self._tag_bot(ctx)
             if tag:
                 tags.append(tag)
         
         # 多帳號操作
         if self.config['多帳號操作']['enabled']:
-            tag = self._tag_multi_account(address_id)
+            tag = self._tag_multi_account(ctx)
             if tag:
                 tags.append(tag)
         
         # 市場操縱嫌疑
         if self.config['市場操縱嫌疑']['enabled']:
-            tag = self._tag_manipulation(address_id)
+            tag = self._tag_manipulation(ctx)
             if tag:
                 tags.append(tag)
         
         # 專業機構
         if self.config['專業機構']['enabled']:
-            tag = self._tag_institution(address_id, address_data)
+            tag = self._tag_institution(ctx, address_data)
             if tag:
                 tags.append(tag)
         
         # 新手
         if self.config['新手']['enabled']:
-            tag = self._tag_newbie(address_id, address_data)
+            tag = self._tag_newbie(ctx, address_data)
             if tag:
                 tags.append(tag)
         
         # 休眠喚醒
         if self.config['休眠喚醒']['enabled']:
-            tag = self._tag_dormant_awakened(address_id)
+            tag = self._tag_dormant_awakened(ctx)
             if tag:
                 tags.append(tag)
         
         # 單一市場專注
         if self.config['單一市場專注']['enabled']:
-            tag = self._tag_single_market_focus(address_id)
+            tag = self._tag_single_market_focus(ctx)
             if tag:
                 tags.append(tag)
         
         return tags
     
-    def _tag_insider(self, address_id: int) -> Dict[str, Any]:
+    def _tag_insider(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         疑似內線標籤
         
@@ -111,8 +122,8 @@ class SpecialPhase3Tagger:
         cfg = self.config['疑似內線']
         
         try:
-            trades = self.db.get_address_trades(address_id)
-            address_data = self.db.get_address(address_id)
+            trades = ctx.trades
+            address_data = ctx.address
             
             if len(trades) < cfg['min_trades']:
                 return None
@@ -123,7 +134,7 @@ class SpecialPhase3Tagger:
             # 檢查交易是否在重大新聞前
             early_trades_count = 0
             for trade in trades:
-                news = self.data_adapter.get_market_news(trade['market_id'], days=3)
+                news = ctx.market_news(trade['market_id'], days=3)
                 if not news:
                     continue
                 
@@ -146,11 +157,11 @@ class SpecialPhase3Tagger:
                 }
         
         except (NotImplementedError, Exception):
-            return self._tag_insider_simplified(address_id)
+            return self._tag_insider_simplified(ctx)
         
         return None
     
-    def _tag_news_trader(self, address_id: int) -> Dict[str, Any]:
+    def _tag_news_trader(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         新聞追蹤標籤
         
@@ -161,13 +172,13 @@ class SpecialPhase3Tagger:
         cfg = self.config['新聞追蹤']
         
         try:
-            trades = self.db.get_address_trades(address_id)
+            trades = ctx.trades
             if len(trades) < cfg['min_trades']:
                 return None
             
             news_driven_count = 0
             for trade in trades:
-                news = self.data_adapter.get_market_news(trade['market_id'], days=1)
+                news = ctx.market_news(trade['market_id'], days=1)
                 if not news:
                     continue
                 
@@ -198,7 +209,7 @@ class SpecialPhase3Tagger:
         
         return None
     
-    def _tag_celebrity(self, address: str) -> Dict[str, Any]:
+    def _tag_celebrity(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         名人標籤
         
@@ -209,7 +220,7 @@ class SpecialPhase3Tagger:
         cfg = self.config['名人']
         
         try:
-            social_data = self.data_adapter.get_address_social_activity(address)
+            social_data = ctx.social_activity
             
             if (social_data['twitter_followers'] >= cfg['min_followers'] and
                 social_data['is_verified']):
@@ -228,7 +239,7 @@ class SpecialPhase3Tagger:
         
         return None
     
-    def _tag_bot(self, address_id: int) -> Dict[str, Any]:
+    def _tag_bot(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         機器人/腳本標籤
         
@@ -240,7 +251,7 @@ class SpecialPhase3Tagger:
         cfg = self.config['機器人/腳本']
         
         try:
-            stats = self.data_adapter.get_trade_pattern_stats(address_id)
+            stats = ctx.trade_pattern_stats
             
             is_bot = (
                 stats['trade_time_variance'] < cfg['max_time_variance'] and
@@ -263,11 +274,11 @@ class SpecialPhase3Tagger:
                 }
         
         except (NotImplementedError, Exception):
-            return self._tag_bot_simplified(address_id)
+            return self._tag_bot_simplified(ctx)
         
         return None
     
-    def _tag_multi_account(self, address_id: int) -> Dict[str, Any]:
+    def _tag_multi_account(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         多帳號操作標籤
         
@@ -278,7 +289,7 @@ class SpecialPhase3Tagger:
         cfg = self.config['多帳號操作']
         
         try:
-            linked_addresses = self.data_adapter.get_linked_addresses(address_id)
+            linked_addresses = ctx.linked_addresses
             
             if len(linked_addresses) >= cfg['min_linked_accounts']:
                 confidence = min(1.0, len(linked_addresses) / 10)
@@ -294,7 +305,7 @@ class SpecialPhase3Tagger:
         
         return None
     
-    def _tag_manipulation(self, address_id: int) -> Dict[str, Any]:
+    def _tag_manipulation(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         市場操縱嫌疑標籤
         
@@ -306,8 +317,8 @@ class SpecialPhase3Tagger:
         cfg = self.config['市場操縱嫌疑']
         
         try:
-            trades = self.db.get_address_trades(address_id)
-            address_data = self.db.get_address(address_id)
+            trades = ctx.trades
+            address_data = ctx.address
             
             if len(trades) < cfg['min_trades']:
                 return None
@@ -317,7 +328,7 @@ class SpecialPhase3Tagger:
             large_ratio = large_trades / len(trades)
             
             # 檢查反向操作
-            position_changes = self.data_adapter.get_position_changes(address_id)
+            position_changes = ctx.position_changes
             reverse_ops = 0
             for i in range(len(position_changes) - 1):
                 if position_changes[i]['side'] != position_changes[i+1]['side']:
@@ -339,11 +350,11 @@ class SpecialPhase3Tagger:
                 }
         
         except (NotImplementedError, Exception):
-            return self._tag_manipulation_simplified(address_id)
+            return self._tag_manipulation_simplified(ctx)
         
         return None
     
-    def _tag_institution(self, address_id: int, address_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _tag_institution(self, ctx: AddressContext, address_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         專業機構標籤
         
@@ -369,7 +380,7 @@ class SpecialPhase3Tagger:
         
         return None
     
-    def _tag_newbie(self, address_id: int, address_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _tag_newbie(self, ctx: AddressContext, address_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         新手標籤
         
@@ -379,7 +390,7 @@ class SpecialPhase3Tagger:
         """
         cfg = self.config['新手']
         
-        trades = self.db.get_address_trades(address_id)
+        trades = ctx.trades
         if not trades:
             return None
         
@@ -399,7 +410,7 @@ class SpecialPhase3Tagger:
         
         return None
     
-    def _tag_dormant_awakened(self, address_id: int) -> Dict[str, Any]:
+    def _tag_dormant_awakened(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         休眠喚醒標籤
         
@@ -409,7 +420,7 @@ class SpecialPhase3Tagger:
         """
         cfg = self.config['休眠喚醒']
         
-        trades = self.db.get_address_trades(address_id)
+        trades = ctx.trades
         if len(trades) < 2:
             return None
         
@@ -423,7 +434,7 @@ class SpecialPhase3Tagger:
             max_gap_days = max(max_gap_days, gap)
         
         # 檢查最近活躍度
-        recent_trades = self.db.get_recent_trades_count(address_id, 30)
+        recent_trades = ctx.recent_trades_count(30)
         
         if (max_gap_days >= cfg['min_dormant_days'] and
             recent_trades >= cfg['min_recent_trades']):
@@ -438,7 +449,7 @@ class SpecialPhase3Tagger:
         
         return None
     
-    def _tag_single_market_focus(self, address_id: int) -> Dict[str, Any]:
+    def _tag_single_market_focus(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         單一市場專注標籤
         
@@ -447,7 +458,7 @@ class SpecialPhase3Tagger:
         """
         cfg = self.config['單一市場專注']
         
-        trades = self.db.get_address_trades(address_id)
+        trades = ctx.trades
         if len(trades) < cfg['min_trades']:
             return None
         
@@ -478,9 +489,9 @@ class SpecialPhase3Tagger:
     
     # ==================== 簡化版邏輯 ====================
     
-    def _tag_insider_simplified(self, address_id: int) -> Dict[str, Any]:
+    def _tag_insider_simplified(self, ctx: AddressContext) -> Dict[str, Any]:
         """疑似內線標籤（簡化版）- 僅基於勝率"""
-        address_data = self.db.get_address(address_id)
+        address_data = ctx.address
         
         if (address_data['win_rate'] >= 0.80 and
             address_data['total_trades'] >= 10):
@@ -493,9 +504,9 @@ class SpecialPhase3Tagger:
         
         return None
     
-    def _tag_bot_simplified(self, address_id: int) -> Dict[str, Any]:
+    def _tag_bot_simplified(self, ctx: AddressContext) -> Dict[str, Any]:
         """機器人/腳本標籤（簡化版）- 基於交易頻率和金額"""
-        trades = self.db.get_address_trades(address_id)
+        trades = ctx.trades
         if len(trades) < 20:
             return None
         
@@ -507,7 +518,7 @@ class SpecialPhase3Tagger:
         unique_amounts = len(set(round(a, 2) for a in amounts))
         
         # 檢查交易頻率
-        recent_trades = self.db.get_recent_trades_count(address_id, 7)
+        recent_trades = ctx.recent_trades_count(7)
         
         if unique_amounts <= 3 and recent_trades >= 20:
             return {
@@ -518,10 +529,10 @@ class SpecialPhase3Tagger:
         
         return None
     
-    def _tag_manipulation_simplified(self, address_id: int) -> Dict[str, Any]:
+    def _tag_manipulation_simplified(self, ctx: AddressContext) -> Dict[str, Any]:
         """市場操縱嫌疑標籤（簡化版）- 基於大額交易"""
-        trades = self.db.get_address_trades(address_id)
-        address_data = self.db.get_address(address_id)
+        trades = ctx.trades
+        address_data = ctx.address
         
         if len(trades) < 5:
             return None
@@ -6,7 +6,9 @@
 - 早期進場
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from utils.context import AddressContext
 
 
 class StrategyTagger:
@@ -25,18 +27,19 @@ class StrategyTagger:
         self.config = config['tags']['策略類型']
         self.confidence_calc = confidence_calc
     
-    def tag(self, address_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def tag(self, address_data: Dict[str, Any], context: Optional[AddressContext] = None) -> List[Dict[str, Any]]:
         """
         為地址打上策略類型標籤
         
         Args:
             address_data: 地址數據
+            context: 地址上下文（可選，未提供時自行建立）
             
         Returns:
             標籤列表
         """
         tags = []
-        address_id = address_data['id']
+        ctx = context or AddressContext(address_data['id'], self.db, address_data=address_data)
         total_trades = address_data.get('total_trades', 0)
         
         if total_trades == 0:
@@ -44,19 +47,19 @@ class StrategyTagger:
         
         # 掃尾盤
         if self.config['掃尾盤']['enabled']:
-            tag = self._tag_late_entry(address_id, total_trades)
+            tag = self._tag_late_entry(ctx, total_trades)
             if tag:
                 tags.append(tag)
         
         # 早期進場
         if self.config['早期進場']['enabled']:
-            tag = self._tag_early_entry(address_id, total_trades)
+            tag = self._tag_early_entry(ctx, total_trades)
             if tag:
                 tags.append(tag)
         
         return tags
     
-    def _tag_late_entry(self, address_id: int, total_trades: int) -> Dict[str, Any]:
+    def _tag_late_entry(self, ctx: AddressContext, total_trades: int) -> Dict[str, Any]:
         """
         掃尾盤標籤
         
@@ -65,10 +68,7 @@ class StrategyTagger:
         - 交易次數 >= 最小值
         """
         cfg = self.config['掃尾盤']
-        late_trades = self.db.get_late_entry_trades(
-            address_id,
-            cfg['days_before_close']
-        )
+        late_trades = ctx.late_entry_trades(cfg['days_before_close'])
         
         late_ratio = late_trades / total_trades if total_trades > 0 else 0
         
@@ -88,7 +88,7 @@ class StrategyTagger:
         
         return None
     
-    def _tag_early_entry(self, address_id: int, total_trades: int) -> Dict[str, Any]:
+    def _tag_early_entry(self, ctx: AddressContext, total_trades: int) -> Dict[str, Any]:
         """
         早期進場標籤
         
@@ -97,10 +97,7 @@ class StrategyTagger:
         - 交易次數 >= 最小值
         """
         cfg = self.config['早期進場']
-        early_trades = self.db.get_early_entry_trades(
-            address_id,
-            cfg['hours_after_creation']
-        )
+        early_trades = ctx.early_entry_trades(cfg['hours_after_creation'])
         
         early_ratio = early_trades / total_trades if total_trades > 0 else 0
         
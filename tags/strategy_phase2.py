@@ -17,87 +17,96 @@
 - 價格歷史、持倉變化（通過 DataAdapter 獲取）
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import statistics
 
+from utils.context import AddressContext
+
 
 class StrategyPhase2Tagger:
     """策略類型標籤器（第二階段）"""
     
+    # 讀取的適配器數據源 -> 使用它的標籤（新聞按查詢天數區分）
+    ADAPTER_SOURCES = {
+        'price_history': ['逆勢操作', '順勢操作'],
+        'position_changes': ['套利者', '對沖交易者'],
+        ('market_news', 1): ['事件驅動']
+    }
+    
     def __init__(self, db, data_adapter, config: Dict[str, Any], confidence_calc):
         self.db = db
         self.data_adapter = data_adapter
         self.config = config['tags']['策略類型']
         self.confidence_calc = confidence_calc
     
-    def tag(self, address_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def tag(self, address_data: Dict[str, Any], context: Optional[AddressContext] = None) -> List[Dict[str, Any]]:
         """為地址打上策略類型標籤（第二階段）"""
         tags = []
-        address_id = address_data['id']
+        ctx = context or AddressContext(address_data['id'], self.db, self.data_adapter, address_data)
         
         # 逆勢操作
         if self.config['逆勢操作']['enabled']:
-            tag = self._tag_contrarian(address_id)
+            tag = self._tag_contrarian(ctx)
             if tag:
                 tags.append(tag)
         
         # 順勢操作
         if self.config['順勢操作']['enabled']:
-            tag = self._tag_momentum(address_id)
+            tag = self._tag_momentum(ctx)
             if tag:
                 tags.append(tag)
         
         # 價值捕手
         if self.config['價值捕手']['enabled']:
-            tag = self._tag_value_hunter(address_id)
+            tag = self._tag_value_hunter(ctx)
             if tag:
                 tags.append(tag)
         
         # 套利者
         if self.config['套利者']['enabled']:
-            tag = self._tag_arbitrageur(address_id)
+            tag = self._tag_arbitrageur(ctx)
             if tag:
                 tags.append(tag)
         
         # 事件驅動
         if self.config['事件驅動']['enabled']:
-            tag = self._tag_event_driven(address_id)
+            tag = self._tag_event_driven(ctx)
             if tag:
                 tags.append(tag)
         
         # 對沖交易者
         if self.config['對沖交易者']['enabled']:
-            tag = self._tag_hedger(address_id)
+            tag = self._tag_hedger(ctx)
             if tag:
                 tags.append(tag)
         
         # 做市商
         if self.config['做市商']['enabled']:
-            tag = self._tag_market_maker(address_id)
+            tag = self._tag_market_maker(ctx)
             if tag:
                 tags.append(tag)
         
         # 趨勢追蹤者
         if self.config['趨勢追蹤者']['enabled']:
-            tag = self._tag_trend_follower(address_id)
+            tag = self._tag_trend_follower(ctx)
             if tag:
                 tags.append(tag)
         
         # 均值回歸者
         if self.config['均值回歸者']['enabled']:
-            tag = self._tag_mean_reversion(address_id)
+            tag = self._tag_mean_reversion(ctx)
             if tag:
                 tags.append(tag)
         
         # 狙擊手
         if self.config['狙擊手']['enabled']:
-            tag = self._tag_sniper(address_id)
+            tag = self._tag_sniper(ctx)
             if tag:
                 tags.append(tag)
         
         return tags
     
-    def _tag_contrarian(self, address_id: int) -> Dict[str, Any]:
+    def _tag_contrarian(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         逆勢操作標籤
         
@@ -108,14 +117,14 @@ class StrategyPhase2Tagger:
         cfg = self.config['逆勢操作']
         
         try:
-            trades = self.db.get_address_trades(address_id)
+            trades = ctx.trades
             if len(trades) < cfg['min_trades']:
                 return None
             
             contrarian_count = 0
             for trade in trades:
                 # 獲取該市場的價格歷史
-                price_history = self.data_adapter.get_price_history(trade['market_id'])
+                price_history = ctx.price_history(trade['market_id'])
                 if not price_history:
                     continue
                 
@@ -147,11 +156,11 @@ class StrategyPhase2Tagger:
                 }
         
         except (NotImplementedError, Exception):
-            return self._tag_contrarian_simplified(address_id)
+            return self._tag_contrarian_simplified(ctx)
         
         return None
     
-    def _tag_momentum(self, address_id: int) -> Dict[str, Any]:
+    def _tag_momentum(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         順勢操作標籤
         
@@ -162,13 +171,13 @@ class StrategyPhase2Tagger:
         cfg = self.config['順勢操作']
         
         try:
-            trades = self.db.get_address_trades(address_id)
+            trades = ctx.trades
             if len(trades) < cfg['min_trades']:
                 return None
             
             momentum_count = 0
             for trade in trades:
-                price_history = self.data_adapter.get_price_history(trade['market_id'])
+                price_history = ctx.price_history(trade['market_id'])
                 if not price_history:
                     continue
                 
@@ -199,11 +208,11 @@ class StrategyPhase2Tagger:
                 }
         
         except (NotImplementedError, Exception):
-            return self._tag_momentum_simplified(address_id)
+            return self._tag_momentum_simplified(ctx)
         
         return None
     
-    def _tag_value_hunter(self, address_id: int) -> Dict[str, Any]:
+    def _tag_value_hunter(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         價值捕手標籤
         
@@ -213,7 +222,7 @@ class StrategyPhase2Tagger:
         """
         cfg = self.config['價值捕手']
         
-        trades = self.db.get_address_trades(address_id)
+        trades = ctx.trades
         if len(trades) < cfg['min_trades']:
             return None
         
@@ -239,7 +248,7 @@ class StrategyPhase2Tagger:
         
         return None
     
-    def _tag_arbitrageur(self, address_id: int) -> Dict[str, Any]:
+    def _tag_arbitrageur(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         套利者標籤
         
@@ -251,7 +260,7 @@ class StrategyPhase2Tagger:
         cfg = self.config['套利者']
         
         try:
-            position_changes = self.data_adapter.get_position_changes(address_id)
+            position_changes = ctx.position_changes
             if len(position_changes) < cfg['min_trades']:
                 return None
             
@@ -290,7 +299,7 @@ class StrategyPhase2Tagger:
         
         return None
     
-    def _tag_event_driven(self, address_id: int) -> Dict[str, Any]:
+    def _tag_event_driven(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         事件驅動標籤
         
@@ -301,14 +310,14 @@ class StrategyPhase2Tagger:
         cfg = self.config['事件驅動']
         
         try:
-            trades = self.db.get_address_trades(address_id)
+            trades = ctx.trades
             if len(trades) < cfg['min_trades']:
                 return None
             
             event_driven_count = 0
             for trade in trades:
                 # 獲取該市場的新聞
-                news = self.data_adapter.get_market_news(trade['market_id'], days=1)
+                news = ctx.market_news(trade['market_id'], days=1)
                 if not news:
                     continue
                 
@@ -335,11 +344,11 @@ class StrategyPhase2Tagger:
                 }
         
         except (NotImplementedError, Exception):
-            return self._tag_event_driven_simplified(address_id)
+            return self._tag_event_driven_simplified(ctx)
         
         return None
     
-    def _tag_hedger(self, address_id: int) -> Dict[str, Any]:
+    def _tag_hedger(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         對沖交易者標籤
         
@@ -350,7 +359,7 @@ class StrategyPhase2Tagger:
         cfg = self.config['對沖交易者']
         
         try:
-            position_changes = self.data_adapter.get_position_changes(address_id)
+            position_changes = ctx.position_changes
             if len(position_changes) < cfg['min_trades']:
                 return None
             
@@ -390,7 +399,7 @@ class StrategyPhase2Tagger:
         
         return None
     
-    def _tag_market_maker(self, address_id: int) -> Dict[str, Any]:
+    def _tag_market_maker(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         做市商標籤
         
@@ -401,7 +410,7 @@ class StrategyPhase2Tagger:
         """
         cfg = self.config['做市商']
         
-        trades = self.db.get_address_trades(address_id)
+        trades = ctx.trades
         if len(trades) < cfg['min_trades']:
             return None
         
@@ -427,7 +436,7 @@ class StrategyPhase2Tagger:
         
         return None
     
-    def _tag_trend_follower(self, address_id: int) -> Dict[str, Any]:
+    def _tag_trend_follower(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         趨勢追蹤者標籤
         
@@ -437,9 +446,9 @@ class StrategyPhase2Tagger:
         - 順勢操作佔比高
         """
         # 類似順勢操作，但更強調長期趨勢
-        return self._tag_momentum(address_id)
+        return self._tag_momentum(ctx)
     
-    def _tag_mean_reversion(self, address_id: int) -> Dict[str, Any]:
+    def _tag_mean_reversion(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         均值回歸者標籤
         
@@ -448,9 +457,9 @@ class StrategyPhase2Tagger:
         - 等待價格回歸
         """
         # 類似價值捕手
-        return self._tag_value_hunter(address_id)
+        return self._tag_value_hunter(ctx)
     
-    def _tag_sniper(self, address_id: int) -> Dict[str, Any]:
+    def _tag_sniper(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         狙擊手標籤
         
@@ -461,8 +470,8 @@ class StrategyPhase2Tagger:
         """
         cfg = self.config['狙擊手']
         
-        trades = self.db.get_address_trades(address_id)
-        address_data = self.db.get_address(address_id)
+        trades = ctx.trades
+        address_data = ctx.address
         
         if (len(trades) <= cfg['max_trades'] and
             address_data['avg_trade_size'] >= cfg['min_avg_trade_size'] and
@@ -480,9 +489,9 @@ class StrategyPhase2Tagger:
     
     # ==================== 簡化版邏輯 ====================
     
-    def _tag_contrarian_simplified(self, address_id: int) -> Dict[str, Any]:
+    def _tag_contrarian_simplified(self, ctx: AddressContext) -> Dict[str, Any]:
         """逆勢操作標籤（簡化版）- 基於價格分布"""
-        trades = self.db.get_address_trades(address_id)
+        trades = ctx.trades
         if len(trades) < 5:
             return None
         
@@ -499,14 +508,14 @@ class StrategyPhase2Tagger:
         
         return None
     
-    def _tag_momentum_simplified(self, address_id: int) -> Dict[str, Any]:
+    def _tag_momentum_simplified(self, ctx: AddressContext) -> Dict[str, Any]:
         """順勢操作標籤（簡化版）- 基於交易頻率"""
-        trades = self.db.get_address_trades(address_id)
+        trades = ctx.trades
         if len(trades) < 10:
             return None
         
         # 簡化邏輯：高頻交易者可能是順勢操作
-        recent_trades = self.db.get_recent_trades_count(address_id, 7)
+        recent_trades = ctx.recent_trades_count(7)
         if recent_trades >= 10:
             return {
                 'category': '策略類型',
@@ -516,9 +525,9 @@ class StrategyPhase2Tagger:
         
         return None
     
-    def _tag_event_driven_simplified(self, address_id: int) -> Dict[str, Any]:
+    def _tag_event_driven_simplified(self, ctx: AddressContext) -> Dict[str, Any]:
         """事件驅動標籤（簡化版）- 基於交易時間集中度"""
-        trades = self.db.get_address_trades(address_id)
+        trades = ctx.trades
         if len(trades) < 5:
             return None
         
@@ -9,7 +9,9 @@
 - 小額多單
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from utils.context import AddressContext
 
 
 class TradingStyleTagger:
@@ -28,18 +30,19 @@ class TradingStyleTagger:
         self.config = config['tags']['交易風格']
         self.confidence_calc = confidence_calc
     
-    def tag(self, address_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def tag(self, address_data: Dict[str, Any], context: Optional[AddressContext] = None) -> List[Dict[str, Any]]:
         """
         為地址打上交易風格標籤
         
         Args:
             address_data: 地址數據
+            context: 地址上下文（可選，未提供時自行建立）
             
         Returns:
             標籤列表
         """
         tags = []
-        address_id = address_data['id']
+        ctx = context or AddressContext(address_data['id'], self.db, address_data=address_data)
         
         # 高勝率
         if self.config['高勝率']['enabled']:
@@ -55,13 +58,13 @@ class TradingStyleTagger:
         
         # 高頻交易
         if self.config['高頻交易']['enabled']:
-            tag = self._tag_high_frequency(address_id)
+            tag = self._tag_high_frequency(ctx)
             if tag:
                 tags.append(tag)
         
         # 穩定盈利
         if self.config['穩定盈利']['enabled']:
-            tag = self._tag_stable_profit(address_id)
+            tag = self._tag_stable_profit(ctx)
             if tag:
                 tags.append(tag)
         
@@ -127,7 +130,7 @@ class TradingStyleTagger:
         
         return None
     
-    def _tag_high_frequency(self, address_id: int) -> Dict[str, Any]:
+    def _tag_high_frequency(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         高頻交易標籤
         
@@ -135,10 +138,7 @@ class TradingStyleTagger:
         - 最近 N 天的日均交易次數 >= 閾值
         """
         cfg = self.config['高頻交易']
-        recent_trades = self.db.get_recent_trades_count(
-            address_id,
-            cfg['lookback_days']
-        )
+        recent_trades = ctx.recent_trades_count(cfg['lookback_days'])
         
         trades_per_day = recent_trades / cfg['lookback_days']
         
@@ -158,7 +158,7 @@ class TradingStyleTagger:
         
         return None
     
-    def _tag_stable_profit(self, address_id: int) -> Dict[str, Any]:
+    def _tag_stable_profit(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         穩定盈利標籤
         
@@ -167,7 +167,7 @@ class TradingStyleTagger:
         - 總共至少 M 個月有交易
         """
         cfg = self.config['穩定盈利']
-        monthly_pnl = self.db.get_monthly_pnl(address_id)
+        monthly_pnl = ctx.monthly_pnl
         
         if not monthly_pnl:
             return None
@@ -10,12 +10,19 @@
 - 持倉時長（通過 DataAdapter.get_holding_period 獲取）
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from utils.context import AddressContext
 
 
 class TradingStylePhase2Tagger:
     """交易風格標籤器（第二階段）"""
     
+    # 讀取的適配器數據源 -> 使用它的標籤（服務按啟用的標籤決定每批預取哪些數據源）
+    ADAPTER_SOURCES = {
+        'trade_timestamps': ['波段交易者', '長期持有者', '閃電交易者']
+    }
+    
     def __init__(self, db, data_adapter, config: Dict[str, Any], confidence_calc):
         """
         初始化標籤器
@@ -31,40 +38,41 @@ class TradingStylePhase2Tagger:
         self.config = config['tags']['交易風格']
         self.confidence_calc = confidence_calc
     
-    def tag(self, address_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def tag(self, address_data: Dict[str, Any], context: Optional[AddressContext] = None) -> List[Dict[str, Any]]:
         """
         為地址打上交易風格標籤（第二階段）
         
         Args:
             address_data: 地址數據
+            context: 地址上下文（可選，未提供時自行建立）
             
         Returns:
             標籤列表
         """
         tags = []
-        address_id = address_data['id']
+        ctx = context or AddressContext(address_data['id'], self.db, self.data_adapter, address_data)
         
         # 波段交易者
         if self.config['波段交易者']['enabled']:
-            tag = self._tag_swing_trader(address_id)
+            tag = self._tag_swing_trader(ctx)
             if tag:
                 tags.append(tag)
         
         # 長期持有者
         if self.config['長期持有者']['enabled']:
-            tag = self._tag_long_term_holder(address_id)
+            tag = self._tag_long_term_holder(ctx)
             if tag:
                 tags.append(tag)
         
         # 閃電交易者
         if self.config['閃電交易者']['enabled']:
-            tag = self._tag_flash_trader(address_id)
+            tag = self._tag_flash_trader(ctx)
             if tag:
                 tags.append(tag)
         
         return tags
     
-    def _tag_swing_trader(self, address_id: int) -> Dict[str, Any]:
+    def _tag_swing_trader(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         波段交易者標籤
         
@@ -76,7 +84,7 @@ class TradingStylePhase2Tagger:
         
         try:
             # 獲取所有交易的持倉時長
-            trades = self.data_adapter.get_trade_timestamps(address_id)
+            trades = ctx.trade_timestamps
             if len(trades) < cfg['min_trades']:
                 return None
             
@@ -113,11 +121,11 @@ class TradingStylePhase2Tagger:
         
         except NotImplementedError:
             # 如果主管未實作 data_adapter，使用簡化邏輯
-            return self._tag_swing_trader_simplified(address_id)
+            return self._tag_swing_trader_simplified(ctx)
         
         return None
     
-    def _tag_long_term_holder(self, address_id: int) -> Dict[str, Any]:
+    def _tag_long_term_holder(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         長期持有者標籤
         
@@ -128,7 +136,7 @@ class TradingStylePhase2Tagger:
         cfg = self.config['長期持有者']
         
         try:
-            trades = self.data_adapter.get_trade_timestamps(address_id)
+            trades = ctx.trade_timestamps
             if len(trades) < cfg['min_trades']:
                 return None
             
@@ -162,11 +170,11 @@ class TradingStylePhase2Tagger:
                 }
         
         except NotImplementedError:
-            return self._tag_long_term_holder_simplified(address_id)
+            return self._tag_long_term_holder_simplified(ctx)
         
         return None
     
-    def _tag_flash_trader(self, address_id: int) -> Dict[str, Any]:
+    def _tag_flash_trader(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         閃電交易者標籤
         
@@ -177,7 +185,7 @@ class TradingStylePhase2Tagger:
         cfg = self.config['閃電交易者']
         
         try:
-            trades = self.data_adapter.get_trade_timestamps(address_id)
+            trades = ctx.trade_timestamps
             if len(trades) < cfg['min_trades']:
                 return None
             
@@ -204,13 +212,13 @@ class TradingStylePhase2Tagger:
                 }
         
         except NotImplementedError:
-            return self._tag_flash_trader_simplified(address_id)
+            return self._tag_flash_trader_simplified(ctx)
         
         return None
     
     # ==================== 簡化版邏輯（不依賴外部數據）====================
     
-    def _tag_swing_trader_simplified(self, address_id: int) -> Dict[str, Any]:
+    def _tag_swing_trader_simplified(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         波段交易者標籤（簡化版）
         
@@ -218,7 +226,7 @@ class TradingStylePhase2Tagger:
         - 每週 1-3 筆交易 → 可能是波段交易者
         """
         cfg = self.config['波段交易者']
-        recent_trades = self.db.get_recent_trades_count(address_id, 30)
+        recent_trades = ctx.recent_trades_count(30)
         
         trades_per_week = recent_trades / 4.3  # 30 天 ≈ 4.3 週
         
@@ -232,7 +240,7 @@ class TradingStylePhase2Tagger:
         
         return None
     
-    def _tag_long_term_holder_simplified(self, address_id: int) -> Dict[str, Any]:
+    def _tag_long_term_holder_simplified(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         長期持有者標籤（簡化版）
         
@@ -240,7 +248,7 @@ class TradingStylePhase2Tagger:
         - 每月 < 2 筆交易 → 可能是長期持有者
         """
         cfg = self.config['長期持有者']
-        recent_trades = self.db.get_recent_trades_count(address_id, 90)
+        recent_trades = ctx.recent_trades_count(90)
         
         trades_per_month = recent_trades / 3
         
@@ -254,7 +262,7 @@ class TradingStylePhase2Tagger:
         
         return None
     
-    def _tag_flash_trader_simplified(self, address_id: int) -> Dict[str, Any]:
+    def _tag_flash_trader_simplified(self, ctx: AddressContext) -> Dict[str, Any]:
         """
         閃電交易者標籤（簡化版）
         
@@ -262,7 +270,7 @@ class TradingStylePhase2Tagger:
         - 每天 > 3 筆交易 → 可能是閃電交易者
         """
         cfg = self.config['閃電交易者']
-        recent_trades = self.db.get_recent_trades_count(address_id, 7)
+        recent_trades = ctx.recent_trades_count(7)
         
         trades_per_day = recent_trades / 7
         
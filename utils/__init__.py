@@ -1,7 +1,8 @@
 """工具模組"""
 
-from .database import DatabaseAdapter
+from .database import DatabaseAdapter, create_database_adapter
 from .confidence import ConfidenceCalculator
 from .logger import setup_logger
+from .context import AddressContext
 
-__all__ = ['DatabaseAdapter', 'ConfidenceCalculator', 'setup_logger']
+__all__ = ['DatabaseAdapter', 'create_database_adapter', 'ConfidenceCalculator', 'setup_logger', 'AddressContext']
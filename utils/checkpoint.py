@@ -0,0 +1,87 @@
+"""
+檢查點模組
+
+記錄批量打標籤的進度，讓中斷的 --init 可以從上次提交的位置繼續
+"""
+
+import os
+import json
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime
+
+
+class Checkpoint:
+    """批量打標籤檢查點"""
+    
+    # 需要在 JSON 中以 ISO 格式保存的時間欄位
+    DATETIME_FIELDS = ('start_time', 'end_time')
+    
+    def __init__(self, path: str, shard: Optional[Tuple[int, int]] = None):
+        """
+        初始化檢查點
+        
+        Args:
+            path: 檢查點文件路徑
+            shard: (分片序號, 分片總數)，多進程模式下每個分片使用獨立的檢查點文件
+        """
+        if shard and shard[1] > 1:
+            root, ext = os.path.splitext(path)
+            path = f"{root}.shard{shard[0]}of{shard[1]}{ext or '.json'}"
+        
+        self.path = path
+        self.shard = list(shard) if shard else None
+    
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        載入檢查點
+        
+        Returns:
+            {'last_address_id': int, 'stats': dict}，沒有檢查點時返回 None
+        """
+        if not os.path.exists(self.path):
+            return None
+        
+        with open(self.path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        
+        if state.get('shard') != self.shard:
+            raise ValueError(f"檢查點 {self.path} 屬於分片 {state.get('shard')}，與當前分片 {self.shard} 不符")
+        
+        stats = state['stats']
+        for field in self.DATETIME_FIELDS:
+            if stats.get(field):
+                stats[field] = datetime.fromisoformat(stats[field])
+        
+        return state
+    
+    def save(self, last_address_id: int, stats: Dict[str, Any]):
+        """
+        保存檢查點（先寫臨時文件再替換，避免中斷時留下損壞的檢查點）
+        
+        Args:
+            last_address_id: 最後一個已提交的地址 ID
+            stats: 累計統計信息
+        """
+        serializable = dict(stats)
+        for field in self.DATETIME_FIELDS:
+            if isinstance(serializable.get(field), datetime):
+                serializable[field] = serializable[field].isoformat()
+        
+        state = {
+            'last_address_id': last_address_id,
+            'shard': self.shard,
+            'updated_at': datetime.now().isoformat(),
+            'stats': serializable
+        }
+        
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+    
+    def clear(self):
+        """刪除檢查點（運行完成後調用）"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,268 @@
+"""
+地址上下文模組
+
+為單個地址提供延遲載入、快取的數據存取，讓所有標籤器共享同一份數據
+"""
+
+import threading
+from typing import List, Dict, Any, Optional, Callable
+
+_MISSING = object()
+
+
+class AddressContext:
+    """
+    地址上下文
+    
+    每個地址在一次標記流程中只建立一個上下文，並傳遞給所有標籤器。
+    各數據源在第一次存取時才查詢，之後直接返回快取結果；
+    查詢拋出的異常同樣會被快取，確保每個數據源每次運行最多查詢一次。
+    
+    標籤器並行執行時可以共享同一個上下文：同一數據源的並發請求只會查詢一次，
+    不同數據源可以同時載入。
+    """
+    
+    def __init__(self, address_id: int, db, data_adapter=None,
+                 address_data: Optional[Dict[str, Any]] = None,
+                 features: Optional[Dict[str, Any]] = None,
+                 preloaded: Optional[Dict[Any, Any]] = None):
+        """
+        初始化地址上下文
+        
+        Args:
+            address_id: 地址 ID
+            db: 數據庫適配器
+            data_adapter: 數據適配器（可選，第一階段標籤器不需要）
+            address_data: 已載入的地址數據（可選，避免重複查詢）
+            features: 批量預計算的特徵（可選，見 DatabaseAdapter.extract_features）
+            preloaded: 批量預取的數據（可選），鍵與快取鍵相同，如 'trades'、('price_history', market_id)
+        """
+        self.address_id = address_id
+        self.db = db
+        self.data_adapter = data_adapter
+        self.features = features or {}
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        
+        if address_data is not None:
+            self._cache['address'] = (address_data, None)
+        for key, value in (preloaded or {}).items():
+            self._cache[key] = (value, None)
+    
+    def _load(self, key: Any, loader: Callable[[], Any]) -> Any:
+        """
+        載入並快取數據
+        
+        Args:
+            key: 快取鍵
+            loader: 載入函數
+            
+        Returns:
+            載入結果（如果載入時出錯，重新拋出同一個異常）
+        """
+        if key not in self._cache:
+            with self._lock:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+            with key_lock:
+                if key not in self._cache:
+                    try:
+                        self._cache[key] = (loader(), None)
+                    except Exception as e:
+                        self._cache[key] = (None, e)
+        
+        value, error = self._cache[key]
+        if error is not None:
+            raise error
+        return value
+    
+    def _feature(self, name: str, key: Any = _MISSING, default: Any = _MISSING) -> Any:
+        """
+        讀取預計算特徵
+        
+        Args:
+            name: 特徵名稱
+            key: 特徵內的鍵（可選）
+            default: 特徵存在但缺少該鍵時的默認值（可選）
+            
+        Returns:
+            特徵值，如果沒有預計算則返回 _MISSING
+        """
+        value = self.features.get(name, _MISSING)
+        if value is _MISSING or key is _MISSING:
+            return value
+        return value.get(key, default)
+    
+    def _load_feature(self, cache_key: Any, name: str, key: Any, loader: Callable[[], Any],
+                      default: Any = _MISSING) -> Any:
+        """優先讀取預計算特徵，沒有時回退到逐地址查詢"""
+        value = self._feature(name, key, default)
+        if value is not _MISSING:
+            return value
+        return self._load(cache_key, loader)
+    
+    # ==================== 數據庫數據 ====================
+    
+    @property
+    def address(self) -> Optional[Dict[str, Any]]:
+        """地址數據"""
+        return self._load('address', lambda: self.db.get_address(self.address_id))
+    
+    @property
+    def trades(self) -> List[Dict[str, Any]]:
+        """地址的所有交易記錄"""
+        return self._load('trades', lambda: self.db.get_address_trades(self.address_id))
+    
+    @property
+    def price_distribution(self) -> List[Dict[str, Any]]:
+        """地址的價格分布"""
+        return self._load_feature(
+            'price_distribution', 'price_distribution', _MISSING,
+            lambda: self.db.get_price_distribution(self.address_id)
+        )
+    
+    @property
+    def monthly_pnl(self) -> List[Dict[str, Any]]:
+        """地址的月度盈虧"""
+        return self._load_feature(
+            'monthly_pnl', 'monthly_pnl', _MISSING,
+            lambda: self.db.get_monthly_pnl(self.address_id)
+        )
+    
+    def recent_trades_count(self, days: int) -> int:
+        """
+        地址最近 N 天的交易次數
+        
+        Args:
+            days: 天數
+            
+        Returns:
+            交易次數
+        """
+        return self._load_feature(
+            ('recent_trades_count', days), 'recent_trades_count', days,
+            lambda: self.db.get_recent_trades_count(self.address_id, days)
+        )
+    
+    @property
+    def category_histogram(self) -> Dict[str, int]:
+        """地址在各類別的交易次數（沒有交易的類別不出現）"""
+        return self._load_feature(
+            'category_histogram', 'category_trades', _MISSING,
+            lambda: self.db.get_category_histogram([self.address_id]).get(self.address_id, {})
+        )
+    
+    def category_trades(self, category: str) -> int:
+        """
+        地址在指定類別的交易次數
+        
+        Args:
+            category: 市場類別
+            
+        Returns:
+            交易次數
+        """
+        # 類別直方圖包含所有有交易的類別，缺少即為 0
+        return self.category_histogram.get(category, 0)
+    
+    def keyword_trades(self, group: str, keywords: List[str], parent_category: Optional[str] = None) -> int:
+        """
+        地址在包含關鍵詞的市場的交易次數
+        
+        Args:
+            group: 關鍵詞組名稱（通常是標籤名稱）
+            keywords: 關鍵詞列表
+            parent_category: 父類別（可選）
+            
+        Returns:
+            交易次數
+        """
+        return self._load_feature(
+            ('keyword_trades', group), 'keyword_trades', group,
+            lambda: self.db.get_keyword_trades(self.address_id, keywords, parent_category)
+        )
+    
+    def late_entry_trades(self, days_before_close: int) -> int:
+        """
+        地址在市場結算前 N 天內的交易次數
+        
+        Args:
+            days_before_close: 結算前天數
+            
+        Returns:
+            交易次數
+        """
+        return self._load_feature(
+            ('late_entry_trades', days_before_close), 'late_entry_trades', days_before_close,
+            lambda: self.db.get_late_entry_trades(self.address_id, days_before_close)
+        )
+    
+    def early_entry_trades(self, hours_after_creation: int) -> int:
+        """
+        地址在市場創建後 N 小時內的交易次數
+        
+        Args:
+            hours_after_creation: 創建後小時數
+            
+        Returns:
+            交易次數
+        """
+        return self._load_feature(
+            ('early_entry_trades', hours_after_creation), 'early_entry_trades', hours_after_creation,
+            lambda: self.db.get_early_entry_trades(self.address_id, hours_after_creation)
+        )
+    
+    # ==================== 適配器數據 ====================
+    
+    @property
+    def trade_timestamps(self) -> List[Dict[str, Any]]:
+        """地址的所有交易時間戳"""
+        return self._load('trade_timestamps', lambda: self.data_adapter.get_trade_timestamps(self.address_id))
+    
+    @property
+    def position_changes(self) -> List[Dict[str, Any]]:
+        """地址的持倉變化記錄"""
+        return self._load('position_changes', lambda: self.data_adapter.get_position_changes(self.address_id))
+    
+    @property
+    def social_activity(self) -> Dict[str, Any]:
+        """地址的社交媒體活動"""
+        return self._load(
+            'social_activity',
+            lambda: self.data_adapter.get_address_social_activity((self.address or {}).get('address', ''))
+        )
+    
+    def price_history(self, market_id: int) -> List[Dict[str, Any]]:
+        """
+        市場的價格歷史
+        
+        Args:
+            market_id: 市場 ID
+            
+        Returns:
+            價格歷史列表
+        """
+        return self._load(('price_history', market_id), lambda: self.data_adapter.get_price_history(market_id))
+    
+    def market_news(self, market_id: int, days: int = 7) -> List[Dict[str, Any]]:
+        """
+        市場相關新聞
+        
+        Args:
+            market_id: 市場 ID
+            days: 查詢最近幾天的新聞
+            
+        Returns:
+            新聞列表
+        """
+        return self._load(('market_news', market_id, days), lambda: self.data_adapter.get_market_news(market_id, days))
+    
+    @property
+    def trade_pattern_stats(self) -> Dict[str, Any]:
+        """地址的交易模式統計"""
+        return self._load('trade_pattern_stats', lambda: self.data_adapter.get_trade_pattern_stats(self.address_id))
+    
+    @property
+    def linked_addresses(self) -> List[int]:
+        """與地址關聯的其他地址"""
+        return self._load('linked_addresses', lambda: self.data_adapter.get_linked_addresses(self.address_id))
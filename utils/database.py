@@ -4,13 +4,161 @@
 提供數據庫連接和查詢功能，支持不同的表名和欄位名配置
 """
 
+import time
+import weakref
+import threading
 import mysql.connector
-from typing import List, Dict, Any, Optional
+import mysql.connector.pooling
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 from urllib.parse import urlparse
 
+from .query_cache import QueryCache
+from .query_stats import QueryStats, normalize_sql
+
+
+class DatabaseEndpoint:
+    """
+    數據庫端點（主庫或只讀副本）
+    
+    管理一個 URL 的連接：pool_size > 1 時使用連接池，否則使用單一連接。
+    連接在第一次使用時建立，連接失效後可以丟棄並重新建立。
+    """
+    
+    def __init__(self, name: str, url: str, pool_size: int = 1,
+                 pool_name: str = 'address_tagging', connect: bool = True):
+        """
+        初始化端點
+        
+        Args:
+            name: 端點名稱（如 'primary'、'replica1'）
+            url: 數據庫 URL
+            pool_size: 連接數
+            pool_name: 連接池名稱
+            connect: 是否立即建立連接
+        """
+        self.name = name
+        self.url = url
+        self.pool_size = max(1, pool_size)
+        self.pool_name = pool_name
+        self.pool = None
+        self.connection = None
+        self._connect_lock = threading.Lock()
+        
+        # 連接池耗盡時 get_connection 會直接報錯，用信號量讓線程排隊等待；
+        # 單一連接模式下用鎖保證語句不會交錯
+        if self.pool_size > 1:
+            self.available = threading.BoundedSemaphore(self.pool_size)
+        else:
+            self.available = threading.Lock()
+        
+        # 健康狀態（只讀副本使用）
+        self.healthy = True
+        self.checked_at = None
+        self.lag_seconds = None
+        self.reads = 0
+        self.failures = 0
+        
+        if connect:
+            self._ensure_connected()
+    
+    def _connection_args(self) -> Dict[str, Any]:
+        """解析數據庫 URL，生成連接參數"""
+        parsed = urlparse(self.url)
+        
+        return {
+            'host': parsed.hostname,
+            'port': parsed.port or 3306,
+            'user': parsed.username,
+            'password': parsed.password,
+            'database': parsed.path.lstrip('/'),
+            'autocommit': True
+        }
+    
+    def _ensure_connected(self):
+        """建立連接或連接池（已建立時不做任何事）"""
+        with self._connect_lock:
+            if self.pool_size > 1 and self.pool is None:
+                # 歸還連接時不重置會話，保留 autocommit 設置，避免每次借出都多一次往返
+                self.pool = mysql.connector.pooling.MySQLConnectionPool(
+                    pool_name=self.pool_name,
+                    pool_size=self.pool_size,
+                    pool_reset_session=False,
+                    **self._connection_args()
+                )
+            elif self.pool_size == 1 and self.connection is None:
+                self.connection = mysql.connector.connect(**self._connection_args())
+    
+    def get_connection(self):
+        """取得一個連接（調用方需先獲取 available）"""
+        self._ensure_connected()
+        return self.pool.get_connection() if self.pool else self.connection
+    
+    def release_connection(self, connection):
+        """歸還連接"""
+        if self.pool:
+            # 池化連接的 close() 是歸還到池中
+            connection.close()
+    
+    def reset(self):
+        """丟棄失效的單一連接，下次使用時重新連接"""
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+    
+    def close(self):
+        """關閉連接（連接池模式下關閉池中所有空閒連接）"""
+        if self.pool:
+            self.pool._remove_connections()
+        if self.connection:
+            self.connection.close()
+
 
 class DatabaseAdapter:
-    """數據庫適配器"""
+    """
+    數據庫適配器
+    
+    database.pool_size > 1 時使用連接池，每次執行時為當前線程借出一個連接；
+    否則使用單一連接，並以鎖保證多線程下語句不會交錯。
+    兩種模式下都可以在多個線程之間共享同一個適配器。
+    
+    配置 database.replica_urls 時，事務外的 SELECT 按輪詢分配到健康的只讀副本，
+    寫入、事務和必須讀取最新值的查詢發到主庫。
+    """
+    
+    # 每個查詢模板讀取的表（寫入這些表時使快取失效）
+    TEMPLATE_TABLES = {
+        'address': ('addresses',),
+        'address_trades': ('address_trades',),
+        'max_trade_id': ('address_trades',),
+        'category_trades': ('address_trades', 'markets'),
+        'category_histogram': ('address_trades', 'markets'),
+        'recent_trades_count': ('address_trades', 'address_daily_stats'),
+        'monthly_pnl': ('address_trades', 'address_daily_stats'),
+        'price_distribution': ('address_trades',),
+        'late_entry_trades': ('address_trades', 'markets'),
+        'early_entry_trades': ('address_trades', 'markets'),
+        'state': ('tagging_state',)
+    }
+    
+    # 必須讀取最新值的模板默認不快取（增量更新水位、運行狀態）
+    DEFAULT_TEMPLATE_TTLS = {
+        'max_trade_id': 0,
+        'state': 0
+    }
+    
+    # 必須在主庫讀取的模板（運行狀態在本次運行中由主庫寫入）
+    PRIMARY_TEMPLATES = {'state'}
+    
+    # 查看執行計劃的語句前綴
+    EXPLAIN_PREFIX = 'EXPLAIN'
+    
+    # 只讀數據源（如交易快照）不能建立服務表，跳過市場關鍵詞索引等需要寫入的步驟
+    READ_ONLY = False
     
     def __init__(self, config: Dict[str, Any]):
         """
@@ -24,372 +172,2238 @@ class DatabaseAdapter:
         self.tables = self.db_config['tables']
         self.columns = self.db_config['columns']
         
-        # 解析數據庫 URL
-        self.connection = self._create_connection()
-    
-    def _create_connection(self):
-        """創建數據庫連接"""
-        url = self.db_config['url']
-        parsed = urlparse(url)
-        
-        return mysql.connector.connect(
-            host=parsed.hostname,
-            port=parsed.port or 3306,
-            user=parsed.username,
-            password=parsed.password,
-            database=parsed.path.lstrip('/'),
-            autocommit=True
+        # 線程本地狀態：事務內該線程固定使用同一個連接
+        self._local = threading.local()
+        
+        # 連接統計
+        self._stats_lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._checkouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._busy_time_total = 0.0
+        self._in_use = 0
+        self._peak_in_use = 0
+        
+        # 每日彙總表（可選）：啟用時近期交易次數、月度盈虧和活躍地址按天讀取彙總
+        self.daily_rollup = self.db_config.get('daily_rollup', {}).get('enabled', False)
+        
+        # 回看範圍（可選）：按時間過濾的交易查詢只讀取最近 N 天，更早的分區不會被掃描
+        self.lookback_days = self.db_config.get('lookback_days')
+        
+        # 標籤統計表（可選）：啟用時標籤寫入同步維護計數，--report 只讀取統計表
+        self.tag_stats = self.db_config.get('tag_stats', {}).get('enabled', False)
+        
+        # 查詢模板在初始化時按配置編譯一次；預處理游標按底層連接快取
+        self.templates = self._compile_templates()
+        self.prepared_statements = self.db_config.get('prepared_statements', True)
+        self._prepared_lock = threading.Lock()
+        self._prepared_cursors = weakref.WeakKeyDictionary()
+        
+        # 查詢結果快取（可選）
+        cache_config = self.db_config.get('query_cache', {})
+        self.query_cache = None
+        self.template_ttls = dict(self.DEFAULT_TEMPLATE_TTLS)
+        if cache_config.get('enabled'):
+            self.query_cache = QueryCache(
+                max_entries=cache_config.get('max_entries', 10000),
+                default_ttl=cache_config.get('default_ttl', 60)
+            )
+            self.template_ttls.update(cache_config.get('ttl', {}))
+        
+        # 按模板的查詢統計，超過閾值的慢查詢採集 EXPLAIN（分區報告需額外 EXPLAIN，默認關閉）
+        stats_config = self.db_config.get('query_stats', {})
+        self.query_stats = None
+        self.explain_slow_queries = stats_config.get('explain', True)
+        self.report_partitions = stats_config.get('partitions', False)
+        if stats_config.get('enabled', True):
+            self.query_stats = QueryStats(
+                slow_query_ms=stats_config.get('slow_query_ms', 500),
+                max_samples=stats_config.get('max_samples', 10000)
+            )
+        
+        # 解析數據庫 URL：主庫立即連接，只讀副本在第一次使用時連接
+        self.pool_size = self.db_config.get('pool_size', 1)
+        pool_name = self.db_config.get('pool_name', 'address_tagging')
+        self.primary = self._create_endpoint('primary', self.db_config['url'], pool_name)
+        self.replicas = [
+            self._create_endpoint(f'replica{i}', url, f'{pool_name}_replica{i}', connect=False)
+            for i, url in enumerate(self.db_config.get('replica_urls', []), 1)
+        ]
+        self.replica_config = self.db_config.get('replica', {})
+        self._replica_lock = threading.Lock()
+        self._next_replica = 0
+        
+        # 副本延遲保護：副本的最大交易 ID 不低於此值才接收讀取（見 get_max_trade_id）
+        self._trade_id_floor = None
+    
+    def _create_endpoint(self, name: str, url: str, pool_name: str, connect: bool = True) -> DatabaseEndpoint:
+        """
+        建立數據庫端點（子類可替換連接方式）
+        
+        Args:
+            name: 端點名稱
+            url: 數據庫 URL
+            pool_name: 連接池名稱
+            connect: 是否立即建立連接
+            
+        Returns:
+            數據庫端點
+        """
+        return DatabaseEndpoint(name, url, self.pool_size, pool_name, connect=connect)
+    
+    @contextmanager
+    def _checkout(self, endpoint: Optional[DatabaseEndpoint] = None):
+        """
+        為當前線程借出一個連接
+        
+        事務內直接返回事務使用的連接；否則從端點（默認主庫）借出，
+        連接池模式下從池中借出，單一連接模式下獨佔共享連接。
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            yield connection
+            return
+        
+        endpoint = endpoint or self.primary
+        requested = time.monotonic()
+        endpoint.available.acquire()
+        acquired = time.monotonic()
+        connection = None
+        try:
+            connection = endpoint.get_connection()
+            with self._stats_lock:
+                wait_time = acquired - requested
+                self._checkouts += 1
+                self._wait_time_total += wait_time
+                self._wait_time_max = max(self._wait_time_max, wait_time)
+                self._in_use += 1
+                self._peak_in_use = max(self._peak_in_use, self._in_use)
+            try:
+                yield connection
+            finally:
+                with self._stats_lock:
+                    self._in_use -= 1
+                    self._busy_time_total += time.monotonic() - acquired
+        finally:
+            if connection is not None:
+                endpoint.release_connection(connection)
+            endpoint.available.release()
+    
+    # ==================== 讀寫分離 ====================
+    
+    def _is_connection_error(self, error: Exception) -> bool:
+        """是否為連接層面的錯誤（副本不可用，可以改由主庫執行）"""
+        return isinstance(error, (mysql.connector.InterfaceError, mysql.connector.OperationalError))
+    
+    def _pick_replica(self) -> DatabaseEndpoint:
+        """
+        按輪詢選擇一個健康的只讀副本
+        
+        距離上次檢查超過 replica.health_check_interval 秒的副本會先做健康檢查。
+        沒有健康的副本時返回主庫。
+        """
+        interval = self.replica_config.get('health_check_interval', 30)
+        for _ in range(len(self.replicas)):
+            with self._replica_lock:
+                endpoint = self.replicas[self._next_replica % len(self.replicas)]
+                self._next_replica += 1
+            
+            if endpoint.checked_at is None or time.monotonic() - endpoint.checked_at >= interval:
+                self._check_replica(endpoint)
+            if endpoint.healthy:
+                return endpoint
+        
+        return self.primary
+    
+    def _check_replica(self, endpoint: DatabaseEndpoint):
+        """
+        副本健康檢查
+        
+        檢查連接是否可用；設置 replica.max_lag_seconds 時檢查複製延遲；
+        啟用延遲保護時檢查副本是否已包含本次運行的最大交易 ID。
+        """
+        endpoint.checked_at = time.monotonic()
+        max_lag = self.replica_config.get('max_lag_seconds', 0)
+        
+        try:
+            with self._checkout(endpoint) as connection:
+                cursor = connection.cursor(dictionary=True)
+                try:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchall()
+                    healthy = True
+                    
+                    if max_lag:
+                        endpoint.lag_seconds = self._replica_lag(cursor)
+                        healthy = endpoint.lag_seconds is not None and endpoint.lag_seconds <= max_lag
+                    
+                    if healthy and self._trade_id_floor is not None:
+                        cursor.execute(self.templates['max_trade_id'])
+                        rows = cursor.fetchall()
+                        healthy = bool(rows) and int(rows[0]['max_id'] or 0) >= self._trade_id_floor
+                finally:
+                    cursor.close()
+        except Exception:
+            endpoint.reset()
+            endpoint.failures += 1
+            healthy = False
+        
+        endpoint.healthy = healthy
+    
+    def _replica_lag(self, cursor) -> Optional[float]:
+        """
+        查詢副本的複製延遲
+        
+        Returns:
+            延遲秒數，複製未運行時返回 None
+        """
+        try:
+            cursor.execute('SHOW REPLICA STATUS')
+        except Exception:
+            # MySQL 8.0.22 之前的語法
+            cursor.execute('SHOW SLAVE STATUS')
+        rows = cursor.fetchall()
+        if not rows:
+            return None
+        
+        lag = rows[0].get('Seconds_Behind_Source', rows[0].get('Seconds_Behind_Master'))
+        return float(lag) if lag is not None else None
+    
+    def _mark_unhealthy(self, endpoint: DatabaseEndpoint):
+        """把出錯的副本標記為不健康（到下次健康檢查前不再接收讀取）"""
+        endpoint.healthy = False
+        endpoint.checked_at = time.monotonic()
+        endpoint.failures += 1
+        endpoint.reset()
+    
+    def _execute_on(self, endpoint: DatabaseEndpoint, sql: str, params: tuple, prepared: bool,
+                    name: Optional[str] = None) -> Any:
+        """在指定端點執行 SQL 語句，並記錄查詢統計"""
+        with self._checkout(endpoint) as connection:
+            started = time.perf_counter()
+            result = self._run(connection, sql, params, prepared)
+            elapsed = time.perf_counter() - started
+            
+            if self.query_stats is not None:
+                key = name or normalize_sql(sql)
+                rows = len(result) if isinstance(result, list) else max(result, 0)
+                if self.query_stats.record(key, elapsed, rows):
+                    plan = self._explain(connection, sql, params) if self.explain_slow_queries else None
+                    self.query_stats.add_slow_query(key, elapsed, sql, params, plan)
+                if (self.report_partitions and name and isinstance(result, list)
+                        and self.query_stats.claim_partitions(key)):
+                    plan = self._explain(connection, sql, params)
+                    self.query_stats.set_partitions(key, self.get_partitions(plan) if plan else {})
+            
+            return result
+    
+    def _run(self, connection, sql: str, params: tuple, prepared: bool) -> Any:
+        """在連接上執行 SQL 語句"""
+        if prepared:
+            cursor = self._prepared_cursor(connection, sql)
+            try:
+                cursor.execute(sql, params)
+                if sql.strip().upper().startswith('SELECT'):
+                    # 預處理游標返回元組（較舊的 8.0.x 驅動不支持字典預處理游標），按欄位名轉為字典
+                    columns = cursor.column_names
+                    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+                return cursor.rowcount
+            except Exception:
+                # 出錯的游標可能處於不一致狀態，下次重新預處理
+                self._discard_prepared_cursor(connection, sql)
+                raise
+        
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(sql, params)
+            if sql.strip().upper().startswith('SELECT'):
+                return cursor.fetchall()
+            else:
+                return cursor.rowcount
+        finally:
+            cursor.close()
+    
+    def _explain(self, connection, sql: str, params: tuple) -> Optional[List[Dict[str, Any]]]:
+        """
+        採集慢查詢的執行計劃（在執行該查詢的同一連接上）
+        
+        Returns:
+            EXPLAIN 結果，語句不支持 EXPLAIN 或採集失敗時返回 None
+        """
+        if sql.split(None, 1)[0].upper() not in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE'):
+            return None
+        
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(f"{self.EXPLAIN_PREFIX} {sql}", params)
+            return cursor.fetchall()
+        except Exception:
+            return None
+        finally:
+            cursor.close()
+    
+    def execute(self, sql: str, params: tuple = None, prepared: bool = False, primary: bool = False,
+                name: Optional[str] = None) -> Any:
+        """
+        執行 SQL 語句
+        
+        事務外的 SELECT 在配置了只讀副本時發到副本，副本連接出錯時改由主庫執行；
+        其他語句都發到主庫。
+        
+        Args:
+            sql: SQL 語句
+            params: 參數
+            prepared: 是否使用服務端預處理語句（游標按連接快取，不關閉）
+            primary: 是否強制在主庫執行
+            name: 查詢統計使用的模板名稱（不指定時使用歸一後的 SQL）
+            
+        Returns:
+            執行結果
+        """
+        in_transaction = getattr(self._local, 'connection', None) is not None
+        if (primary or in_transaction or not self.replicas or
+            not sql.strip().upper().startswith('SELECT')):
+            return self._execute_on(self.primary, sql, params, prepared, name)
+        
+        endpoint = self._pick_replica()
+        if endpoint is self.primary:
+            return self._execute_on(self.primary, sql, params, prepared, name)
+        
+        try:
+            result = self._execute_on(endpoint, sql, params, prepared, name)
+        except Exception as e:
+            if not self._is_connection_error(e):
+                raise
+            self._mark_unhealthy(endpoint)
+            return self._execute_on(self.primary, sql, params, prepared, name)
+        
+        with self._stats_lock:
+            endpoint.reads += 1
+        return result
+    
+    @contextmanager
+    def transaction(self):
+        """
+        顯式事務（連接默認 autocommit，區塊內的語句一起提交或回滾）
+        
+        事務期間當前線程固定使用同一個連接。
+        
+        用法：
+            with db.transaction():
+                db.delete_tags(...)
+                db.upsert_tags(...)
+        """
+        with self._checkout() as connection:
+            self._local.connection = connection
+            try:
+                connection.start_transaction()
+                try:
+                    yield
+                except BaseException:
+                    # 連接會歸還到池中，中斷時也必須回滾，避免下一個使用者繼承未完成的事務
+                    connection.rollback()
+                    raise
+                connection.commit()
+            finally:
+                self._local.connection = None
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        獲取連接使用統計
+        
+        Returns:
+            {
+                'mode': 'pool' 或 'single',
+                'pool_size': int,  # 連接數（主庫和所有副本）
+                'checkouts': int,  # 借出次數
+                'wait_time_total': float,  # 等待連接的總時間（秒）
+                'wait_time_avg_ms': float,  # 平均等待時間（毫秒）
+                'wait_time_max_ms': float,  # 最長等待時間（毫秒）
+                'in_use': int,  # 當前借出的連接數
+                'peak_in_use': int,  # 同時借出的最大連接數
+                'utilization': float,  # 連接繁忙時間 / (運行時間 × 連接數)
+                'replicas': [{'name', 'healthy', 'reads', 'failures', 'lag_seconds'}]  # 各只讀副本
+            }
+        """
+        with self._stats_lock:
+            elapsed = time.monotonic() - self._started_at
+            endpoints = [self.primary] + self.replicas
+            size = sum(endpoint.pool_size for endpoint in endpoints)
+            return {
+                'mode': 'pool' if self.primary.pool_size > 1 else 'single',
+                'pool_size': size,
+                'checkouts': self._checkouts,
+                'wait_time_total': self._wait_time_total,
+                'wait_time_avg_ms': self._wait_time_total / self._checkouts * 1000 if self._checkouts else 0.0,
+                'wait_time_max_ms': self._wait_time_max * 1000,
+                'in_use': self._in_use,
+                'peak_in_use': self._peak_in_use,
+                'utilization': self._busy_time_total / (elapsed * size) if elapsed > 0 else 0.0,
+                'replicas': [
+                    {
+                        'name': endpoint.name,
+                        'healthy': endpoint.healthy,
+                        'reads': endpoint.reads,
+                        'failures': endpoint.failures,
+                        'lag_seconds': endpoint.lag_seconds
+                    }
+                    for endpoint in self.replicas
+                ]
+            }
+    
+    def get_table_name(self, table_key: str) -> str:
+        """獲取實際的表名"""
+        return self.tables.get(table_key, table_key)
+    
+    def get_column_name(self, table_key: str, column_key: str) -> str:
+        """獲取實際的欄位名"""
+        return self.columns.get(table_key, {}).get(column_key, column_key)
+    
+    # ==================== SQL 方言 ====================
+    # 與數據庫相關的 SQL 片段集中在這裡，其他數據庫的適配器覆蓋這些方法即可
+    
+    def _month_sql(self, column: str) -> str:
+        """時間欄位所在的月份（'YYYY-MM'）"""
+        return f"DATE_FORMAT({column}, '%Y-%m')"
+    
+    def _shift_sql(self, column: str, amount: str, unit: str) -> str:
+        """時間加上 amount 個單位（unit 為 'DAY' 或 'HOUR'，amount 為 SQL 表達式，可為負）"""
+        return f"DATE_ADD({column}, INTERVAL {amount} {unit})"
+    
+    def _mod_sql(self, column: str, divisor: int) -> str:
+        """取模"""
+        return f"MOD({column}, {int(divisor)})"
+    
+    def _now_sql(self) -> str:
+        """當前時間"""
+        return "NOW()"
+    
+    def _upsert_sql(self, key_columns: List[str], update_columns: List[str],
+                    extra_assignments: Tuple[str, ...] = ()) -> str:
+        """
+        INSERT 語句主鍵 / 唯一鍵衝突時改為更新的子句
+        
+        Args:
+            key_columns: 衝突的主鍵或唯一鍵欄位
+            update_columns: 更新為新值的欄位
+            extra_assignments: 其他賦值（如 'updated_at = NOW()'）
+        """
+        assignments = [f"{column} = {self._inserted_sql(column)}" for column in update_columns] + list(extra_assignments)
+        return f"ON DUPLICATE KEY UPDATE {', '.join(assignments)}"
+    
+    def _inserted_sql(self, column: str) -> str:
+        """UPSERT 更新子句中引用要插入的新值"""
+        return f"VALUES({column})"
+    
+    def _row_list_sql(self, rows: str) -> str:
+        """行值 IN 子句的右側（rows 如 '(%s, %s), (%s, %s)'）"""
+        return f"({rows})"
+    
+    def _for_update_sql(self) -> str:
+        """事務內讀取並鎖定行的後綴"""
+        return " FOR UPDATE"
+    
+    # ==================== 時間範圍 ====================
+    # 時間條件以 欄位 >= 參數 的形式寫出，參數在這裡計算：優化器可以按範圍裁剪分區、
+    # 使用 (address_id, timestamp) 索引的範圍掃描，不需要對每行求值 NOW() 或 TIMESTAMPDIFF
+    
+    def _days_ago(self, days: int) -> datetime:
+        """N 天前的時間（取整到分鐘，同一分鐘內的查詢參數相同，可以命中查詢快取）"""
+        return datetime.now().replace(second=0, microsecond=0) - timedelta(days=days)
+    
+    def _horizon(self) -> Optional[datetime]:
+        """回看範圍的起點（當天零點往前 lookback_days 天），未配置時為 None"""
+        if not self.lookback_days:
+            return None
+        return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=self.lookback_days)
+    
+    def _window_start(self, days: int) -> Any:
+        """
+        最近 N 天窗口的起點（不早於回看範圍）
+        
+        啟用每日彙總時返回日期（彙總表按天保存，窗口按整天計算）。
+        """
+        start = self._days_ago(days)
+        horizon = self._horizon()
+        if horizon is not None and horizon > start:
+            start = horizon
+        return start.date() if self.daily_rollup else start
+    
+    def _horizon_sql(self, column: str) -> str:
+        """回看範圍條件（AND column >= %s），未配置回看範圍時為空"""
+        return f"AND {column} >= %s" if self.lookback_days else ""
+    
+    def _horizon_params(self, as_date: bool = False) -> tuple:
+        """回看範圍條件的參數（與 _horizon_sql 對應）"""
+        horizon = self._horizon()
+        if horizon is None:
+            return ()
+        return (horizon.date(),) if as_date else (horizon,)
+    
+    def template_params(self, name: str, args: tuple) -> tuple:
+        """
+        把查詢模板的邏輯參數轉換為 SQL 參數
+        
+        近期交易次數的天數換算為窗口起點；按時間過濾的模板在末尾加上回看範圍參數。
+        
+        Args:
+            name: 模板名稱
+            args: 邏輯參數（如 (address_id, days)）
+            
+        Returns:
+            執行模板使用的參數
+        """
+        if name == 'recent_trades_count':
+            return (args[0], self._window_start(args[1]))
+        if name == 'monthly_pnl':
+            return tuple(args) + self._horizon_params(as_date=self.daily_rollup)
+        if name in ('late_entry_trades', 'early_entry_trades'):
+            return tuple(args) + self._horizon_params()
+        return args
+    
+    # ==================== SQL 模板 ====================
+    
+    def _compile_templates(self) -> Dict[str, str]:
+        """
+        按表名和欄位名配置編譯固定形狀的查詢模板（初始化時執行一次）
+        
+        Returns:
+            模板名稱 -> SQL
+        """
+        addresses_table = self.get_table_name('addresses')
+        trades_table = self.get_table_name('address_trades')
+        markets_table = self.get_table_name('markets')
+        state_table = self.get_table_name('tagging_state')
+        daily_stats_table = self.get_table_name('address_daily_stats')
+        
+        id_col = self.get_column_name('address_trades', 'id')
+        address_id_col = self.get_column_name('address_trades', 'address_id')
+        market_id_col = self.get_column_name('address_trades', 'market_id')
+        timestamp_col = self.get_column_name('address_trades', 'timestamp')
+        amount_col = self.get_column_name('address_trades', 'amount')
+        side_col = self.get_column_name('address_trades', 'side')
+        price_col = self.get_column_name('address_trades', 'price')
+        pnl_col = self.get_column_name('address_trades', 'pnl')
+        category_col = self.get_column_name('markets', 'category')
+        end_date_col = self.get_column_name('markets', 'end_date')
+        created_at_col = self.get_column_name('markets', 'created_at')
+        
+        templates = {
+            'address': f"SELECT * FROM {addresses_table} WHERE id = %s",
+            'address_trades': f"""
+            SELECT 
+                {id_col} as id,
+                {market_id_col} as market_id,
+                {timestamp_col} as timestamp,
+                {amount_col} as amount,
+                {side_col} as side,
+                {price_col} as price,
+                {pnl_col} as pnl
+            FROM {trades_table}
+            WHERE {address_id_col} = %s
+            ORDER BY {timestamp_col}
+            """,
+            'max_trade_id': f"SELECT MAX({id_col}) as max_id FROM {trades_table}",
+            'category_trades': f"""
+            SELECT COUNT(*) as count
+            FROM {trades_table} t
+            JOIN {markets_table} m ON t.{market_id_col} = m.id
+            WHERE t.{address_id_col} = %s AND m.{category_col} = %s
+            """,
+            'category_histogram': f"""
+            SELECT m.{category_col} as category, COUNT(*) as count
+            FROM {trades_table} t
+            JOIN {markets_table} m ON t.{market_id_col} = m.id
+            WHERE t.{address_id_col} = %s
+            GROUP BY m.{category_col}
+            """,
+            'recent_trades_count': f"""
+            SELECT COUNT(*) as count
+            FROM {trades_table}
+            WHERE {address_id_col} = %s
+            AND {timestamp_col} >= %s
+            """,
+            'monthly_pnl': f"""
+            SELECT 
+                {self._month_sql(timestamp_col)} as month,
+                SUM({pnl_col}) as monthly_pnl
+            FROM {trades_table}
+            WHERE {address_id_col} = %s
+            {self._horizon_sql(timestamp_col)}
+            GROUP BY month
+            ORDER BY month
+            """,
+            'price_distribution': f"""
+            SELECT {price_col} as price
+            FROM {trades_table}
+            WHERE {address_id_col} = %s
+            """,
+            'late_entry_trades': f"""
+            SELECT COUNT(*) as count
+            FROM {trades_table} t
+            JOIN {markets_table} m ON t.{market_id_col} = m.id
+            WHERE t.{address_id_col} = %s
+            AND m.{end_date_col} IS NOT NULL
+            AND t.{timestamp_col} > {self._shift_sql(f'm.{end_date_col}', '-(%s + 1)', 'DAY')}
+            {self._horizon_sql(f't.{timestamp_col}')}
+            """,
+            'early_entry_trades': f"""
+            SELECT COUNT(*) as count
+            FROM {trades_table} t
+            JOIN {markets_table} m ON t.{market_id_col} = m.id
+            WHERE t.{address_id_col} = %s
+            AND m.{created_at_col} IS NOT NULL
+            AND t.{timestamp_col} < {self._shift_sql(f'm.{created_at_col}', '(%s + 1)', 'HOUR')}
+            {self._horizon_sql(f't.{timestamp_col}')}
+            """,
+            'state': f"SELECT value FROM {state_table} WHERE name = %s"
+        }
+        
+        # 啟用每日彙總時，近期交易次數和月度盈虧按天讀取彙總表（近期窗口按整天計算）
+        if self.daily_rollup:
+            templates['recent_trades_count'] = f"""
+            SELECT COALESCE(SUM(trade_count), 0) as count
+            FROM {daily_stats_table}
+            WHERE address_id = %s
+            AND day >= %s
+            """
+            templates['monthly_pnl'] = f"""
+            SELECT 
+                {self._month_sql('day')} as month,
+                SUM(pnl) as monthly_pnl
+            FROM {daily_stats_table}
+            WHERE address_id = %s
+            {self._horizon_sql('day')}
+            GROUP BY month
+            ORDER BY month
+            """
+        
+        return templates
+    
+    def get_compiled_sql(self, name: Optional[str] = None) -> Any:
+        """
+        查看編譯後的查詢模板
+        
+        Args:
+            name: 模板名稱（可選，不指定時返回所有模板）
+            
+        Returns:
+            SQL 字符串，或模板名稱 -> SQL 的字典
+        """
+        if name is not None:
+            return self.templates[name]
+        return dict(self.templates)
+    
+    def execute_template(self, name: str, params: tuple = None, primary: bool = False) -> Any:
+        """
+        執行預編譯的查詢模板（啟用時使用服務端預處理語句）
+        
+        啟用查詢快取時，按 (模板, 參數) 讀取快取；快取的結果由調用方共享，應視為只讀。
+        
+        Args:
+            name: 模板名稱
+            params: 參數
+            primary: 是否強制在主庫執行
+            
+        Returns:
+            執行結果
+        """
+        primary = primary or name in self.PRIMARY_TEMPLATES
+        ttl = self.template_ttls.get(name)
+        if self.query_cache is None or ttl == 0:
+            return self.execute(self.templates[name], params, prepared=self.prepared_statements,
+                                primary=primary, name=name)
+        
+        key = (name, params)
+        hit, result = self.query_cache.get(key)
+        if hit:
+            return result
+        
+        result = self.execute(self.templates[name], params, prepared=self.prepared_statements,
+                              primary=primary, name=name)
+        self.query_cache.put(key, result, ttl, self.TEMPLATE_TABLES.get(name, ()))
+        return result
+    
+    def invalidate_cache(self, table_key: Optional[str] = None):
+        """
+        使查詢快取失效
+        
+        Args:
+            table_key: 被寫入的表（不指定時清空整個快取）
+        """
+        if self.query_cache is not None:
+            self.query_cache.invalidate(table_key)
+    
+    def get_query_stats(self) -> Optional[Dict[str, Any]]:
+        """獲取按模板匯總的查詢統計（見 QueryStats.get_summary，未啟用時返回 None）"""
+        if self.query_stats is None:
+            return None
+        return self.query_stats.get_summary()
+    
+    def get_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """獲取查詢快取統計（未啟用快取時返回 None）"""
+        if self.query_cache is None:
+            return None
+        return self.query_cache.get_stats()
+    
+    def _prepared_cursor(self, connection, sql: str):
+        """
+        獲取連接上某條 SQL 的預處理游標
+        
+        每個連接、每條模板保留一個游標，語句只在第一次執行時預處理。
+        """
+        # 池化連接每次借出都是新的包裝對象，按底層連接快取
+        raw_connection = getattr(connection, '_cnx', connection)
+        with self._prepared_lock:
+            cursors = self._prepared_cursors.setdefault(raw_connection, {})
+        
+        cursor = cursors.get(sql)
+        if cursor is None:
+            cursor = connection.cursor(prepared=True)
+            cursors[sql] = cursor
+        return cursor
+    
+    def _discard_prepared_cursor(self, connection, sql: str):
+        """丟棄快取的預處理游標"""
+        raw_connection = getattr(connection, '_cnx', connection)
+        with self._prepared_lock:
+            cursor = self._prepared_cursors.get(raw_connection, {}).pop(sql, None)
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+    
+    def get_address_data(self, address_id: int) -> Optional[Dict[str, Any]]:
+        """
+        獲取地址數據
+        
+        Args:
+            address_id: 地址 ID
+            
+        Returns:
+            地址數據字典
+        """
+        result = self.execute_template('address', (address_id,))
+        return result[0] if result else None
+    
+    def get_address(self, address_id: int) -> Optional[Dict[str, Any]]:
+        """獲取地址數據（get_address_data 的別名）"""
+        return self.get_address_data(address_id)
+    
+    def get_address_trades(self, address_id: int) -> List[Dict[str, Any]]:
+        """
+        獲取地址的所有交易記錄
+        
+        Args:
+            address_id: 地址 ID
+            
+        Returns:
+            交易列表（按時間排序）
+        """
+        return self.execute_template('address_trades', (address_id,))
+    
+    def _shard_condition(self, column: str, shard: Optional[Tuple[int, int]]) -> str:
+        """
+        生成分片條件（按 ID 取模分配）
+        
+        Args:
+            column: ID 欄位名
+            shard: (分片序號, 分片總數)，None 表示不分片
+            
+        Returns:
+            SQL 條件（不分片時為恆真條件）
+        """
+        if not shard or shard[1] <= 1:
+            return "1 = 1"
+        index, count = shard
+        return f"{self._mod_sql(column, count)} = {int(index)}"
+    
+    def iter_address_id_pages(self, page_size: int = 2000, after_id: Optional[int] = None,
+                              shard: Optional[Tuple[int, int]] = None,
+                              limit: Optional[int] = None) -> Iterator[List[int]]:
+        """
+        按頁迭代地址 ID（鍵集分頁）
+        
+        每頁使用 WHERE id > 上一頁最後 ID ORDER BY id LIMIT n 查詢，
+        不需要先載入全部地址，內存佔用與表大小無關。
+        
+        Args:
+            page_size: 每頁數量
+            after_id: 從此 ID 之後開始（不包含），None 表示從頭開始
+            shard: (分片序號, 分片總數)，只返回屬於該分片的地址
+            limit: 限制總數量
+            
+        Yields:
+            地址 ID 列表（按 ID 升序）
+        """
+        table = self.get_table_name('addresses')
+        sql = f"""
+        SELECT id FROM {table}
+        WHERE id > %s AND {self._shard_condition('id', shard)}
+        ORDER BY id
+        LIMIT %s
+        """
+        
+        last_id = after_id if after_id is not None else -1
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            page = [row['id'] for row in self.execute(sql, (last_id, size))]
+            if not page:
+                break
+            
+            yield page
+            
+            last_id = page[-1]
+            if remaining is not None:
+                remaining -= len(page)
+            if len(page) < size:
+                break
+    
+    def iter_address_ids(self, page_size: int = 2000, after_id: Optional[int] = None,
+                         shard: Optional[Tuple[int, int]] = None,
+                         limit: Optional[int] = None) -> Iterator[int]:
+        """
+        逐個迭代地址 ID（參數同 iter_address_id_pages）
+        
+        Yields:
+            地址 ID
+        """
+        for page in self.iter_address_id_pages(page_size, after_id, shard, limit):
+            yield from page
+    
+    def get_all_address_ids(self, limit: Optional[int] = None,
+                            shard: Optional[Tuple[int, int]] = None) -> List[int]:
+        """
+        獲取所有地址 ID
+        
+        大表請使用 iter_address_id_pages 流式處理。
+        
+        Args:
+            limit: 限制數量
+            shard: (分片序號, 分片總數)，只返回屬於該分片的地址
+            
+        Returns:
+            地址 ID 列表
+        """
+        return list(self.iter_address_ids(limit=limit, shard=shard))
+    
+    def count_addresses(self, shard: Optional[Tuple[int, int]] = None) -> int:
+        """
+        獲取地址數量
+        
+        Args:
+            shard: (分片序號, 分片總數)，只統計屬於該分片的地址
+            
+        Returns:
+            地址數量
+        """
+        table = self.get_table_name('addresses')
+        sql = f"SELECT COUNT(*) as count FROM {table} WHERE {self._shard_condition('id', shard)}"
+        
+        result = self.execute(sql)
+        return result[0]['count'] if result else 0
+    
+    def get_recently_active_addresses(self, days: int = 7,
+                                      shard: Optional[Tuple[int, int]] = None) -> List[int]:
+        """
+        獲取最近活躍的地址 ID
+        
+        Args:
+            days: 天數
+            shard: (分片序號, 分片總數)，只返回屬於該分片的地址
+            
+        Returns:
+            地址 ID 列表
+        """
+        if self.daily_rollup:
+            sql = f"""
+            SELECT DISTINCT address_id
+            FROM {self.get_table_name('address_daily_stats')}
+            WHERE day >= %s
+            AND {self._shard_condition('address_id', shard)}
+            """
+            result = self.execute(sql, (self._window_start(days),))
+            return [row['address_id'] for row in result]
+        
+        trades_table = self.get_table_name('address_trades')
+        timestamp_col = self.get_column_name('address_trades', 'timestamp')
+        address_id_col = self.get_column_name('address_trades', 'address_id')
+        
+        sql = f"""
+        SELECT DISTINCT {address_id_col} as address_id
+        FROM {trades_table}
+        WHERE {timestamp_col} >= %s
+        AND {self._shard_condition(address_id_col, shard)}
+        """
+        
+        result = self.execute(sql, (self._window_start(days),))
+        return [row['address_id'] for row in result]
+    
+    def get_max_trade_id(self) -> int:
+        """
+        獲取當前最大的交易 ID（沒有交易時返回 0）
+        
+        配置只讀副本且啟用延遲保護（replica.lag_guard，默認啟用）時，返回各健康副本中
+        最小的最大交易 ID，確保之後從任一副本讀取的交易都完整包含到該 ID，
+        增量更新水位不會越過副本尚未同步的交易；之後副本必須同步到該 ID 才會接收讀取。
+        """
+        if self.replicas and self.replica_config.get('lag_guard', True):
+            values = []
+            for endpoint in self.replicas:
+                if not endpoint.healthy:
+                    continue
+                try:
+                    result = self._execute_on(endpoint, self.templates['max_trade_id'], None, self.prepared_statements,
+                                             'max_trade_id')
+                except Exception as e:
+                    if not self._is_connection_error(e):
+                        raise
+                    self._mark_unhealthy(endpoint)
+                    continue
+                values.append(int(result[0]['max_id'] or 0) if result else 0)
+            
+            if values:
+                self._trade_id_floor = min(values)
+                return self._trade_id_floor
+        
+        result = self.execute_template('max_trade_id', primary=True)
+        return int(result[0]['max_id'] or 0) if result else 0
+    
+    def get_addresses_traded_between(self, after_trade_id: int, upto_trade_id: int,
+                                     shard: Optional[Tuple[int, int]] = None) -> List[int]:
+        """
+        獲取交易 ID 在 (after_trade_id, upto_trade_id] 範圍內有交易的地址 ID
+        
+        Args:
+            after_trade_id: 起始交易 ID（不包含）
+            upto_trade_id: 結束交易 ID（包含）
+            shard: (分片序號, 分片總數)，只返回屬於該分片的地址
+            
+        Returns:
+            地址 ID 列表
+        """
+        trades_table = self.get_table_name('address_trades')
+        id_col = self.get_column_name('address_trades', 'id')
+        address_id_col = self.get_column_name('address_trades', 'address_id')
+        
+        sql = f"""
+        SELECT DISTINCT {address_id_col} as address_id
+        FROM {trades_table}
+        WHERE {id_col} > %s AND {id_col} <= %s
+        AND {self._shard_condition(address_id_col, shard)}
+        """
+        
+        result = self.execute(sql, (after_trade_id, upto_trade_id))
+        return [row['address_id'] for row in result]
+    
+    def get_total_addresses(self) -> int:
+        """獲取總地址數"""
+        table = self.get_table_name('addresses')
+        sql = f"SELECT COUNT(*) as count FROM {table}"
+        
+        result = self.execute(sql)
+        return result[0]['count'] if result else 0
+    
+    def get_tagged_addresses_count(self) -> int:
+        """獲取有標籤的地址數"""
+        table = self.get_table_name('address_tags')
+        sql = f"SELECT COUNT(DISTINCT address_id) as count FROM {table}"
+        
+        result = self.execute(sql)
+        return result[0]['count'] if result else 0
+    
+    def get_total_tags_count(self) -> int:
+        """獲取總標籤數"""
+        table = self.get_table_name('address_tags')
+        sql = f"SELECT COUNT(*) as count FROM {table}"
+        
+        result = self.execute(sql)
+        return result[0]['count'] if result else 0
+    
+    def get_tags_by_category(self, category: str) -> Dict[str, int]:
+        """
+        獲取指定類別的標籤統計
+        
+        Args:
+            category: 標籤類別
+            
+        Returns:
+            標籤名稱 -> 數量的字典
+        """
+        table = self.get_table_name('address_tags')
+        sql = f"""
+        SELECT tag_name, COUNT(*) as count
+        FROM {table}
+        WHERE category = %s
+        GROUP BY tag_name
+        ORDER BY count DESC
+        """
+        
+        result = self.execute(sql, (category,))
+        return {row['tag_name']: row['count'] for row in result}
+    
+    def get_all_tags(self) -> List[Dict[str, Any]]:
+        """獲取所有標籤"""
+        table = self.get_table_name('address_tags')
+        sql = f"""
+        SELECT 
+            address_id,
+            category,
+            tag_name,
+            confidence_score,
+            is_manual,
+            created_at,
+            updated_at
+        FROM {table}
+        ORDER BY address_id, category, tag_name
+        """
+        
+        return self.execute(sql)
+    
+    def get_tag_distribution(self) -> Dict[str, int]:
+        """
+        獲取各標籤的地址數
+        
+        Returns:
+            標籤名稱 -> 數量的字典（按數量降序）
+        """
+        table = self.get_table_name('address_tags')
+        sql = f"""
+        SELECT tag_name, COUNT(*) as count
+        FROM {table}
+        GROUP BY tag_name
+        ORDER BY count DESC
+        """
+        
+        result = self.execute(sql)
+        return {row['tag_name']: row['count'] for row in result}
+    
+    def get_tag_statistics(self) -> Dict[str, Any]:
+        """
+        獲取標籤統計（--report 使用）
+        
+        啟用標籤統計表時只讀取統計表，否則掃描標籤表。
+        
+        Returns:
+            {
+                'total_addresses': int,  # 總地址數
+                'tagged_addresses': int,  # 有標籤的地址數
+                'coverage_rate': float,  # 標記率
+                'total_tags': int,  # 總標籤數
+                'avg_tags_per_address': float,  # 有標籤的地址平均標籤數
+                'tag_distribution': Dict[str, int],  # 標籤名稱 -> 數量（按數量降序）
+                'category_distribution': Dict[str, int],  # 類別 -> 數量（按數量降序）
+                'confidence_histogram': List[int]  # 各信心分數區間的標籤數（每 0.1 一個區間）
+            }
+        """
+        if self.tag_stats:
+            self.ensure_tag_stats()
+            counts = self.read_tag_stats()
+        else:
+            counts = self._scan_tag_stats()
+        
+        total_addresses = self.get_total_addresses()
+        tagged_addresses = counts.get(('addresses', '', '', 0), 0)
+        total_tags = counts.get(('tags', '', '', 0), 0)
+        
+        tag_distribution = {}
+        category_distribution = {}
+        confidence_histogram = [0] * self.CONFIDENCE_BUCKETS
+        for (stat, category, tag_name, bucket), total in counts.items():
+            if stat == 'tag':
+                tag_distribution[tag_name] = tag_distribution.get(tag_name, 0) + total
+            elif stat == 'category':
+                category_distribution[category] = category_distribution.get(category, 0) + total
+            elif stat == 'confidence':
+                confidence_histogram[bucket] += total
+        
+        by_count = lambda distribution: dict(sorted(distribution.items(), key=lambda item: -item[1]))
+        return {
+            'total_addresses': total_addresses,
+            'tagged_addresses': tagged_addresses,
+            'coverage_rate': tagged_addresses / total_addresses if total_addresses else 0.0,
+            'total_tags': total_tags,
+            'avg_tags_per_address': total_tags / tagged_addresses if tagged_addresses else 0.0,
+            'tag_distribution': by_count(tag_distribution),
+            'category_distribution': by_count(category_distribution),
+            'confidence_histogram': confidence_histogram
+        }
+    
+    def get_category_trades(self, address_id: int, category: str) -> int:
+        """
+        獲取地址在指定類別的交易次數
+        
+        Args:
+            address_id: 地址 ID
+            category: 市場類別
+            
+        Returns:
+            交易次數
+        """
+        result = self.execute_template('category_trades', (address_id, category))
+        return result[0]['count'] if result else 0
+    
+    def get_keyword_trades(self, address_id: int, keywords: List[str], parent_category: Optional[str] = None) -> int:
+        """
+        獲取地址在包含關鍵詞的市場的交易次數
+        
+        Args:
+            address_id: 地址 ID
+            keywords: 關鍵詞列表
+            parent_category: 父類別（可選）
+            
+        Returns:
+            交易次數
+        """
+        trades_table = self.get_table_name('address_trades')
+        markets_table = self.get_table_name('markets')
+        address_id_col = self.get_column_name('address_trades', 'address_id')
+        market_id_col = self.get_column_name('address_trades', 'market_id')
+        title_col = self.get_column_name('markets', 'title')
+        category_col = self.get_column_name('markets', 'category')
+        
+        # 構建關鍵詞條件
+        keyword_conditions = ' OR '.join([f"m.{title_col} LIKE %s" for _ in keywords])
+        keyword_params = [f"%{kw}%" for kw in keywords]
+        
+        sql = f"""
+        SELECT COUNT(*) as count
+        FROM {trades_table} t
+        JOIN {markets_table} m ON t.{market_id_col} = m.id
+        WHERE t.{address_id_col} = %s
+        AND ({keyword_conditions})
+        """
+        
+        params = [address_id] + keyword_params
+        
+        if parent_category:
+            sql += f" AND m.{category_col} = %s"
+            params.append(parent_category)
+        
+        result = self.execute(sql, tuple(params))
+        return result[0]['count'] if result else 0
+    
+    def get_recent_trades_count(self, address_id: int, days: int = 30) -> int:
+        """
+        獲取地址最近的交易次數
+        
+        Args:
+            address_id: 地址 ID
+            days: 天數
+            
+        Returns:
+            交易次數
+        """
+        result = self.execute_template('recent_trades_count', self.template_params('recent_trades_count', (address_id, days)))
+        return result[0]['count'] if result else 0
+    
+    def get_monthly_pnl(self, address_id: int) -> List[Dict[str, Any]]:
+        """
+        獲取地址的月度盈虧
+        
+        Args:
+            address_id: 地址 ID
+            
+        Returns:
+            月度盈虧列表
+        """
+        return self.execute_template('monthly_pnl', self.template_params('monthly_pnl', (address_id,)))
+    
+    def get_price_distribution(self, address_id: int) -> List[Dict[str, Any]]:
+        """
+        獲取地址的價格分布
+        
+        Args:
+            address_id: 地址 ID
+            
+        Returns:
+            價格分布列表
+        """
+        return self.execute_template('price_distribution', (address_id,))
+    
+    def get_late_entry_trades(self, address_id: int, days_before_close: int = 3) -> int:
+        """
+        獲取地址在市場結算前 N 天內的交易次數
+        
+        Args:
+            address_id: 地址 ID
+            days_before_close: 結算前天數
+            
+        Returns:
+            交易次數
+        """
+        result = self.execute_template(
+            'late_entry_trades', self.template_params('late_entry_trades', (address_id, days_before_close))
+        )
+        return result[0]['count'] if result else 0
+    
+    def get_early_entry_trades(self, address_id: int, hours_after_creation: int = 48) -> int:
+        """
+        獲取地址在市場創建後 N 小時內的交易次數
+        
+        Args:
+            address_id: 地址 ID
+            hours_after_creation: 創建後小時數
+            
+        Returns:
+            交易次數
+        """
+        result = self.execute_template(
+            'early_entry_trades', self.template_params('early_entry_trades', (address_id, hours_after_creation))
+        )
+        return result[0]['count'] if result else 0
+    
+    # ==================== 批量特徵提取 ====================
+    
+    def _in_placeholders(self, values: List[Any]) -> str:
+        """生成 IN 子句的佔位符"""
+        return ', '.join(['%s'] * len(values))
+    
+    def get_addresses(self, address_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        批量獲取地址數據
+        
+        Args:
+            address_ids: 地址 ID 列表
+            
+        Returns:
+            地址 ID -> 地址數據的字典
+        """
+        if not address_ids:
+            return {}
+        
+        table = self.get_table_name('addresses')
+        sql = f"SELECT * FROM {table} WHERE id IN ({self._in_placeholders(address_ids)})"
+        
+        result = self.execute(sql, tuple(address_ids))
+        return {row['id']: row for row in result}
+    
+    def get_address_trades_bulk(self, address_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        批量獲取地址的所有交易記錄
+        
+        Args:
+            address_ids: 地址 ID 列表
+            
+        Returns:
+            地址 ID -> 交易列表（按時間排序，欄位同 get_address_trades）的字典
+        """
+        trades_table = self.get_table_name('address_trades')
+        id_col = self.get_column_name('address_trades', 'id')
+        address_id_col = self.get_column_name('address_trades', 'address_id')
+        market_id_col = self.get_column_name('address_trades', 'market_id')
+        timestamp_col = self.get_column_name('address_trades', 'timestamp')
+        amount_col = self.get_column_name('address_trades', 'amount')
+        side_col = self.get_column_name('address_trades', 'side')
+        price_col = self.get_column_name('address_trades', 'price')
+        pnl_col = self.get_column_name('address_trades', 'pnl')
+        
+        trades = {address_id: [] for address_id in address_ids}
+        if not address_ids:
+            return trades
+        
+        sql = f"""
+        SELECT 
+            {address_id_col} as address_id,
+            {id_col} as id,
+            {market_id_col} as market_id,
+            {timestamp_col} as timestamp,
+            {amount_col} as amount,
+            {side_col} as side,
+            {price_col} as price,
+            {pnl_col} as pnl
+        FROM {trades_table}
+        WHERE {address_id_col} IN ({self._in_placeholders(address_ids)})
+        ORDER BY {address_id_col}, {timestamp_col}, {id_col}
+        """
+        
+        for row in self.execute(sql, tuple(address_ids)):
+            trades[row.pop('address_id')].append(row)
+        return trades
+    
+    def get_category_histogram(self, address_ids: List[int]) -> Dict[int, Dict[str, int]]:
+        """
+        獲取一個或一批地址在所有類別的交易次數（單條 GROUP BY 查詢）
+        
+        Args:
+            address_ids: 地址 ID 列表（單個地址傳 [address_id]）
+            
+        Returns:
+            地址 ID -> {類別: 交易次數} 的字典，沒有交易的類別不出現
+        """
+        if not address_ids:
+            return {}
+        
+        # 單個地址（逐地址打標籤）走預編譯模板
+        if len(address_ids) == 1:
+            result = self.execute_template('category_histogram', (address_ids[0],))
+            return {address_ids[0]: {row['category']: row['count'] for row in result}}
+        
+        trades_table = self.get_table_name('address_trades')
+        markets_table = self.get_table_name('markets')
+        address_id_col = self.get_column_name('address_trades', 'address_id')
+        market_id_col = self.get_column_name('address_trades', 'market_id')
+        category_col = self.get_column_name('markets', 'category')
+        
+        sql = f"""
+        SELECT t.{address_id_col} as address_id, m.{category_col} as category, COUNT(*) as count
+        FROM {trades_table} t
+        JOIN {markets_table} m ON t.{market_id_col} = m.id
+        WHERE t.{address_id_col} IN ({self._in_placeholders(address_ids)})
+        GROUP BY t.{address_id_col}, m.{category_col}
+        """
+        
+        histogram = {address_id: {} for address_id in address_ids}
+        for row in self.execute(sql, tuple(address_ids)):
+            histogram[row['address_id']][row['category']] = row['count']
+        return histogram
+    
+    def get_keyword_trades_bulk(self, address_ids: List[int],
+                                keyword_groups: Dict[str, Dict[str, Any]]) -> Dict[int, Dict[str, int]]:
+        """
+        批量獲取地址在各關鍵詞組市場的交易次數
+        
+        Args:
+            address_ids: 地址 ID 列表
+            keyword_groups: 組名 -> {'keywords': [...], 'parent_category': str 或 None}
+            
+        Returns:
+            地址 ID -> {組名: 交易次數} 的字典
+        """
+        trades_table = self.get_table_name('address_trades')
+        markets_table = self.get_table_name('markets')
+        address_id_col = self.get_column_name('address_trades', 'address_id')
+        market_id_col = self.get_column_name('address_trades', 'market_id')
+        title_col = self.get_column_name('markets', 'title')
+        category_col = self.get_column_name('markets', 'category')
+        
+        group_names = list(keyword_groups)
+        counts = {address_id: {name: 0 for name in group_names} for address_id in address_ids}
+        if not group_names:
+            return counts
+        
+        # 每個關鍵詞組一個 SUM(CASE ...) 欄位，一次查詢算出所有組
+        columns = []
+        params = []
+        for i, name in enumerate(group_names):
+            group = keyword_groups[name]
+            condition = ' OR '.join([f"m.{title_col} LIKE %s" for _ in group['keywords']])
+            params.extend(f"%{kw}%" for kw in group['keywords'])
+            if group.get('parent_category'):
+                condition = f"({condition}) AND m.{category_col} = %s"
+                params.append(group['parent_category'])
+            columns.append(f"SUM(CASE WHEN {condition} THEN 1 ELSE 0 END) as kw_{i}")
+        
+        sql = f"""
+        SELECT t.{address_id_col} as address_id, {', '.join(columns)}
+        FROM {trades_table} t
+        JOIN {markets_table} m ON t.{market_id_col} = m.id
+        WHERE t.{address_id_col} IN ({self._in_placeholders(address_ids)})
+        GROUP BY t.{address_id_col}
+        """
+        
+        params.extend(address_ids)
+        for row in self.execute(sql, tuple(params)):
+            for i, name in enumerate(group_names):
+                counts[row['address_id']][name] = int(row[f'kw_{i}'] or 0)
+        return counts
+    
+    def get_recent_trades_count_bulk(self, address_ids: List[int], days_list: List[int]) -> Dict[int, Dict[int, int]]:
+        """
+        批量獲取地址在多個時間窗口內的交易次數
+        
+        Args:
+            address_ids: 地址 ID 列表
+            days_list: 天數列表
+            
+        Returns:
+            地址 ID -> {天數: 交易次數} 的字典
+        """
+        trades_table = self.get_table_name('address_trades')
+        address_id_col = self.get_column_name('address_trades', 'address_id')
+        timestamp_col = self.get_column_name('address_trades', 'timestamp')
+        
+        counts = {address_id: {days: 0 for days in days_list} for address_id in address_ids}
+        if not days_list:
+            return counts
+        
+        count_sql = '1'
+        if self.daily_rollup:
+            # 按天讀取彙總表（窗口按整天計算）
+            trades_table = self.get_table_name('address_daily_stats')
+            address_id_col, timestamp_col, count_sql = 'address_id', 'day', 'trade_count'
+        
+        # 最長窗口的起點作為範圍條件，只讀取窗口內的交易（和分區）
+        starts = [self._window_start(days) for days in days_list]
+        columns = ', '.join(
+            f"SUM(CASE WHEN {timestamp_col} >= %s THEN {count_sql} ELSE 0 END) as d_{int(days)}"
+            for days in days_list
+        )
+        
+        sql = f"""
+        SELECT {address_id_col} as address_id, {columns}
+        FROM {trades_table}
+        WHERE {address_id_col} IN ({self._in_placeholders(address_ids)})
+        AND {timestamp_col} >= %s
+        GROUP BY {address_id_col}
+        """
+        
+        for row in self.execute(sql, tuple(starts) + tuple(address_ids) + (min(starts),)):
+            for days in days_list:
+                counts[row['address_id']][days] = int(row[f'd_{int(days)}'] or 0)
+        return counts
+    
+    def get_monthly_pnl_bulk(self, address_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        批量獲取地址的月度盈虧
+        
+        Args:
+            address_ids: 地址 ID 列表
+            
+        Returns:
+            地址 ID -> 月度盈虧列表的字典
+        """
+        trades_table = self.get_table_name('address_trades')
+        address_id_col = self.get_column_name('address_trades', 'address_id')
+        timestamp_col = self.get_column_name('address_trades', 'timestamp')
+        pnl_col = self.get_column_name('address_trades', 'pnl')
+        if self.daily_rollup:
+            trades_table = self.get_table_name('address_daily_stats')
+            address_id_col, timestamp_col, pnl_col = 'address_id', 'day', 'pnl'
+        
+        sql = f"""
+        SELECT 
+            {address_id_col} as address_id,
+            {self._month_sql(timestamp_col)} as month,
+            SUM({pnl_col}) as monthly_pnl
+        FROM {trades_table}
+        WHERE {address_id_col} IN ({self._in_placeholders(address_ids)})
+        {self._horizon_sql(timestamp_col)}
+        GROUP BY {address_id_col}, month
+        ORDER BY {address_id_col}, month
+        """
+        
+        monthly = {address_id: [] for address_id in address_ids}
+        params = tuple(address_ids) + self._horizon_params(as_date=self.daily_rollup)
+        for row in self.execute(sql, params):
+            monthly[row['address_id']].append({'month': row['month'], 'monthly_pnl': row['monthly_pnl']})
+        return monthly
+    
+    def get_price_distribution_bulk(self, address_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        批量獲取地址的價格分布
+        
+        Args:
+            address_ids: 地址 ID 列表
+            
+        Returns:
+            地址 ID -> 價格分布列表的字典
+        """
+        trades_table = self.get_table_name('address_trades')
+        address_id_col = self.get_column_name('address_trades', 'address_id')
+        price_col = self.get_column_name('address_trades', 'price')
+        
+        sql = f"""
+        SELECT {address_id_col} as address_id, {price_col} as price
+        FROM {trades_table}
+        WHERE {address_id_col} IN ({self._in_placeholders(address_ids)})
+        """
+        
+        distribution = {address_id: [] for address_id in address_ids}
+        for row in self.execute(sql, tuple(address_ids)):
+            distribution[row['address_id']].append({'price': row['price']})
+        return distribution
+    
+    def get_entry_timing_bulk(self, address_ids: List[int], late_days_list: List[int],
+                              early_hours_list: List[int]) -> Dict[int, Dict[str, Dict[int, int]]]:
+        """
+        批量獲取地址的掃尾盤和早期進場交易次數
+        
+        Args:
+            address_ids: 地址 ID 列表
+            late_days_list: 結算前天數列表
+            early_hours_list: 創建後小時數列表
+            
+        Returns:
+            地址 ID -> {'late': {天數: 次數}, 'early': {小時數: 次數}} 的字典
+        """
+        trades_table = self.get_table_name('address_trades')
+        markets_table = self.get_table_name('markets')
+        address_id_col = self.get_column_name('address_trades', 'address_id')
+        market_id_col = self.get_column_name('address_trades', 'market_id')
+        timestamp_col = self.get_column_name('address_trades', 'timestamp')
+        end_date_col = self.get_column_name('markets', 'end_date')
+        created_at_col = self.get_column_name('markets', 'created_at')
+        
+        timing = {
+            address_id: {
+                'late': {days: 0 for days in late_days_list},
+                'early': {hours: 0 for hours in early_hours_list}
+            }
+            for address_id in address_ids
+        }
+        if not late_days_list and not early_hours_list:
+            return timing
+        
+        # TIMESTAMPDIFF(DAY, t, end) <= N 等價於 t > end - (N + 1) 天（小時同理），比較時間欄位本身
+        columns = [
+            f"SUM(CASE WHEN m.{end_date_col} IS NOT NULL "
+            f"AND t.{timestamp_col} > {self._shift_sql(f'm.{end_date_col}', str(-(int(days) + 1)), 'DAY')} "
+            f"THEN 1 ELSE 0 END) as late_{int(days)}"
+            for days in late_days_list
+        ] + [
+            f"SUM(CASE WHEN m.{created_at_col} IS NOT NULL "
+            f"AND t.{timestamp_col} < {self._shift_sql(f'm.{created_at_col}', str(int(hours) + 1), 'HOUR')} "
+            f"THEN 1 ELSE 0 END) as early_{int(hours)}"
+            for hours in early_hours_list
+        ]
+        
+        sql = f"""
+        SELECT t.{address_id_col} as address_id, {', '.join(columns)}
+        FROM {trades_table} t
+        JOIN {markets_table} m ON t.{market_id_col} = m.id
+        WHERE t.{address_id_col} IN ({self._in_placeholders(address_ids)})
+        {self._horizon_sql(f't.{timestamp_col}')}
+        GROUP BY t.{address_id_col}
+        """
+        
+        for row in self.execute(sql, tuple(address_ids) + self._horizon_params()):
+            for days in late_days_list:
+                timing[row['address_id']]['late'][days] = int(row[f'late_{int(days)}'] or 0)
+            for hours in early_hours_list:
+                timing[row['address_id']]['early'][hours] = int(row[f'early_{int(hours)}'] or 0)
+        return timing
+    
+    def extract_features(self, address_ids: List[int], spec: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+        """
+        批量提取一組地址的第一階段特徵
+        
+        以少量 GROUP BY address_id 查詢取代逐地址查詢。
+        
+        Args:
+            address_ids: 地址 ID 列表（建議每批數千個）
+            spec: 特徵規格：
+                {
+                    'keyword_groups': {組名: {'keywords': [...], 'parent_category': str}},
+                    'keyword_bits': {組名: 位},  # 可選，有則通過市場關鍵詞索引統計
+                    'recent_days': [int, ...],
+                    'late_entry_days': [int, ...],
+                    'early_entry_hours': [int, ...]
+                }
+                
+        Returns:
+            地址 ID -> 特徵字典，每個特徵字典包含：
+            {
+                'category_trades': {類別: 次數},
+                'keyword_trades': {組名: 次數},
+                'recent_trades_count': {天數: 次數},
+                'monthly_pnl': [...],
+                'price_distribution': [...],
+                'late_entry_trades': {天數: 次數},
+                'early_entry_trades': {小時數: 次數}
+            }
+        """
+        if not address_ids:
+            return {}
+        
+        category_trades = self.get_category_histogram(address_ids)
+        if spec.get('keyword_bits'):
+            keyword_trades = self.get_keyword_mask_trades(address_ids, spec['keyword_bits'])
+        else:
+            keyword_trades = self.get_keyword_trades_bulk(address_ids, spec.get('keyword_groups', {}))
+        recent_trades = self.get_recent_trades_count_bulk(address_ids, spec.get('recent_days', []))
+        monthly_pnl = self.get_monthly_pnl_bulk(address_ids)
+        price_distribution = self.get_price_distribution_bulk(address_ids)
+        entry_timing = self.get_entry_timing_bulk(
+            address_ids,
+            spec.get('late_entry_days', []),
+            spec.get('early_entry_hours', [])
+        )
+        
+        return {
+            address_id: {
+                'category_trades': category_trades[address_id],
+                'keyword_trades': keyword_trades[address_id],
+                'recent_trades_count': recent_trades[address_id],
+                'monthly_pnl': monthly_pnl[address_id],
+                'price_distribution': price_distribution[address_id],
+                'late_entry_trades': entry_timing[address_id]['late'],
+                'early_entry_trades': entry_timing[address_id]['early']
+            }
+            for address_id in address_ids
+        }
+    
+    # ==================== 表結構和索引 ====================
+    
+    def create_tags_table(self):
+        """創建標籤表（已存在時不做任何事）"""
+        table = self.get_table_name('address_tags')
+        sql = f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id BIGINT PRIMARY KEY AUTO_INCREMENT,
+            address_id BIGINT NOT NULL,
+            category VARCHAR(50) NOT NULL COMMENT '標籤類別：交易風格、專長類別等',
+            tag_name VARCHAR(50) NOT NULL COMMENT '標籤名稱',
+            confidence_score DECIMAL(3,2) DEFAULT 1.00 COMMENT '信心分數 0-1',
+            is_manual BOOLEAN DEFAULT FALSE COMMENT '是否手動標記',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            UNIQUE KEY uk_address_tag (address_id, tag_name)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='地址標籤表'
+        """
+        self.execute(sql)
+    
+    def get_indexes(self, table_key: str) -> Dict[str, List[str]]:
+        """
+        獲取表上現有的索引
+        
+        Args:
+            table_key: 表鍵
+            
+        Returns:
+            索引名稱 -> 欄位列表（按索引中的順序）
+        """
+        sql = """
+        SELECT INDEX_NAME as index_name, COLUMN_NAME as column_name
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+        """
+        
+        indexes = {}
+        for row in self.execute(sql, (self.get_table_name(table_key),), primary=True):
+            indexes.setdefault(row['index_name'], []).append(row['column_name'])
+        return indexes
+    
+    def create_index(self, table_key: str, name: str, columns: List[str]):
+        """
+        創建索引
+        
+        Args:
+            table_key: 表鍵
+            name: 索引名稱
+            columns: 欄位列表（實際欄位名）
+        """
+        table = self.get_table_name(table_key)
+        self.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+    
+    def explain(self, sql: str, params: tuple = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        查看語句的執行計劃（在主庫執行）
+        
+        Returns:
+            EXPLAIN 結果，語句不支持 EXPLAIN 或執行失敗時返回 None
+        """
+        with self._checkout() as connection:
+            return self._explain(connection, sql, params)
+    
+    def get_full_scans(self, plan: List[Dict[str, Any]]) -> List[str]:
+        """
+        從執行計劃中找出全表掃描或全索引掃描的表
+        
+        Args:
+            plan: EXPLAIN 結果
+            
+        Returns:
+            被全量掃描的表（查詢中的別名）
+        """
+        return [row['table'] for row in plan if row.get('type') in ('ALL', 'index')]
+    
+    def get_partitions(self, plan: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """
+        從執行計劃中找出訪問的分區
+        
+        Args:
+            plan: EXPLAIN 結果
+            
+        Returns:
+            {表（查詢中的別名）: [分區]}，未分區的表不出現
+        """
+        partitions = {}
+        for row in plan:
+            if row.get('partitions'):
+                partitions.setdefault(row['table'], []).extend(row['partitions'].split(','))
+        return partitions
+    
+    # ==================== 每日彙總 ====================
+    
+    # 價格分桶數（每桶寬 0.1，price_b0 為 [0, 0.1)，price_b9 為 [0.9, 1]）
+    PRICE_BUCKETS = 10
+    
+    def _daily_stats_columns(self) -> List[str]:
+        """每日彙總表的累加欄位"""
+        return (['trade_count', 'volume', 'pnl', 'buy_count', 'sell_count'] +
+                [f'price_b{i}' for i in range(self.PRICE_BUCKETS)])
+    
+    def create_daily_stats_table(self):
+        """創建地址每日交易彙總表（已存在時不做任何事）"""
+        table = self.get_table_name('address_daily_stats')
+        buckets = ',\n            '.join(
+            f"price_b{i} INT NOT NULL DEFAULT 0" for i in range(self.PRICE_BUCKETS)
         )
+        sql = f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            address_id BIGINT NOT NULL,
+            day DATE NOT NULL,
+            trade_count INT NOT NULL DEFAULT 0,
+            volume DECIMAL(20,6) NOT NULL DEFAULT 0,
+            pnl DECIMAL(20,6) NOT NULL DEFAULT 0,
+            buy_count INT NOT NULL DEFAULT 0,
+            sell_count INT NOT NULL DEFAULT 0,
+            {buckets},
+            PRIMARY KEY (address_id, day),
+            KEY idx_day_address (day, address_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='地址每日交易彙總'
+        """
+        self.execute(sql)
     
-    def execute(self, sql: str, params: tuple = None) -> Any:
+    def refresh_daily_stats(self, upto_trade_id: Optional[int] = None, batch_size: int = 100000) -> int:
         """
-        執行 SQL 語句
+        把新交易累加到每日彙總表
+        
+        按交易 ID 分段處理 (上次處理到的 ID, upto_trade_id]，每段的 INSERT ... SELECT ... GROUP BY
+        與處理進度（tagging_state 中的 address_daily_stats.last_trade_id）在同一事務內提交，
+        中斷後重新執行不會重複累加。進度行在事務內加鎖讀取，多個進程（如各分片）
+        同時刷新時依次執行，後到的進程只處理剩餘的範圍。
         
         Args:
-            sql: SQL 語句
-            params: 參數
+            upto_trade_id: 處理到的交易 ID（包含），None 表示主庫當前最大交易 ID
+            batch_size: 每段的交易 ID 數
             
         Returns:
-            執行結果
+            彙總表已處理到的交易 ID
         """
-        cursor = self.connection.cursor(dictionary=True)
-        try:
-            cursor.execute(sql, params)
-            if sql.strip().upper().startswith('SELECT'):
-                return cursor.fetchall()
-            else:
-                return cursor.rowcount
-        finally:
-            cursor.close()
+        self.create_daily_stats_table()
+        self.create_state_table()
+        
+        state_table = self.get_table_name('tagging_state')
+        progress_key = 'address_daily_stats.last_trade_id'
+        self.execute(
+            f"INSERT INTO {state_table} (name, value) VALUES (%s, %s) {self._upsert_sql(['name'], [], ('value = value',))}",
+            (progress_key, '0')
+        )
+        if upto_trade_id is None:
+            result = self.execute_template('max_trade_id', primary=True)
+            upto_trade_id = int(result[0]['max_id'] or 0) if result else 0
+        
+        trades_table = self.get_table_name('address_trades')
+        table = self.get_table_name('address_daily_stats')
+        id_col = self.get_column_name('address_trades', 'id')
+        address_id_col = self.get_column_name('address_trades', 'address_id')
+        timestamp_col = self.get_column_name('address_trades', 'timestamp')
+        amount_col = self.get_column_name('address_trades', 'amount')
+        side_col = self.get_column_name('address_trades', 'side')
+        price_col = self.get_column_name('address_trades', 'price')
+        pnl_col = self.get_column_name('address_trades', 'pnl')
+        
+        bucket_width = 1 / self.PRICE_BUCKETS
+        buckets = [
+            f"SUM(CASE WHEN {price_col} >= {i * bucket_width:.2f} THEN 1 ELSE 0 END)" if i == self.PRICE_BUCKETS - 1 else
+            f"SUM(CASE WHEN {price_col} >= {i * bucket_width:.2f} AND {price_col} < {(i + 1) * bucket_width:.2f} THEN 1 ELSE 0 END)"
+            for i in range(self.PRICE_BUCKETS)
+        ]
+        columns = self._daily_stats_columns()
+        sql = f"""
+        INSERT INTO {table} (address_id, day, {', '.join(columns)})
+        SELECT
+            {address_id_col},
+            DATE({timestamp_col}),
+            COUNT(*),
+            COALESCE(SUM({amount_col}), 0),
+            COALESCE(SUM({pnl_col}), 0),
+            SUM(CASE WHEN LOWER({side_col}) = 'buy' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN LOWER({side_col}) = 'sell' THEN 1 ELSE 0 END),
+            {', '.join(buckets)}
+        FROM {trades_table}
+        WHERE {id_col} > %s AND {id_col} <= %s
+        GROUP BY {address_id_col}, DATE({timestamp_col})
+        {self._upsert_sql(['address_id', 'day'], [],
+                          tuple(f"{column} = {column} + {self._inserted_sql(column)}" for column in columns))}
+        """
+        
+        progress_sql = f"SELECT value FROM {state_table} WHERE name = %s{self._for_update_sql()}"
+        refreshed = False
+        while True:
+            with self.transaction():
+                last_trade_id = int(self.execute(progress_sql, (progress_key,))[0]['value'])
+                if last_trade_id >= upto_trade_id:
+                    break
+                end_id = min(last_trade_id + batch_size, upto_trade_id)
+                self.execute(sql, (last_trade_id, end_id))
+                self.set_state(progress_key, end_id)
+            refreshed = True
+        
+        if refreshed:
+            self.invalidate_cache('address_daily_stats')
+        return last_trade_id
     
-    def get_table_name(self, table_key: str) -> str:
-        """獲取實際的表名"""
-        return self.tables.get(table_key, table_key)
+    # ==================== 標籤統計 ====================
     
-    def get_column_name(self, table_key: str, column_key: str) -> str:
-        """獲取實際的欄位名"""
-        return self.columns.get(table_key, {}).get(column_key, column_key)
+    # 信心分數分桶數（每桶寬 0.1，最後一桶包含 1.0）
+    CONFIDENCE_BUCKETS = 10
     
-    def get_address_data(self, address_id: int) -> Optional[Dict[str, Any]]:
+    def create_tag_stats_table(self):
+        """創建標籤統計表（已存在時不做任何事）"""
+        table = self.get_table_name('tag_stats')
+        sql = f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            stat VARCHAR(20) NOT NULL COMMENT 'addresses、tags、category、tag、confidence',
+            category VARCHAR(50) NOT NULL DEFAULT '',
+            tag_name VARCHAR(50) NOT NULL DEFAULT '',
+            bucket TINYINT NOT NULL DEFAULT 0 COMMENT '信心分數區間（僅 confidence）',
+            total BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (stat, category, tag_name, bucket)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='標籤統計'
         """
-        獲取地址數據
+        self.execute(sql)
+    
+    def _confidence_bucket(self, score: Any) -> int:
+        """信心分數所在的區間（按兩位小數計算，與 DECIMAL(3,2) 一致）"""
+        width = 100 // self.CONFIDENCE_BUCKETS
+        return min(max(int(round(float(score) * 100)) // width, 0), self.CONFIDENCE_BUCKETS - 1)
+    
+    def _add_tag_counts(self, counts: Dict[Tuple[str, str, str, int], int],
+                        category: str, tag_name: str, score: Any, count: int = 1):
+        """把 count 個標籤累加到各統計行"""
+        for key in (('tags', '', '', 0),
+                    ('category', category, '', 0),
+                    ('tag', category, tag_name, 0),
+                    ('confidence', category, tag_name, self._confidence_bucket(score))):
+            counts[key] = counts.get(key, 0) + count
+    
+    def _tag_stats_counts(self, existing: Dict[int, Dict[str, Dict[str, Any]]]) -> Dict[Tuple[str, str, str, int], int]:
+        """
+        計算一組地址的標籤對統計行的貢獻
         
         Args:
-            address_id: 地址 ID
+            existing: 地址 ID -> 標籤（見 get_existing_tags）
             
         Returns:
-            地址數據字典
+            (stat, category, tag_name, bucket) -> 數量
         """
-        table = self.get_table_name('addresses')
-        sql = f"SELECT * FROM {table} WHERE id = %s"
-        
-        result = self.execute(sql, (address_id,))
-        return result[0] if result else None
+        counts = {}
+        for tags in existing.values():
+            if tags:
+                counts[('addresses', '', '', 0)] = counts.get(('addresses', '', '', 0), 0) + 1
+            for tag_name, tag in tags.items():
+                self._add_tag_counts(counts, tag['category'], tag_name, tag['confidence_score'])
+        return counts
     
-    def get_all_address_ids(self, limit: Optional[int] = None) -> List[int]:
+    def _scan_tag_stats(self) -> Dict[Tuple[str, str, str, int], int]:
         """
-        獲取所有地址 ID
+        掃描標籤表計算全部統計行
         
-        Args:
-            limit: 限制數量
-            
         Returns:
-            地址 ID 列表
+            (stat, category, tag_name, bucket) -> 數量
+        """
+        table = self.get_table_name('address_tags')
+        sql = f"""
+        SELECT category, tag_name, ROUND(confidence_score, 2) as score, COUNT(*) as count
+        FROM {table}
+        GROUP BY category, tag_name, ROUND(confidence_score, 2)
         """
-        table = self.get_table_name('addresses')
-        sql = f"SELECT id FROM {table}"
-        
-        if limit:
-            sql += f" LIMIT {limit}"
         
-        result = self.execute(sql)
-        return [row['id'] for row in result]
+        counts = {}
+        for row in self.execute(sql):
+            self._add_tag_counts(counts, row['category'], row['tag_name'], row['score'] or 0, row['count'])
+        counts[('addresses', '', '', 0)] = self.get_tagged_addresses_count()
+        return counts
     
-    def get_recently_active_addresses(self, days: int = 7) -> List[int]:
+    def read_tag_stats(self) -> Dict[Tuple[str, str, str, int], int]:
         """
-        獲取最近活躍的地址 ID
+        讀取標籤統計表
         
-        Args:
-            days: 天數
-            
         Returns:
-            地址 ID 列表
+            (stat, category, tag_name, bucket) -> 數量（不含計數為 0 的行）
         """
-        trades_table = self.get_table_name('address_trades')
-        timestamp_col = self.get_column_name('address_trades', 'timestamp')
-        address_id_col = self.get_column_name('address_trades', 'address_id')
+        table = self.get_table_name('tag_stats')
+        sql = f"SELECT stat, category, tag_name, bucket, total FROM {table} WHERE total > 0"
+        
+        return {
+            (row['stat'], row['category'], row['tag_name'], int(row['bucket'])): int(row['total'])
+            for row in self.execute(sql)
+        }
+    
+    def _add_tag_stats(self, counts: Dict[Tuple[str, str, str, int], int]):
+        """把計數變化累加到標籤統計表（按主鍵順序寫入，避免並發事務互相死鎖）"""
+        rows = sorted((key, total) for key, total in counts.items() if total)
+        if not rows:
+            return
         
+        table = self.get_table_name('tag_stats')
+        values = ', '.join(['(%s, %s, %s, %s, %s)'] * len(rows))
         sql = f"""
-        SELECT DISTINCT {address_id_col} as address_id
-        FROM {trades_table}
-        WHERE {timestamp_col} >= DATE_SUB(NOW(), INTERVAL {days} DAY)
+        INSERT INTO {table} (stat, category, tag_name, bucket, total)
+        VALUES {values}
+        {self._upsert_sql(['stat', 'category', 'tag_name', 'bucket'], [],
+                          (f"total = total + {self._inserted_sql('total')}",))}
         """
         
-        result = self.execute(sql)
-        return [row['address_id'] for row in result]
+        params = tuple(value for key, total in rows for value in key + (total,))
+        self.execute(sql, params)
     
-    def get_total_addresses(self) -> int:
-        """獲取總地址數"""
-        table = self.get_table_name('addresses')
-        sql = f"SELECT COUNT(*) as count FROM {table}"
+    def update_tag_stats(self, before: Dict[int, Dict[str, Dict[str, Any]]],
+                         after: Dict[int, Dict[str, Dict[str, Any]]]):
+        """
+        按地址寫入前後的標籤更新標籤統計表
         
-        result = self.execute(sql)
-        return result[0]['count'] if result else 0
+        應與標籤寫入在同一事務內調用（見 TagWriter.flush）。
+        
+        Args:
+            before: 寫入前的標籤（見 get_existing_tags）
+            after: 寫入後的標籤
+        """
+        delta = self._tag_stats_counts(after)
+        for key, total in self._tag_stats_counts(before).items():
+            delta[key] = delta.get(key, 0) - total
+        self._add_tag_stats(delta)
     
-    def get_tagged_addresses_count(self) -> int:
-        """獲取有標籤的地址數"""
-        sql = "SELECT COUNT(DISTINCT address_id) as count FROM address_tags"
+    def ensure_tag_stats(self) -> bool:
+        """
+        確保標籤統計表已建立
         
-        result = self.execute(sql)
-        return result[0]['count'] if result else 0
+        統計表尚未建立（tagging_state 中沒有 tag_stats.built）時，在一個事務內
+        掃描標籤表重建；建立狀態行在事務內加鎖讀取，多個進程同時調用時只重建一次。
+        
+        Returns:
+            本次是否重建
+        """
+        self.create_tag_stats_table()
+        self.create_state_table()
+        
+        state_table = self.get_table_name('tagging_state')
+        built_key = 'tag_stats.built'
+        self.execute(
+            f"INSERT INTO {state_table} (name, value) VALUES (%s, %s) {self._upsert_sql(['name'], [], ('value = value',))}",
+            (built_key, '0')
+        )
+        
+        with self.transaction():
+            built = self.execute(f"SELECT value FROM {state_table} WHERE name = %s{self._for_update_sql()}", (built_key,))
+            if built[0]['value'] == '1':
+                return False
+            self.execute(f"DELETE FROM {self.get_table_name('tag_stats')}")
+            self._add_tag_stats(self._scan_tag_stats())
+            self.set_state(built_key, 1)
+        return True
     
-    def get_total_tags_count(self) -> int:
-        """獲取總標籤數"""
-        sql = "SELECT COUNT(*) as count FROM address_tags"
+    # ==================== 運行狀態 ====================
+    
+    def create_state_table(self):
+        """創建運行狀態表（已存在時不做任何事）"""
+        table = self.get_table_name('tagging_state')
+        sql = f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            name VARCHAR(100) PRIMARY KEY,
+            value VARCHAR(255) NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='標籤服務運行狀態'
+        """
+        self.execute(sql)
+    
+    def get_state(self, name: str) -> Optional[str]:
+        """
+        讀取運行狀態
         
-        result = self.execute(sql)
-        return result[0]['count'] if result else 0
+        Args:
+            name: 狀態名稱
+            
+        Returns:
+            狀態值，不存在時返回 None
+        """
+        result = self.execute_template('state', (name,))
+        return result[0]['value'] if result else None
     
-    def get_tags_by_category(self, category: str) -> Dict[str, int]:
+    def set_state(self, name: str, value: Any) -> int:
         """
-        獲取指定類別的標籤統計
+        寫入運行狀態
         
         Args:
-            category: 標籤類別
+            name: 狀態名稱
+            value: 狀態值（以字符串保存）
             
         Returns:
-            標籤名稱 -> 數量的字典
+            影響的行數
         """
-        sql = """
-        SELECT tag_name, COUNT(*) as count
-        FROM address_tags
-        WHERE category = %s
-        GROUP BY tag_name
-        ORDER BY count DESC
+        table = self.get_table_name('tagging_state')
+        sql = f"""
+        INSERT INTO {table} (name, value)
+        VALUES (%s, %s)
+        {self._upsert_sql(['name'], ['value'])}
         """
         
-        result = self.execute(sql, (category,))
-        return {row['tag_name']: row['count'] for row in result}
+        result = self.execute(sql, (name, str(value)))
+        self.invalidate_cache('tagging_state')
+        return result
     
-    def get_all_tags(self) -> List[Dict[str, Any]]:
-        """獲取所有標籤"""
-        sql = """
-        SELECT 
-            address_id,
-            category,
-            tag_name,
-            confidence_score,
-            is_manual,
-            created_at,
-            updated_at
-        FROM address_tags
-        ORDER BY address_id, category, tag_name
+    # ==================== 市場關鍵詞索引 ====================
+    
+    def create_market_keyword_table(self):
+        """創建市場關鍵詞組位掩碼表（已存在時不做任何事）"""
+        table = self.get_table_name('market_keyword_tags')
+        sql = f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            market_id BIGINT PRIMARY KEY,
+            mask BIGINT UNSIGNED NOT NULL COMMENT '命中的關鍵詞組位掩碼'
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='市場關鍵詞分類'
         """
-        
-        return self.execute(sql)
+        self.execute(sql)
     
-    def get_category_trades(self, address_id: int, category: str) -> int:
+    def clear_market_keyword_masks(self) -> int:
+        """清空市場關鍵詞組位掩碼（關鍵詞配置改變時重建）"""
+        table = self.get_table_name('market_keyword_tags')
+        result = self.execute(f"DELETE FROM {table}")
+        self.invalidate_cache('market_keyword_tags')
+        return result
+    
+    def iter_market_pages(self, page_size: int = 5000,
+                          after_id: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
         """
-        獲取地址在指定類別的交易次數
+        按市場 ID 分頁讀取市場（鍵集分頁）
         
         Args:
-            address_id: 地址 ID
-            category: 市場類別
+            page_size: 每頁數量
+            after_id: 只讀取 ID 大於此值的市場
             
-        Returns:
-            交易次數
+        Yields:
+            市場列表，每個市場包含 id, title, category, end_date, created_at
         """
-        trades_table = self.get_table_name('address_trades')
         markets_table = self.get_table_name('markets')
-        address_id_col = self.get_column_name('address_trades', 'address_id')
-        market_id_col = self.get_column_name('address_trades', 'market_id')
+        title_col = self.get_column_name('markets', 'title')
         category_col = self.get_column_name('markets', 'category')
+        end_date_col = self.get_column_name('markets', 'end_date')
+        created_at_col = self.get_column_name('markets', 'created_at')
         
         sql = f"""
-        SELECT COUNT(*) as count
-        FROM {trades_table} t
-        JOIN {markets_table} m ON t.{market_id_col} = m.id
-        WHERE t.{address_id_col} = %s AND m.{category_col} = %s
+        SELECT id, {title_col} as title, {category_col} as category,
+               {end_date_col} as end_date, {created_at_col} as created_at
+        FROM {markets_table}
+        WHERE id > %s
+        ORDER BY id
+        LIMIT %s
         """
         
-        result = self.execute(sql, (address_id, category))
-        return result[0]['count'] if result else 0
+        last_id = after_id if after_id is not None else -1
+        while True:
+            page = self.execute(sql, (last_id, page_size))
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            last_id = page[-1]['id']
     
-    def get_keyword_trades(self, address_id: int, keywords: List[str], parent_category: Optional[str] = None) -> int:
+    def upsert_market_keyword_masks(self, rows: List[Tuple[int, int]]) -> int:
         """
-        獲取地址在包含關鍵詞的市場的交易次數
+        寫入市場關鍵詞組位掩碼
         
         Args:
-            address_id: 地址 ID
-            keywords: 關鍵詞列表
-            parent_category: 父類別（可選）
+            rows: (market_id, mask) 列表
             
         Returns:
-            交易次數
+            影響的行數
         """
-        trades_table = self.get_table_name('address_trades')
-        markets_table = self.get_table_name('markets')
-        address_id_col = self.get_column_name('address_trades', 'address_id')
-        market_id_col = self.get_column_name('address_trades', 'market_id')
-        title_col = self.get_column_name('markets', 'title')
-        category_col = self.get_column_name('markets', 'category')
-        
-        # 構建關鍵詞條件
-        keyword_conditions = ' OR '.join([f"m.{title_col} LIKE %s" for _ in keywords])
-        keyword_params = [f"%{kw}%" for kw in keywords]
+        if not rows:
+            return 0
         
+        table = self.get_table_name('market_keyword_tags')
+        values = ', '.join(['(%s, %s)'] * len(rows))
         sql = f"""
-        SELECT COUNT(*) as count
-        FROM {trades_table} t
-        JOIN {markets_table} m ON t.{market_id_col} = m.id
-        WHERE t.{address_id_col} = %s
-        AND ({keyword_conditions})
+        INSERT INTO {table} (market_id, mask)
+        VALUES {values}
+        {self._upsert_sql(['market_id'], ['mask'])}
         """
         
-        params = [address_id] + keyword_params
-        
-        if parent_category:
-            sql += f" AND m.{category_col} = %s"
-            params.append(parent_category)
-        
-        result = self.execute(sql, tuple(params))
-        return result[0]['count'] if result else 0
+        params = tuple(value for row in rows for value in row)
+        result = self.execute(sql, params)
+        self.invalidate_cache('market_keyword_tags')
+        return result
     
-    def get_recent_trades_count(self, address_id: int, days: int = 30) -> int:
+    def get_keyword_mask_trades(self, address_ids: List[int],
+                                group_bits: Dict[str, int]) -> Dict[int, Dict[str, int]]:
         """
-        獲取地址最近的交易次數
+        通過市場關鍵詞組位掩碼批量統計地址在各關鍵詞組市場的交易次數
+        
+        只需整數 JOIN 和位運算，不再對市場標題做 LIKE 匹配。
         
         Args:
-            address_id: 地址 ID
-            days: 天數
+            address_ids: 地址 ID 列表
+            group_bits: 組名 -> 位（見 KeywordIndex.bits）
             
         Returns:
-            交易次數
+            地址 ID -> {組名: 交易次數} 的字典
         """
+        group_names = list(group_bits)
+        counts = {address_id: {name: 0 for name in group_names} for address_id in address_ids}
+        if not group_names or not address_ids:
+            return counts
+        
         trades_table = self.get_table_name('address_trades')
+        masks_table = self.get_table_name('market_keyword_tags')
         address_id_col = self.get_column_name('address_trades', 'address_id')
-        timestamp_col = self.get_column_name('address_trades', 'timestamp')
+        market_id_col = self.get_column_name('address_trades', 'market_id')
         
+        columns = ', '.join(
+            f"SUM(CASE WHEN k.mask & {int(group_bits[name])} THEN 1 ELSE 0 END) as kw_{i}"
+            for i, name in enumerate(group_names)
+        )
         sql = f"""
-        SELECT COUNT(*) as count
-        FROM {trades_table}
-        WHERE {address_id_col} = %s
-        AND {timestamp_col} >= DATE_SUB(NOW(), INTERVAL {days} DAY)
+        SELECT t.{address_id_col} as address_id, {columns}
+        FROM {trades_table} t
+        JOIN {masks_table} k ON t.{market_id_col} = k.market_id
+        WHERE t.{address_id_col} IN ({self._in_placeholders(address_ids)})
+        GROUP BY t.{address_id_col}
         """
         
-        result = self.execute(sql, (address_id,))
-        return result[0]['count'] if result else 0
+        for row in self.execute(sql, tuple(address_ids)):
+            for i, name in enumerate(group_names):
+                counts[row['address_id']][name] = int(row[f'kw_{i}'] or 0)
+        return counts
     
-    def get_monthly_pnl(self, address_id: int) -> List[Dict[str, Any]]:
+    # ==================== 標籤寫入 ====================
+    
+    def upsert_tags(self, rows: List[Tuple[int, str, str, float]]) -> int:
         """
-        獲取地址的月度盈虧
+        多行寫入標籤（已存在的自動標籤更新類別和信心分數，手動標籤保持不變）
         
         Args:
-            address_id: 地址 ID
+            rows: (address_id, category, tag_name, confidence_score) 列表
             
         Returns:
-            月度盈虧列表
+            影響的行數
         """
-        trades_table = self.get_table_name('address_trades')
-        address_id_col = self.get_column_name('address_trades', 'address_id')
-        timestamp_col = self.get_column_name('address_trades', 'timestamp')
-        pnl_col = self.get_column_name('address_trades', 'pnl')
+        if not rows:
+            return 0
         
+        table = self.get_table_name('address_tags')
+        values = ', '.join(['(%s, %s, %s, %s, FALSE)'] * len(rows))
+        
+        # 與手動標籤同名時保留手動標籤（與 --update 的差異寫入和 delete_tag_rows 一致）
+        assignments = tuple(
+            f"{column} = CASE WHEN is_manual THEN {column} ELSE {value} END"
+            for column, value in (
+                ('category', self._inserted_sql('category')),
+                ('confidence_score', self._inserted_sql('confidence_score')),
+                ('updated_at', self._now_sql())
+            )
+        )
         sql = f"""
-        SELECT 
-            DATE_FORMAT({timestamp_col}, '%Y-%m') as month,
-            SUM({pnl_col}) as monthly_pnl
-        FROM {trades_table}
-        WHERE {address_id_col} = %s
-        GROUP BY month
-        ORDER BY month
+        INSERT INTO {table}
+        (address_id, category, tag_name, confidence_score, is_manual)
+        VALUES {values}
+        {self._upsert_sql(['address_id', 'tag_name'], [], assignments)}
         """
         
-        return self.execute(sql, (address_id,))
+        params = tuple(value for row in rows for value in row)
+        result = self.execute(sql, params)
+        self.invalidate_cache('address_tags')
+        return result
     
-    def get_price_distribution(self, address_id: int) -> List[Dict[str, Any]]:
+    def get_existing_tags(self, address_ids: List[int],
+                          for_update: bool = False) -> Dict[int, Dict[str, Dict[str, Any]]]:
         """
-        獲取地址的價格分布
+        批量獲取地址現有的標籤
         
         Args:
-            address_id: 地址 ID
+            address_ids: 地址 ID 列表
+            for_update: 是否鎖定讀取的行（在事務內使用）
             
         Returns:
-            價格分布列表
+            地址 ID -> {標籤名稱: {'category', 'confidence_score', 'is_manual'}}，
+            沒有標籤的地址對應空字典
         """
-        trades_table = self.get_table_name('address_trades')
-        address_id_col = self.get_column_name('address_trades', 'address_id')
-        price_col = self.get_column_name('address_trades', 'price')
+        existing = {address_id: {} for address_id in address_ids}
+        if not address_ids:
+            return existing
         
+        table = self.get_table_name('address_tags')
         sql = f"""
-        SELECT {price_col} as price
-        FROM {trades_table}
-        WHERE {address_id_col} = %s
+        SELECT address_id, category, tag_name, confidence_score, is_manual
+        FROM {table}
+        WHERE address_id IN ({self._in_placeholders(address_ids)})
+        {self._for_update_sql() if for_update else ''}
         """
         
-        return self.execute(sql, (address_id,))
+        for row in self.execute(sql, tuple(address_ids)):
+            existing[row['address_id']][row['tag_name']] = {
+                'category': row['category'],
+                'confidence_score': float(row['confidence_score']),
+                'is_manual': bool(row['is_manual'])
+            }
+        return existing
     
-    def get_late_entry_trades(self, address_id: int, days_before_close: int = 3) -> int:
+    def delete_tag_rows(self, rows: List[Tuple[int, str]]) -> int:
         """
-        獲取地址在市場結算前 N 天內的交易次數
+        刪除指定的自動標籤（保留手動標籤）
         
         Args:
-            address_id: 地址 ID
-            days_before_close: 結算前天數
+            rows: (address_id, tag_name) 列表
             
         Returns:
-            交易次數
+            刪除的行數
         """
-        trades_table = self.get_table_name('address_trades')
-        markets_table = self.get_table_name('markets')
-        address_id_col = self.get_column_name('address_trades', 'address_id')
-        market_id_col = self.get_column_name('address_trades', 'market_id')
-        timestamp_col = self.get_column_name('address_trades', 'timestamp')
-        end_date_col = self.get_column_name('markets', 'end_date')
+        if not rows:
+            return 0
         
+        table = self.get_table_name('address_tags')
+        pairs = ', '.join(['(%s, %s)'] * len(rows))
         sql = f"""
-        SELECT COUNT(*) as count
-        FROM {trades_table} t
-        JOIN {markets_table} m ON t.{market_id_col} = m.id
-        WHERE t.{address_id_col} = %s
-        AND m.{end_date_col} IS NOT NULL
-        AND TIMESTAMPDIFF(DAY, t.{timestamp_col}, m.{end_date_col}) <= {days_before_close}
+        DELETE FROM {table}
+        WHERE (address_id, tag_name) IN {self._row_list_sql(pairs)}
+        AND is_manual = FALSE
         """
         
-        result = self.execute(sql, (address_id,))
-        return result[0]['count'] if result else 0
+        params = tuple(value for row in rows for value in row)
+        result = self.execute(sql, params)
+        self.invalidate_cache('address_tags')
+        return result
     
-    def get_early_entry_trades(self, address_id: int, hours_after_creation: int = 48) -> int:
+    def delete_tags(self, address_ids: List[int]) -> int:
         """
-        獲取地址在市場創建後 N 小時內的交易次數
+        刪除地址的自動標籤（保留手動標籤）
         
         Args:
-            address_id: 地址 ID
-            hours_after_creation: 創建後小時數
+            address_ids: 地址 ID 列表
             
         Returns:
-            交易次數
+            刪除的行數
         """
-        trades_table = self.get_table_name('address_trades')
-        markets_table = self.get_table_name('markets')
-        address_id_col = self.get_column_name('address_trades', 'address_id')
-        market_id_col = self.get_column_name('address_trades', 'market_id')
-        timestamp_col = self.get_column_name('address_trades', 'timestamp')
-        created_at_col = self.get_column_name('markets', 'created_at')
+        if not address_ids:
+            return 0
         
+        table = self.get_table_name('address_tags')
         sql = f"""
-        SELECT COUNT(*) as count
-        FROM {trades_table} t
-        JOIN {markets_table} m ON t.{market_id_col} = m.id
-        WHERE t.{address_id_col} = %s
-        AND m.{created_at_col} IS NOT NULL
-        AND TIMESTAMPDIFF(HOUR, m.{created_at_col}, t.{timestamp_col}) <= {hours_after_creation}
+        DELETE FROM {table}
+        WHERE address_id IN ({self._in_placeholders(address_ids)})
+        AND is_manual = FALSE
         """
         
-        result = self.execute(sql, (address_id,))
-        return result[0]['count'] if result else 0
+        result = self.execute(sql, tuple(address_ids))
+        self.invalidate_cache('address_tags')
+        return result
     
     def close(self):
-        """關閉數據庫連接"""
-        if self.connection:
-            self.connection.close()
+        """關閉數據庫連接（主庫和所有只讀副本）"""
+        for endpoint in [self.primary] + self.replicas:
+            endpoint.close()
+
+
+def create_database_adapter(config: Dict[str, Any]) -> DatabaseAdapter:
+    """
+    按 database.url 的協議建立數據庫適配器
+    
+    sqlite:///路徑 使用嵌入式 SQLite（見 SQLiteDatabaseAdapter），其他使用 MySQL。
+    
+    Args:
+        config: 完整配置
+        
+    Returns:
+        數據庫適配器
+    """
+    if urlparse(config['database']['url']).scheme == 'sqlite':
+        from .sqlite_database import SQLiteDatabaseAdapter
+        return SQLiteDatabaseAdapter(config)
+    return DatabaseAdapter(config)
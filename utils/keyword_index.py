@@ -0,0 +1,118 @@
+"""
+市場關鍵詞索引模組
+
+用 Aho-Corasick 自動機一次掃描市場標題，同時匹配所有關鍵詞組，
+生成市場 -> 關鍵詞組位掩碼，取代逐地址的 LIKE '%kw%' 查詢
+"""
+
+import json
+import hashlib
+from collections import deque
+from typing import List, Dict, Any, Optional
+
+
+class KeywordIndex:
+    """
+    關鍵詞組多模式匹配器
+    
+    每個關鍵詞組對應位掩碼中的一位（按組的順序）。匹配不區分大小寫，
+    與 MySQL 默認排序規則下 LIKE 的行為一致。
+    """
+    
+    # 位掩碼保存在 BIGINT 欄位中
+    MAX_GROUPS = 63
+    
+    def __init__(self, keyword_groups: Dict[str, Dict[str, Any]]):
+        """
+        初始化並建立自動機
+        
+        Args:
+            keyword_groups: 組名 -> {'keywords': [...], 'parent_category': str 或 None}
+        """
+        if len(keyword_groups) > self.MAX_GROUPS:
+            raise ValueError(f"關鍵詞組最多 {self.MAX_GROUPS} 個，實際 {len(keyword_groups)} 個")
+        
+        self.keyword_groups = keyword_groups
+        self.groups = list(keyword_groups)
+        self.bits = {name: 1 << i for i, name in enumerate(self.groups)}
+        
+        # 自動機：轉移表、失敗指針、每個狀態命中的組掩碼
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[int] = [0]
+        self._build()
+    
+    def _build(self):
+        """建立 Aho-Corasick 自動機"""
+        # 把所有關鍵詞插入字典樹
+        for name in self.groups:
+            for keyword in self.keyword_groups[name].get('keywords', []):
+                state = 0
+                for char in keyword.lower():
+                    if char not in self._goto[state]:
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._output.append(0)
+                        self._goto[state][char] = len(self._goto) - 1
+                    state = self._goto[state][char]
+                self._output[state] |= self.bits[name]
+        
+        # 廣度優先計算失敗指針，並把失敗鏈上的輸出合併到當前狀態
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+    
+    def match(self, text: Optional[str]) -> int:
+        """
+        匹配文本中出現的關鍵詞組
+        
+        Args:
+            text: 文本（如市場標題）
+            
+        Returns:
+            命中的組位掩碼
+        """
+        mask = 0
+        state = 0
+        for char in (text or '').lower():
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            mask |= self._output[state]
+        return mask
+    
+    def classify(self, title: Optional[str], category: Optional[str]) -> int:
+        """
+        為市場分類：標題命中關鍵詞且類別符合組的父類別
+        
+        Args:
+            title: 市場標題
+            category: 市場類別
+            
+        Returns:
+            關鍵詞組位掩碼
+        """
+        mask = self.match(title)
+        for name in self.groups:
+            parent_category = self.keyword_groups[name].get('parent_category')
+            if (mask & self.bits[name] and parent_category and
+                (category or '').lower() != parent_category.lower()):
+                mask &= ~self.bits[name]
+        return mask
+    
+    @property
+    def signature(self) -> str:
+        """關鍵詞配置簽名（配置改變時需要重建掩碼表）"""
+        payload = json.dumps(
+            [[name, self.keyword_groups[name].get('keywords', []),
+              self.keyword_groups[name].get('parent_category')] for name in self.groups],
+            ensure_ascii=False
+        )
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
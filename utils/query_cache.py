@@ -0,0 +1,145 @@
+"""
+查詢結果快取模組
+
+有容量上限的 LRU 快取，支持按條目設置 TTL 和按標記批量失效
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, Iterable, Hashable
+
+
+class QueryCache:
+    """
+    LRU + TTL 結果快取（線程安全）
+    
+    每個條目可以帶若干標記（如查詢讀取的表名），寫入某張表後
+    調用 invalidate(表名) 即可使所有依賴它的條目失效。
+    快取的結果由多個調用方共享，取出後應視為只讀。
+    """
+    
+    def __init__(self, max_entries: int = 10000, default_ttl: float = 60.0):
+        """
+        初始化快取
+        
+        Args:
+            max_entries: 最大條目數（超出時淘汰最久未使用的條目）
+            default_ttl: 默認存活時間（秒），0 表示不快取
+        """
+        self.max_entries = max(1, max_entries)
+        self.default_ttl = default_ttl
+        
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, Tuple[str, ...]]]" = OrderedDict()
+        self._tagged: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        
+        # 統計信息
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        讀取快取
+        
+        Args:
+            key: 快取鍵
+            
+        Returns:
+            (是否命中, 快取值)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return False, None
+    
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()):
+        """
+        寫入快取
+        
+        Args:
+            key: 快取鍵
+            value: 快取值
+            ttl: 存活時間（秒），None 使用默認值，0 表示不快取
+            tags: 失效標記
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, tags)
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def invalidate(self, tag: Optional[str] = None) -> int:
+        """
+        使快取失效
+        
+        Args:
+            tag: 失效標記（不指定時清空整個快取）
+            
+        Returns:
+            失效的條目數
+        """
+        with self._lock:
+            if tag is None:
+                keys = list(self._entries)
+            else:
+                keys = list(self._tagged.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+    
+    def _remove(self, key: Hashable):
+        """刪除條目及其標記索引（調用方需持有鎖）"""
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        獲取快取統計
+        
+        Returns:
+            {
+                'entries': int,  # 當前條目數
+                'hits': int,  # 命中次數
+                'misses': int,  # 未命中次數
+                'evictions': int,  # 因容量淘汰的條目數
+                'expirations': int,  # 因過期刪除的條目數
+                'invalidations': int  # 因寫入失效的條目數
+            }
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
@@ -0,0 +1,199 @@
+"""
+查詢統計模組
+
+按查詢模板記錄調用次數、耗時分位數和返回行數，並保存慢查詢的執行計劃
+"""
+
+import re
+import json
+import random
+import threading
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str, max_length: int = 120) -> str:
+    """
+    把未命名的 SQL 歸一為統計鍵：合併空白，把 IN 列表和多行 VALUES 的佔位符折疊成一組
+    
+    Args:
+        sql: SQL 語句
+        max_length: 最大長度
+        
+    Returns:
+        歸一後的 SQL
+    """
+    text = ' '.join(sql.split())
+    text = re.sub(r'\(\s*%s(?:\s*,\s*%s)*\s*\)', '(?)', text)
+    text = re.sub(r'\(\?\)(?:\s*,\s*\(\?\))+', '(?), ...', text)
+    return text if len(text) <= max_length else text[:max_length - 3] + '...'
+
+
+class QueryStats:
+    """
+    按模板匯總的查詢統計（線程安全）
+    
+    每個模板保留最多 max_samples 個耗時樣本（超出後蓄水池抽樣）用於計算分位數。
+    超過 slow_query_ms 的調用記為慢查詢，每個模板保存最慢一次的 SQL、參數和 EXPLAIN 結果。
+    每個讀取模板還可以記錄一次執行計劃訪問的分區，用於確認時間範圍條件是否裁剪了分區。
+    """
+    
+    def __init__(self, slow_query_ms: float = 500.0, max_samples: int = 10000):
+        """
+        初始化統計
+        
+        Args:
+            slow_query_ms: 慢查詢閾值（毫秒）
+            max_samples: 每個模板保留的耗時樣本數
+        """
+        self.slow_query_ms = slow_query_ms
+        self.max_samples = max(1, max_samples)
+        
+        self._templates: Dict[str, Dict[str, Any]] = {}
+        self._slow_queries: Dict[str, Dict[str, Any]] = {}
+        self._partitions: Dict[str, Optional[Dict[str, List[str]]]] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(0)
+    
+    def record(self, key: str, seconds: float, rows: int) -> bool:
+        """
+        記錄一次查詢
+        
+        Args:
+            key: 模板名稱（或歸一後的 SQL）
+            seconds: 耗時（秒）
+            rows: 返回（或影響）的行數
+            
+        Returns:
+            是否為該模板目前最慢的慢查詢（調用方應通過 add_slow_query 保存執行計劃）
+        """
+        elapsed_ms = seconds * 1000
+        with self._lock:
+            entry = self._templates.get(key)
+            if entry is None:
+                entry = self._templates[key] = {
+                    'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'slow_calls': 0, 'samples': []
+                }
+            
+            entry['calls'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['rows'] += rows
+            
+            samples = entry['samples']
+            if len(samples) < self.max_samples:
+                samples.append(elapsed_ms)
+            else:
+                index = self._random.randrange(entry['calls'])
+                if index < self.max_samples:
+                    samples[index] = elapsed_ms
+            
+            if elapsed_ms < self.slow_query_ms:
+                return False
+            entry['slow_calls'] += 1
+            slowest = self._slow_queries.get(key)
+            return slowest is None or elapsed_ms > slowest['elapsed_ms']
+    
+    def add_slow_query(self, key: str, seconds: float, sql: str, params: Optional[tuple],
+                       plan: Optional[List[Dict[str, Any]]]):
+        """
+        保存慢查詢（每個模板只保留最慢的一次）
+        
+        Args:
+            key: 模板名稱（或歸一後的 SQL）
+            seconds: 耗時（秒）
+            sql: SQL 語句
+            params: 參數
+            plan: EXPLAIN 結果（未採集時為 None）
+        """
+        elapsed_ms = seconds * 1000
+        with self._lock:
+            slowest = self._slow_queries.get(key)
+            if slowest is None or elapsed_ms > slowest['elapsed_ms']:
+                self._slow_queries[key] = {
+                    'template': key,
+                    'elapsed_ms': elapsed_ms,
+                    'sql': ' '.join(sql.split()),
+                    'params': [str(param) for param in params] if params else [],
+                    'explain': plan
+                }
+    
+    def claim_partitions(self, key: str) -> bool:
+        """
+        領取記錄模板分區的機會（每個模板只有第一次調用返回 True）
+        
+        Args:
+            key: 模板名稱（或歸一後的 SQL）
+            
+        Returns:
+            調用方是否應該查看執行計劃並通過 set_partitions 保存分區
+        """
+        with self._lock:
+            if key in self._partitions:
+                return False
+            self._partitions[key] = None
+            return True
+    
+    def set_partitions(self, key: str, partitions: Dict[str, List[str]]):
+        """
+        保存模板訪問的分區
+        
+        Args:
+            key: 模板名稱（或歸一後的 SQL）
+            partitions: {表: [分區]}（未分區的表不出現）
+        """
+        with self._lock:
+            self._partitions[key] = partitions
+    
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        獲取統計匯總
+        
+        Returns:
+            {
+                'templates': {key: {'calls', 'total_ms', 'avg_ms', 'p50_ms', 'p95_ms', 'p99_ms',
+                                    'max_ms', 'rows', 'slow_calls'}},  # 按總耗時降序
+                'slow_queries': [{'template', 'elapsed_ms', 'sql', 'params', 'explain'}],  # 按耗時降序
+                'partitions': {key: {table: [partition]}}  # 只包含訪問了分區表的模板
+            }
+        """
+        with self._lock:
+            templates = {}
+            for key, entry in sorted(self._templates.items(), key=lambda item: -item[1]['total_ms']):
+                samples = sorted(entry['samples'])
+                templates[key] = {
+                    'calls': entry['calls'],
+                    'total_ms': entry['total_ms'],
+                    'avg_ms': entry['total_ms'] / entry['calls'],
+                    'p50_ms': self._percentile(samples, 50),
+                    'p95_ms': self._percentile(samples, 95),
+                    'p99_ms': self._percentile(samples, 99),
+                    'max_ms': entry['max_ms'],
+                    'rows': entry['rows'],
+                    'slow_calls': entry['slow_calls']
+                }
+            
+            slow_queries = sorted(self._slow_queries.values(), key=lambda query: -query['elapsed_ms'])
+            return {
+                'templates': templates,
+                'slow_queries': [dict(query) for query in slow_queries],
+                'partitions': {key: dict(value) for key, value in self._partitions.items() if value}
+            }
+    
+    def _percentile(self, samples: List[float], percent: float) -> float:
+        """最近秩分位數（samples 已排序）"""
+        if not samples:
+            return 0.0
+        rank = max(1, -(-len(samples) * percent // 100))
+        return samples[int(rank) - 1]
+    
+    def dump(self, path: str):
+        """
+        把統計匯總寫入 JSON 文件
+        
+        Args:
+            path: 文件路徑
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.get_summary(), f, ensure_ascii=False, indent=2, default=str)
@@ -0,0 +1,168 @@
+"""
+表結構模組
+
+創建服務使用的表和各查詢模板的推薦索引，並通過 EXPLAIN 檢查查詢是否全表掃描
+"""
+
+from typing import List, Dict, Any
+
+
+class SchemaManager:
+    """
+    表結構和索引管理
+    
+    推薦索引按查詢的訪問路徑設計：逐地址查詢以 address_id 開頭，
+    再加上排序、範圍或 JOIN 欄位，並盡量覆蓋查詢讀取的欄位。
+    已有索引以推薦欄位為前綴時視為已存在。
+    """
+    
+    # 表鍵 -> [(索引後綴, [欄位鍵], 使用該索引的查詢)]
+    RECOMMENDED_INDEXES = {
+        'address_trades': [
+            ('address_time_pnl', ['address_id', 'timestamp', 'pnl'],
+             ['address_trades', 'recent_trades_count', 'monthly_pnl']),
+            ('address_market_time', ['address_id', 'market_id', 'timestamp'],
+             ['category_trades', 'category_histogram', 'late_entry_trades', 'early_entry_trades',
+              'get_keyword_mask_trades']),
+            ('address_price', ['address_id', 'price'], ['price_distribution']),
+            ('time_address', ['timestamp', 'address_id'], ['get_recently_active_addresses'])
+        ],
+        'address_tags': [
+            ('address_category_tag', ['address_id', 'category', 'tag_name'], ['get_existing_tags', 'get_all_tags']),
+            ('category_tag', ['category', 'tag_name'], ['get_tags_by_category']),
+            ('tag', ['tag_name'], ['get_tag_distribution'])
+        ]
+    }
+    
+    # EXPLAIN 查詢模板時使用的示例參數
+    SAMPLE_PARAMS = {
+        'address': (1,),
+        'address_trades': (1,),
+        'max_trade_id': None,
+        'category_trades': (1, 'Politics'),
+        'category_histogram': (1,),
+        'recent_trades_count': (1, 30),
+        'monthly_pnl': (1,),
+        'price_distribution': (1,),
+        'late_entry_trades': (1, 3),
+        'early_entry_trades': (1, 48),
+        'state': ('update_watermark',)
+    }
+    
+    def __init__(self, db, logger=None):
+        """
+        初始化
+        
+        Args:
+            db: 數據庫適配器
+            logger: 日誌記錄器（可選）
+        """
+        self.db = db
+        self.logger = logger
+    
+    def recommended_indexes(self) -> List[Dict[str, Any]]:
+        """
+        按表名和欄位名配置生成推薦索引
+        
+        Returns:
+            [{'table': 表鍵, 'name': 索引名稱, 'columns': [實際欄位名], 'used_by': [查詢]}]
+        """
+        indexes = []
+        for table_key, definitions in self.RECOMMENDED_INDEXES.items():
+            table = self.db.get_table_name(table_key)
+            for suffix, column_keys, used_by in definitions:
+                indexes.append({
+                    'table': table_key,
+                    'name': f"idx_{table}_{suffix}",
+                    'columns': [self.db.get_column_name(table_key, key) for key in column_keys],
+                    'used_by': used_by
+                })
+        return indexes
+    
+    def missing_indexes(self) -> List[Dict[str, Any]]:
+        """
+        找出尚未建立的推薦索引
+        
+        Returns:
+            推薦索引列表（格式同 recommended_indexes，另含 'ddl'）
+        """
+        existing = {}
+        missing = []
+        for index in self.recommended_indexes():
+            if index['table'] not in existing:
+                existing[index['table']] = list(self.db.get_indexes(index['table']).values())
+            
+            columns = [column.lower() for column in index['columns']]
+            covered = any(
+                [column.lower() for column in existing_columns[:len(columns)]] == columns
+                for existing_columns in existing[index['table']]
+            )
+            if not covered:
+                table = self.db.get_table_name(index['table'])
+                missing.append(dict(index, ddl=f"CREATE INDEX {index['name']} ON {table} ({', '.join(index['columns'])})"))
+        return missing
+    
+    def bootstrap(self) -> List[Dict[str, Any]]:
+        """
+        創建服務使用的表和缺少的推薦索引
+        
+        大表上創建索引可能需要較長時間，生產環境建議先用 check() 查看 DDL，在維護窗口執行。
+        
+        Returns:
+            新建的索引列表
+        """
+        self.db.create_tags_table()
+        self.db.create_state_table()
+        self.db.create_market_keyword_table()
+        if self.db.daily_rollup:
+            self.db.create_daily_stats_table()
+        if self.db.tag_stats:
+            self.db.create_tag_stats_table()
+        
+        created = []
+        for index in self.missing_indexes():
+            self._log('info', f"創建索引 {index['ddl']}")
+            self.db.create_index(index['table'], index['name'], index['columns'])
+            created.append(index)
+        return created
+    
+    def check(self) -> Dict[str, Any]:
+        """
+        檢查推薦索引和查詢模板的執行計劃
+        
+        Returns:
+            {
+                'missing_indexes': [...],  # 尚未建立的推薦索引（含 DDL）
+                'full_scans': [{'template', 'tables'}],  # 全表或全索引掃描的查詢模板
+                'unexplained': [str]  # 無法 EXPLAIN 的模板（如表不存在）
+            }
+        """
+        missing = self.missing_indexes()
+        for index in missing:
+            self._log('warning', f"缺少索引（{', '.join(index['used_by'])}）：{index['ddl']}")
+        
+        full_scans = []
+        unexplained = []
+        for name, sql in self.db.get_compiled_sql().items():
+            params = self.SAMPLE_PARAMS.get(name)
+            plan = self.db.explain(sql, self.db.template_params(name, params) if params else params)
+            if plan is None:
+                unexplained.append(name)
+                self._log('warning', f"無法查看模板 {name} 的執行計劃")
+                continue
+            
+            tables = self.db.get_full_scans(plan)
+            if tables:
+                full_scans.append({'template': name, 'tables': tables})
+                self._log('warning', f"模板 {name} 全量掃描：{', '.join(tables)}")
+        
+        return {
+            'missing_indexes': missing,
+            'full_scans': full_scans,
+            'unexplained': unexplained
+        }
+    
+    def _log(self, level: str, message: str):
+        """記錄日誌（未提供日誌記錄器時不記錄）"""
+        if self.logger:
+            getattr(self.logger, level)(message)
@@ -0,0 +1,640 @@
+"""
+交易快照模組
+
+把打標籤需要的地址、交易和市場數據導出為按欄位存放的定長數組文件，
+並以內存映射方式讀取，讓打標籤流程不連接數據庫即可重複運行（調整閾值、回填）
+"""
+
+import os
+import sys
+import json
+import mmap
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+
+# 快照格式版本（格式改變時遞增，舊快照需要重新導出）
+SNAPSHOT_VERSION = 1
+
+# 時間以距 1970-01-01 的秒數保存（不做時區轉換，與數據庫返回的時間一致）
+EPOCH = datetime(1970, 1, 1)
+
+# 整數和時間欄位的空值
+NULL_INT = -2 ** 63
+
+# 欄位類型 -> array 類型碼（text 欄位為 UTF-8 數據文件加 int64 偏移文件）
+TYPECODES = {'int64': 'q', 'float64': 'd', 'datetime': 'q', 'code': 'i'}
+
+# 交易欄位及類型（按地址、時間、交易 ID 排序）
+TRADE_COLUMNS = {
+    'id': 'int64',
+    'market_id': 'int64',
+    'timestamp': 'datetime',
+    'amount': 'float64',
+    'side': 'code',
+    'price': 'float64',
+    'pnl': 'float64'
+}
+
+
+def _column_kind(value: Any) -> str:
+    """按欄位值推斷地址表欄位的保存類型"""
+    if isinstance(value, int):
+        return 'int64'
+    if isinstance(value, (float, Decimal)):
+        return 'float64'
+    if isinstance(value, datetime):
+        return 'datetime'
+    return 'text'
+
+
+def _seconds(value: Optional[datetime]) -> int:
+    """時間 -> 距 EPOCH 的秒數（空值為 NULL_INT）"""
+    if value is None:
+        return NULL_INT
+    delta = value - EPOCH
+    return delta.days * 86400 + delta.seconds
+
+
+def _datetime(seconds: int) -> Optional[datetime]:
+    """距 EPOCH 的秒數 -> 時間（NULL_INT 為 None）"""
+    return None if seconds == NULL_INT else EPOCH + timedelta(seconds=seconds)
+
+
+def _units_between(start: int, end: int, unit: int) -> int:
+    """兩個時間（秒）之間的整數差，向零取整（與 MySQL TIMESTAMPDIFF 一致）"""
+    diff = end - start
+    return diff // unit if diff >= 0 else -(-diff // unit)
+
+
+class _ColumnWriter:
+    """按批次把一個欄位追加寫入數組文件"""
+    
+    def __init__(self, directory: str, name: str, kind: str):
+        """
+        初始化
+        
+        Args:
+            directory: 快照目錄
+            name: 文件名（不含擴展名，如 'trades.price'）
+            kind: 欄位類型（int64 / float64 / datetime / code / text）
+        """
+        self.name = name
+        self.kind = kind
+        self._file = open(os.path.join(directory, f"{name}.bin"), 'wb')
+        self._codes: Dict[Any, int] = {}
+        self._offsets = None
+        self._length = 0
+        if kind == 'text':
+            self._offsets = open(os.path.join(directory, f"{name}.idx"), 'wb')
+            array('q', [0]).tofile(self._offsets)
+    
+    def append(self, values: List[Any]):
+        """追加一批值"""
+        if self.kind == 'text':
+            offsets = array('q')
+            for value in values:
+                data = b'' if value is None else str(value).encode('utf-8')
+                self._file.write(data)
+                self._length += len(data)
+                offsets.append(self._length)
+            offsets.tofile(self._offsets)
+            return
+        
+        if self.kind == 'code':
+            values = [-1 if value is None else self._codes.setdefault(value, len(self._codes)) for value in values]
+        elif self.kind == 'float64':
+            values = [math.nan if value is None else float(value) for value in values]
+        elif self.kind == 'datetime':
+            values = [_seconds(value) for value in values]
+        else:
+            values = [NULL_INT if value is None else int(value) for value in values]
+        array(TYPECODES[self.kind], values).tofile(self._file)
+    
+    def close(self) -> Dict[str, Any]:
+        """
+        關閉文件
+        
+        Returns:
+            欄位描述（寫入 meta.json）
+        """
+        self._file.close()
+        if self._offsets:
+            self._offsets.close()
+        meta = {'kind': self.kind, 'file': self.name}
+        if self.kind == 'code':
+            meta['values'] = list(self._codes)
+        return meta
+
+
+class _InferredColumnWriter:
+    """
+    地址表欄位的寫入器，保存類型按第一個非空值確定
+    
+    之前的頁全部為空值時先只計數，確定類型後補寫；整個欄位都為空時保存為 int64（讀出為 None）。
+    """
+    
+    def __init__(self, directory: str, name: str):
+        """
+        初始化
+        
+        Args:
+            directory: 快照目錄
+            name: 文件名（不含擴展名）
+        """
+        self.directory = directory
+        self.name = name
+        self._writer: Optional[_ColumnWriter] = None
+        self._nulls = 0
+    
+    def append(self, values: List[Any]):
+        """追加一批值"""
+        if self._writer is None:
+            sample = next((value for value in values if value is not None), None)
+            if sample is None:
+                self._nulls += len(values)
+                return
+            self._writer = _ColumnWriter(self.directory, self.name, _column_kind(sample))
+            if self._nulls:
+                self._writer.append([None] * self._nulls)
+        self._writer.append(values)
+    
+    def close(self) -> Dict[str, Any]:
+        """關閉文件，返回欄位描述"""
+        if self._writer is None:
+            self._writer = _ColumnWriter(self.directory, self.name, 'int64')
+            self._writer.append([None] * self._nulls)
+        return self._writer.close()
+
+
+def export_snapshot(db, path: str, page_size: int = 2000, logger=None) -> Dict[str, int]:
+    """
+    從數據庫導出交易快照
+    
+    目錄內容：
+    - meta.json：格式版本、導出時間、字節序、各欄位的類型和文件
+    - addresses.<欄位>.bin：地址表各欄位（按地址 ID 升序）
+    - addresses.trade_offsets.bin：第 i 個地址的交易位於交易數組 [offsets[i], offsets[i+1])
+    - trades.<欄位>.bin：交易各欄位（按地址、時間、交易 ID 排序）
+    - markets.json：市場元數據（標題、類別、結算時間、創建時間）
+    
+    地址和交易按頁流式讀取和寫入，內存佔用與數據量無關。meta.json 最後寫入，
+    導出中斷時目錄不會被當作完整的快照。
+    
+    Args:
+        db: 數據庫適配器
+        path: 快照目錄（不存在時創建，已有的快照會被覆蓋）
+        page_size: 每頁讀取的地址數
+        logger: 日誌記錄器（可選）
+    
+    Returns:
+        {'addresses': int, 'trades': int, 'markets': int}
+    """
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    exported_at = datetime.now().replace(microsecond=0)
+    
+    # 市場元數據
+    markets = []
+    for page in db.iter_market_pages():
+        for market in page:
+            markets.append({
+                'id': market['id'],
+                'title': market['title'],
+                'category': market['category'],
+                'end_date': market['end_date'].isoformat() if market['end_date'] else None,
+                'created_at': market['created_at'].isoformat() if market['created_at'] else None
+            })
+    with open(os.path.join(path, 'markets.json'), 'w', encoding='utf-8') as f:
+        json.dump(markets, f, ensure_ascii=False)
+    
+    # 地址和交易
+    trade_writers = {name: _ColumnWriter(path, f"trades.{name}", kind) for name, kind in TRADE_COLUMNS.items()}
+    offsets_writer = _ColumnWriter(path, 'addresses.trade_offsets', 'int64')
+    offsets_writer.append([0])
+    address_writers = None
+    address_count = 0
+    trade_count = 0
+    
+    for page in db.iter_address_id_pages(page_size):
+        rows = db.get_addresses(page)
+        trades = db.get_address_trades_bulk(page)
+        page_rows = [rows[address_id] for address_id in page if address_id in rows]
+        if not page_rows:
+            continue
+        
+        # 地址表欄位的類型按第一個非空值推斷（不只看第一頁）
+        if address_writers is None:
+            address_writers = {column: _InferredColumnWriter(path, f"addresses.{column}") for column in page_rows[0]}
+        for column, writer in address_writers.items():
+            writer.append([row.get(column) for row in page_rows])
+        
+        offsets = []
+        page_trades = []
+        for row in page_rows:
+            page_trades.extend(trades.get(row['id'], []))
+            offsets.append(trade_count + len(page_trades))
+        for name, writer in trade_writers.items():
+            writer.append([trade[name] for trade in page_trades])
+        offsets_writer.append(offsets)
+        
+        address_count += len(page_rows)
+        trade_count += len(page_trades)
+        if logger:
+            logger.info(f"快照導出進度：{address_count} 個地址，{trade_count} 筆交易")
+    
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'exported_at': exported_at.isoformat(),
+        'byteorder': sys.byteorder,
+        'counts': {'addresses': address_count, 'trades': trade_count, 'markets': len(markets)},
+        'addresses': {column: writer.close() for column, writer in (address_writers or {}).items()},
+        'trade_offsets': offsets_writer.close(),
+        'trades': {name: writer.close() for name, writer in trade_writers.items()}
+    }
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    
+    return dict(meta['counts'])
+
+
+class SnapshotDataSource:
+    """
+    交易快照數據源
+    
+    提供 AddressContext 和批量打標籤流程使用的 DatabaseAdapter 讀取方法，
+    數據來自 export_snapshot 導出的目錄。數組文件以只讀內存映射打開，
+    由操作系統按需分頁載入，多個進程可以共享同一份頁面快取。
+    
+    時間窗口（近期交易次數）和回看範圍以導出時間為當前時間，同一快照的結果可以重現。
+    """
+    
+    # 只讀：不建立市場關鍵詞索引，關鍵詞專家直接匹配市場標題
+    READ_ONLY = True
+    
+    # 與 DatabaseAdapter 相同的開關，快照不使用彙總表和標籤統計表
+    daily_rollup = False
+    tag_stats = False
+    query_stats = None
+    
+    def __init__(self, path: str, lookback_days: Optional[int] = None):
+        """
+        打開快照
+        
+        Args:
+            path: 快照目錄
+            lookback_days: 回看天數（同 database.lookback_days，月度盈虧、入場時機和近期窗口
+                           只計入導出當天零點往前 N 天內的交易），None 表示讀取全部歷史
+        """
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"快照 {path} 的格式版本為 {self.meta.get('version')}，需要 {SNAPSHOT_VERSION}，請重新導出")
+        if self.meta['byteorder'] != sys.byteorder:
+            raise ValueError(f"快照 {path} 的字節序為 {self.meta['byteorder']}，與本機不同，請在本機重新導出")
+        
+        self.now = datetime.fromisoformat(self.meta['exported_at'])
+        self.horizon = NULL_INT
+        if lookback_days:
+            midnight = self.now.replace(hour=0, minute=0, second=0, microsecond=0)
+            self.horizon = _seconds(midnight - timedelta(days=lookback_days))
+        self._maps = []
+        self._views = []
+        
+        self.address_columns = {column: self._open(spec) for column, spec in self.meta['addresses'].items()}
+        self.trade_offsets = self._open(self.meta['trade_offsets'])['data']
+        self.trade_columns = {name: self._open(spec) for name, spec in self.meta['trades'].items()}
+        self.address_ids = self.address_columns['id']['data'] if 'id' in self.address_columns else []
+        
+        # 市場元數據（按市場 ID），時間轉為秒數以便逐筆比較
+        with open(os.path.join(path, 'markets.json'), 'r', encoding='utf-8') as f:
+            markets = json.load(f)
+        self.markets = {}
+        for market in markets:
+            self.markets[market['id']] = {
+                'title': market['title'] or '',
+                'category': market['category'],
+                'end_date': _seconds(datetime.fromisoformat(market['end_date'])) if market['end_date'] else None,
+                'created_at': _seconds(datetime.fromisoformat(market['created_at'])) if market['created_at'] else None
+            }
+        
+        # 關鍵詞條件 -> 匹配的市場 ID 集合
+        self._keyword_markets: Dict[Tuple[Tuple[str, ...], Optional[str]], set] = {}
+    
+    def _map(self, filename: str, typecode: str) -> Any:
+        """以只讀內存映射打開數組文件，返回按類型碼解讀的 memoryview"""
+        with open(os.path.join(self.path, filename), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return array(typecode)
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        view = memoryview(mapped).cast(typecode)
+        self._views.append(view)
+        return view
+    
+    def _open(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """打開一個欄位"""
+        column = {'kind': spec['kind']}
+        if spec['kind'] == 'text':
+            column['data'] = self._map(f"{spec['file']}.idx", 'q')
+            with open(os.path.join(self.path, f"{spec['file']}.bin"), 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                column['blob'] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+            if size:
+                self._maps.append(column['blob'])
+        else:
+            column['data'] = self._map(f"{spec['file']}.bin", TYPECODES[spec['kind']])
+            column['values'] = spec.get('values')
+        return column
+    
+    def _decode(self, column: Dict[str, Any], start: int, end: int) -> List[Any]:
+        """讀取欄位 [start, end) 的值並還原空值和類型"""
+        kind = column['kind']
+        if kind == 'text':
+            offsets = column['data']
+            return [column['blob'][offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(start, end)]
+        
+        values = column['data'][start:end].tolist()
+        if kind == 'float64':
+            return [None if value != value else value for value in values]
+        if kind == 'datetime':
+            return [_datetime(value) for value in values]
+        if kind == 'code':
+            return [None if value < 0 else column['values'][value] for value in values]
+        return [None if value == NULL_INT else value for value in values]
+    
+    def close(self):
+        """關閉內存映射"""
+        for view in self._views:
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+        self._views = []
+        self._maps = []
+    
+    # ==================== 地址 ====================
+    
+    def _position(self, address_id: int) -> Optional[int]:
+        """地址在快照中的位置（不存在時返回 None）"""
+        index = bisect_left(self.address_ids, address_id)
+        if index < len(self.address_ids) and self.address_ids[index] == address_id:
+            return index
+        return None
+    
+    def _in_shard(self, address_id: int, shard: Optional[Tuple[int, int]]) -> bool:
+        """地址是否屬於分片（與 DatabaseAdapter 一樣按 ID 取模）"""
+        return not shard or shard[1] <= 1 or address_id % shard[1] == shard[0]
+    
+    def get_address_data(self, address_id: int) -> Optional[Dict[str, Any]]:
+        """
+        獲取地址數據
+        
+        Args:
+            address_id: 地址 ID
+        
+        Returns:
+            地址數據字典
+        """
+        index = self._position(address_id)
+        if index is None:
+            return None
+        return {name: self._decode(column, index, index + 1)[0] for name, column in self.address_columns.items()}
+    
+    def get_address(self, address_id: int) -> Optional[Dict[str, Any]]:
+        """獲取地址數據（get_address_data 的別名）"""
+        return self.get_address_data(address_id)
+    
+    def get_addresses(self, address_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        批量獲取地址數據
+        
+        Args:
+            address_ids: 地址 ID 列表
+        
+        Returns:
+            地址 ID -> 地址數據的字典
+        """
+        addresses = {}
+        for address_id in address_ids:
+            address = self.get_address_data(address_id)
+            if address is not None:
+                addresses[address_id] = address
+        return addresses
+    
+    def count_addresses(self, shard: Optional[Tuple[int, int]] = None) -> int:
+        """
+        獲取地址數量
+        
+        Args:
+            shard: (分片序號, 分片總數)，只統計屬於該分片的地址
+        
+        Returns:
+            地址數量
+        """
+        if not shard or shard[1] <= 1:
+            return len(self.address_ids)
+        return sum(1 for address_id in self.address_ids if self._in_shard(address_id, shard))
+    
+    def iter_address_id_pages(self, page_size: int = 2000, after_id: Optional[int] = None,
+                              shard: Optional[Tuple[int, int]] = None,
+                              limit: Optional[int] = None) -> Iterator[List[int]]:
+        """
+        按頁迭代地址 ID（參數同 DatabaseAdapter.iter_address_id_pages）
+        
+        Yields:
+            地址 ID 列表（按 ID 升序）
+        """
+        start = bisect_right(self.address_ids, after_id) if after_id is not None else 0
+        remaining = limit
+        page = []
+        for index in range(start, len(self.address_ids)):
+            if remaining is not None and remaining <= 0:
+                break
+            address_id = self.address_ids[index]
+            if not self._in_shard(address_id, shard):
+                continue
+            page.append(address_id)
+            if remaining is not None:
+                remaining -= 1
+            if len(page) == page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+    
+    # ==================== 交易 ====================
+    
+    def _trade_range(self, address_id: int) -> Tuple[int, int]:
+        """地址的交易在交易數組中的範圍 [start, end)"""
+        index = self._position(address_id)
+        if index is None:
+            return 0, 0
+        return self.trade_offsets[index], self.trade_offsets[index + 1]
+    
+    def _trade_values(self, address_id: int, name: str) -> List[Any]:
+        """地址所有交易的一個欄位（按時間排序）"""
+        start, end = self._trade_range(address_id)
+        return self._decode(self.trade_columns[name], start, end)
+    
+    def _raw_trade_values(self, address_id: int, name: str) -> List[Any]:
+        """地址所有交易的一個欄位的原始值（時間為秒數，空值未還原）"""
+        start, end = self._trade_range(address_id)
+        return self.trade_columns[name]['data'][start:end].tolist()
+    
+    def get_address_trades(self, address_id: int) -> List[Dict[str, Any]]:
+        """
+        獲取地址的所有交易記錄
+        
+        Args:
+            address_id: 地址 ID
+        
+        Returns:
+            交易列表（按時間排序）
+        """
+        start, end = self._trade_range(address_id)
+        columns = {name: self._decode(column, start, end) for name, column in self.trade_columns.items()}
+        return [
+            {name: values[i] for name, values in columns.items()}
+            for i in range(end - start)
+        ]
+    
+    def get_address_trades_bulk(self, address_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """批量獲取地址的所有交易記錄"""
+        return {address_id: self.get_address_trades(address_id) for address_id in address_ids}
+    
+    def get_price_distribution(self, address_id: int) -> List[Dict[str, Any]]:
+        """獲取地址的價格分布"""
+        return [{'price': price} for price in self._trade_values(address_id, 'price')]
+    
+    def get_monthly_pnl(self, address_id: int) -> List[Dict[str, Any]]:
+        """獲取地址的月度盈虧（按月份排序，當月盈虧都為空時為 None）"""
+        monthly = {}
+        for timestamp, pnl in zip(self._raw_trade_values(address_id, 'timestamp'),
+                                  self._trade_values(address_id, 'pnl')):
+            if timestamp < self.horizon:
+                continue
+            month = _datetime(timestamp).strftime('%Y-%m')
+            if pnl is not None:
+                monthly[month] = (monthly.get(month) or 0) + pnl
+            else:
+                monthly.setdefault(month, None)
+        return [{'month': month, 'monthly_pnl': monthly[month]} for month in sorted(monthly)]
+    
+    def get_recent_trades_count(self, address_id: int, days: int = 30) -> int:
+        """獲取地址在導出時間前 N 天內的交易次數"""
+        cutoff = max(_seconds(self.now - timedelta(days=days)), self.horizon)
+        return sum(1 for timestamp in self._raw_trade_values(address_id, 'timestamp') if timestamp >= cutoff)
+    
+    # ==================== 市場 ====================
+    
+    def _trade_markets(self, address_id: int) -> List[Dict[str, Any]]:
+        """地址每筆交易的市場（市場不存在的交易不計入，與 JOIN 一致）"""
+        markets = []
+        for market_id in self._raw_trade_values(address_id, 'market_id'):
+            market = self.markets.get(market_id)
+            if market is not None:
+                markets.append(market)
+        return markets
+    
+    def get_category_histogram(self, address_ids: List[int]) -> Dict[int, Dict[str, int]]:
+        """
+        獲取地址在所有類別的交易次數
+        
+        Args:
+            address_ids: 地址 ID 列表
+        
+        Returns:
+            地址 ID -> {類別: 交易次數} 的字典，沒有交易的類別不出現
+        """
+        histograms = {}
+        for address_id in address_ids:
+            histogram = {}
+            for market in self._trade_markets(address_id):
+                histogram[market['category']] = histogram.get(market['category'], 0) + 1
+            histograms[address_id] = histogram
+        return histograms
+    
+    def get_category_trades(self, address_id: int, category: str) -> int:
+        """獲取地址在指定類別的交易次數"""
+        return self.get_category_histogram([address_id])[address_id].get(category, 0)
+    
+    def _markets_with_keywords(self, keywords: List[str], parent_category: Optional[str]) -> set:
+        """標題包含任一關鍵詞（不區分大小寫，同 LIKE '%kw%'）的市場 ID"""
+        key = (tuple(keywords), parent_category)
+        if key not in self._keyword_markets:
+            lowered = [keyword.lower() for keyword in keywords]
+            self._keyword_markets[key] = {
+                market_id for market_id, market in self.markets.items()
+                if any(keyword in market['title'].lower() for keyword in lowered)
+                and (not parent_category or market['category'] == parent_category)
+            }
+        return self._keyword_markets[key]
+    
+    def get_keyword_trades(self, address_id: int, keywords: List[str], parent_category: Optional[str] = None) -> int:
+        """獲取地址在包含關鍵詞的市場的交易次數"""
+        markets = self._markets_with_keywords(keywords, parent_category)
+        return sum(1 for market_id in self._raw_trade_values(address_id, 'market_id') if market_id in markets)
+    
+    def _entry_offsets(self, address_id: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """地址在回看範圍內每筆交易的時間（秒）和市場"""
+        pairs = []
+        for timestamp, market_id in zip(self._raw_trade_values(address_id, 'timestamp'),
+                                        self._raw_trade_values(address_id, 'market_id')):
+            market = self.markets.get(market_id)
+            if market is not None and timestamp >= self.horizon:
+                pairs.append((timestamp, market))
+        return pairs
+    
+    def get_late_entry_trades(self, address_id: int, days_before_close: int = 3) -> int:
+        """獲取地址在市場結算前 N 天內的交易次數"""
+        return sum(
+            1 for timestamp, market in self._entry_offsets(address_id)
+            if market['end_date'] is not None
+            and _units_between(timestamp, market['end_date'], 86400) <= days_before_close
+        )
+    
+    def get_early_entry_trades(self, address_id: int, hours_after_creation: int = 48) -> int:
+        """獲取地址在市場創建後 N 小時內的交易次數"""
+        return sum(
+            1 for timestamp, market in self._entry_offsets(address_id)
+            if market['created_at'] is not None
+            and _units_between(market['created_at'], timestamp, 3600) <= hours_after_creation
+        )
+    
+    # ==================== 批量特徵 ====================
+    
+    def extract_features(self, address_ids: List[int], spec: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+        """
+        提取一組地址的第一階段特徵（規格和結果同 DatabaseAdapter.extract_features）
+        
+        快照沒有市場關鍵詞索引，關鍵詞組總是按標題匹配（忽略 keyword_bits）。
+        """
+        keyword_groups = spec.get('keyword_groups', {})
+        histograms = self.get_category_histogram(address_ids)
+        return {
+            address_id: {
+                'category_trades': histograms[address_id],
+                'keyword_trades': {
+                    group: self.get_keyword_trades(address_id, cfg['keywords'], cfg.get('parent_category'))
+                    for group, cfg in keyword_groups.items()
+                },
+                'recent_trades_count': {
+                    days: self.get_recent_trades_count(address_id, days) for days in spec.get('recent_days', [])
+                },
+                'monthly_pnl': self.get_monthly_pnl(address_id),
+                'price_distribution': self.get_price_distribution(address_id),
+                'late_entry_trades': {
+                    days: self.get_late_entry_trades(address_id, days) for days in spec.get('late_entry_days', [])
+                },
+                'early_entry_trades': {
+                    hours: self.get_early_entry_trades(address_id, hours) for hours in spec.get('early_entry_hours', [])
+                }
+            }
+            for address_id in address_ids
+        }
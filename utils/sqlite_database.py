@@ -0,0 +1,485 @@
+"""
+SQLite 數據庫適配器模組
+
+與 DatabaseAdapter 相同的方法和表名 / 欄位名配置，使用嵌入式 SQLite，
+不需要數據庫服務即可在本機或 CI 上運行、分析和壓測完整流程
+"""
+
+import re
+import random
+import sqlite3
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Any, Tuple
+from urllib.parse import urlparse
+
+from .database import DatabaseAdapter, DatabaseEndpoint
+
+
+# 時間以 'YYYY-MM-DD HH:MM:SS' 文本保存（可直接按字符串比較），讀出時轉回 datetime，與 MySQL 驅動一致。
+# 只在本模組建立的連接上轉換（參數由游標格式化，結果由連接的 row_factory 轉換），
+# 不註冊全局的 sqlite3 適配器和轉換器，不影響同一進程中的其他 SQLite 使用者
+_DATETIME_TEXT = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(\.\d{1,6})?')
+
+
+def _sql_value(value: Any) -> Any:
+    """參數值 -> SQLite 保存的值（時間和日期轉為 ISO 文本）"""
+    if isinstance(value, datetime):
+        return value.isoformat(' ', 'seconds')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _convert_row(cursor: sqlite3.Cursor, row: tuple) -> tuple:
+    """連接的 row_factory：把時間文本轉回 datetime"""
+    return tuple(
+        datetime.fromisoformat(value)
+        if isinstance(value, str) and len(value) >= 19 and _DATETIME_TEXT.fullmatch(value) else value
+        for value in row
+    )
+
+
+class SQLiteCursor:
+    """把 MySQL 風格的 %s 佔位符轉換為 ? 的游標，dictionary 為 True 時以字典返回結果"""
+    
+    def __init__(self, cursor: sqlite3.Cursor, dictionary: bool = True):
+        self._cursor = cursor
+        self._dictionary = dictionary
+        self.rowcount = -1
+    
+    def execute(self, sql: str, params: tuple = None):
+        self._cursor.execute(sql.replace('%s', '?'), tuple(_sql_value(value) for value in params or ()))
+        self.rowcount = self._cursor.rowcount
+    
+    @property
+    def column_names(self) -> Tuple[str, ...]:
+        if self._cursor.description is None:
+            return ()
+        return tuple(column[0] for column in self._cursor.description)
+    
+    def fetchall(self) -> List[Any]:
+        if self._cursor.description is None:
+            return []
+        if not self._dictionary:
+            return self._cursor.fetchall()
+        columns = self.column_names
+        return [dict(zip(columns, row)) for row in self._cursor.fetchall()]
+    
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """提供 DatabaseAdapter 使用的 mysql.connector 連接接口"""
+    
+    def __init__(self, path: str):
+        # 自動提交模式，事務由 start_transaction 顯式開始；
+        # 同一連接可在多個線程使用（DatabaseEndpoint 以鎖保證語句不會交錯）
+        self._connection = sqlite3.connect(
+            path,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._connection.row_factory = _convert_row
+        self._connection.execute('PRAGMA foreign_keys = OFF')
+        if path != ':memory:':
+            self._connection.execute('PRAGMA journal_mode = WAL')
+            self._connection.execute('PRAGMA synchronous = NORMAL')
+    
+    def cursor(self, dictionary: bool = False, prepared: bool = False) -> SQLiteCursor:
+        # sqlite3 會快取已編譯的語句，預處理游標與普通游標相同
+        return SQLiteCursor(self._connection.cursor(), dictionary)
+    
+    def start_transaction(self):
+        # 立即取得寫鎖，避免兩個連接讀取同一狀態後都嘗試寫入
+        self._connection.execute('BEGIN IMMEDIATE')
+    
+    def commit(self):
+        self._connection.commit()
+    
+    def rollback(self):
+        self._connection.rollback()
+    
+    def close(self):
+        self._connection.close()
+
+
+class SQLiteEndpoint(DatabaseEndpoint):
+    """SQLite 數據庫端點（單一連接）"""
+    
+    def __init__(self, name: str, url: str, connect: bool = True):
+        super().__init__(name, url, pool_size=1, connect=connect)
+    
+    @property
+    def path(self) -> str:
+        """
+        數據庫文件路徑
+        
+        sqlite:///tagging.db 為相對路徑，sqlite:////data/tagging.db 為絕對路徑，
+        sqlite:// 或 sqlite:///:memory: 為內存數據庫。
+        """
+        path = urlparse(self.url).path[1:]
+        return path or ':memory:'
+    
+    def _ensure_connected(self):
+        """建立連接（已建立時不做任何事）"""
+        with self._connect_lock:
+            if self.connection is None:
+                self.connection = SQLiteConnection(self.path)
+
+
+class SQLiteDatabaseAdapter(DatabaseAdapter):
+    """
+    SQLite 數據庫適配器
+    
+    database.url 為 sqlite:///路徑 時使用（見 create_database_adapter）。
+    初始化時按 tables / columns 配置創建所有表（已存在時不做任何事），
+    方言差異（日期運算、UPSERT、行值 IN）通過 DatabaseAdapter 的方言方法處理。
+    只使用一個連接，不支持只讀副本。
+    """
+    
+    EXPLAIN_PREFIX = 'EXPLAIN QUERY PLAN'
+    
+    def __init__(self, config: Dict[str, Any]):
+        """
+        初始化數據庫適配器
+        
+        Args:
+            config: 完整配置（database 部分同 DatabaseAdapter，忽略 pool_size 和 replica_urls）
+        """
+        config = dict(config)
+        config['database'] = dict(config['database'], pool_size=1, replica_urls=[])
+        super().__init__(config)
+        self.bootstrap_schema()
+    
+    def _create_endpoint(self, name: str, url: str, pool_name: str, connect: bool = True) -> DatabaseEndpoint:
+        """建立 SQLite 端點"""
+        return SQLiteEndpoint(name, url, connect=connect)
+    
+    # ==================== SQL 方言 ====================
+    
+    def _month_sql(self, column: str) -> str:
+        """時間欄位所在的月份（'YYYY-MM'）"""
+        return f"strftime('%Y-%m', {column})"
+    
+    def _shift_sql(self, column: str, amount: str, unit: str) -> str:
+        """時間加上 amount 個單位（結果與保存格式相同，可按字符串比較）"""
+        return f"datetime({column}, ({amount}) || ' {unit.lower()}s')"
+    
+    def _mod_sql(self, column: str, divisor: int) -> str:
+        """取模"""
+        return f"({column} % {int(divisor)})"
+    
+    def _now_sql(self) -> str:
+        """當前時間（本地時間）"""
+        return "datetime('now', 'localtime')"
+    
+    def _upsert_sql(self, key_columns: List[str], update_columns: List[str],
+                    extra_assignments: Tuple[str, ...] = ()) -> str:
+        """INSERT ... ON CONFLICT DO UPDATE 子句"""
+        assignments = [f"{column} = {self._inserted_sql(column)}" for column in update_columns] + list(extra_assignments)
+        return f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {', '.join(assignments)}"
+    
+    def _inserted_sql(self, column: str) -> str:
+        """UPSERT 更新子句中引用要插入的新值"""
+        return f"excluded.{column}"
+    
+    def _row_list_sql(self, rows: str) -> str:
+        """行值 IN 子句的右側（SQLite 要求子查詢）"""
+        return f"(VALUES {rows})"
+    
+    def _for_update_sql(self) -> str:
+        """SQLite 不支持行鎖，寫事務以 BEGIN IMMEDIATE 開始，整庫互斥"""
+        return ""
+    
+    # ==================== 表結構 ====================
+    
+    def _schema(self) -> Dict[str, List[str]]:
+        """
+        按表名和欄位名配置生成建表語句
+        
+        Returns:
+            表鍵 -> [CREATE TABLE, CREATE INDEX, ...]
+        """
+        addresses_table = self.get_table_name('addresses')
+        trades_table = self.get_table_name('address_trades')
+        markets_table = self.get_table_name('markets')
+        tags_table = self.get_table_name('address_tags')
+        state_table = self.get_table_name('tagging_state')
+        masks_table = self.get_table_name('market_keyword_tags')
+        daily_stats_table = self.get_table_name('address_daily_stats')
+        tag_stats_table = self.get_table_name('tag_stats')
+        
+        address = lambda key: self.get_column_name('addresses', key)
+        trade = lambda key: self.get_column_name('address_trades', key)
+        market = lambda key: self.get_column_name('markets', key)
+        buckets = ',\n                '.join(
+            f"price_b{i} INTEGER NOT NULL DEFAULT 0" for i in range(self.PRICE_BUCKETS)
+        )
+        
+        return {
+            'addresses': [f"""
+            CREATE TABLE IF NOT EXISTS {addresses_table} (
+                id INTEGER PRIMARY KEY,
+                {address('address')} TEXT,
+                {address('win_rate')} REAL,
+                {address('total_trades')} INTEGER,
+                {address('total_volume')} REAL,
+                {address('avg_trade_size')} REAL
+            )
+            """],
+            'markets': [f"""
+            CREATE TABLE IF NOT EXISTS {markets_table} (
+                id INTEGER PRIMARY KEY,
+                {market('title')} TEXT,
+                {market('category')} TEXT,
+                {market('end_date')} TIMESTAMP,
+                {market('created_at')} TIMESTAMP
+            )
+            """],
+            'address_trades': [f"""
+            CREATE TABLE IF NOT EXISTS {trades_table} (
+                {trade('id')} INTEGER PRIMARY KEY,
+                {trade('address_id')} INTEGER NOT NULL,
+                {trade('market_id')} INTEGER NOT NULL,
+                {trade('timestamp')} TIMESTAMP NOT NULL,
+                {trade('amount')} REAL,
+                {trade('side')} TEXT,
+                {trade('price')} REAL,
+                {trade('pnl')} REAL
+            )
+            """, f"""
+            CREATE INDEX IF NOT EXISTS idx_{trades_table}_address_time
+            ON {trades_table} ({trade('address_id')}, {trade('timestamp')})
+            """],
+            'address_tags': [f"""
+            CREATE TABLE IF NOT EXISTS {tags_table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                address_id INTEGER NOT NULL,
+                category TEXT NOT NULL,
+                tag_name TEXT NOT NULL,
+                confidence_score REAL DEFAULT 1.00,
+                is_manual BOOLEAN DEFAULT FALSE,
+                created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+                updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+                UNIQUE (address_id, tag_name)
+            )
+            """],
+            'tagging_state': [f"""
+            CREATE TABLE IF NOT EXISTS {state_table} (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+            )
+            """],
+            'market_keyword_tags': [f"""
+            CREATE TABLE IF NOT EXISTS {masks_table} (
+                market_id INTEGER PRIMARY KEY,
+                mask INTEGER NOT NULL
+            )
+            """],
+            'address_daily_stats': [f"""
+            CREATE TABLE IF NOT EXISTS {daily_stats_table} (
+                address_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                trade_count INTEGER NOT NULL DEFAULT 0,
+                volume REAL NOT NULL DEFAULT 0,
+                pnl REAL NOT NULL DEFAULT 0,
+                buy_count INTEGER NOT NULL DEFAULT 0,
+                sell_count INTEGER NOT NULL DEFAULT 0,
+                {buckets},
+                PRIMARY KEY (address_id, day)
+            )
+            """, f"""
+            CREATE INDEX IF NOT EXISTS idx_{daily_stats_table}_day_address
+            ON {daily_stats_table} (day, address_id)
+            """],
+            'tag_stats': [f"""
+            CREATE TABLE IF NOT EXISTS {tag_stats_table} (
+                stat TEXT NOT NULL,
+                category TEXT NOT NULL DEFAULT '',
+                tag_name TEXT NOT NULL DEFAULT '',
+                bucket INTEGER NOT NULL DEFAULT 0,
+                total INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (stat, category, tag_name, bucket)
+            )
+            """]
+        }
+    
+    def bootstrap_schema(self):
+        """創建所有表和索引（已存在時不做任何事）"""
+        for statements in self._schema().values():
+            for sql in statements:
+                self.execute(sql)
+    
+    def create_tags_table(self):
+        """創建標籤表（已存在時不做任何事）"""
+        for sql in self._schema()['address_tags']:
+            self.execute(sql)
+    
+    def create_state_table(self):
+        """創建運行狀態表（已存在時不做任何事）"""
+        for sql in self._schema()['tagging_state']:
+            self.execute(sql)
+    
+    def create_market_keyword_table(self):
+        """創建市場關鍵詞組位掩碼表（已存在時不做任何事）"""
+        for sql in self._schema()['market_keyword_tags']:
+            self.execute(sql)
+    
+    def create_daily_stats_table(self):
+        """創建地址每日交易彙總表（已存在時不做任何事）"""
+        for sql in self._schema()['address_daily_stats']:
+            self.execute(sql)
+    
+    def create_tag_stats_table(self):
+        """創建標籤統計表（已存在時不做任何事）"""
+        for sql in self._schema()['tag_stats']:
+            self.execute(sql)
+    
+    def get_indexes(self, table_key: str) -> Dict[str, List[str]]:
+        """獲取表上現有的索引（包括整數主鍵）"""
+        table = self.get_table_name(table_key)
+        indexes = {}
+        for row in self.execute(f"SELECT name FROM pragma_table_info('{table}') WHERE pk > 0 ORDER BY pk"):
+            indexes.setdefault('PRIMARY', []).append(row['name'])
+        for index in self.execute(f"SELECT name FROM pragma_index_list('{table}')"):
+            columns = self.execute(f"SELECT name FROM pragma_index_info('{index['name']}') ORDER BY seqno")
+            indexes[index['name']] = [column['name'] for column in columns]
+        return indexes
+    
+    def get_full_scans(self, plan: List[Dict[str, Any]]) -> List[str]:
+        """從 EXPLAIN QUERY PLAN 結果中找出全表掃描或全索引掃描的表"""
+        tables = []
+        for row in plan:
+            match = re.match(r'SCAN (?:TABLE )?(\S+)', row.get('detail', ''))
+            if match:
+                tables.append(match.group(1))
+        return tables
+    
+    # ==================== 模擬數據 ====================
+    
+    def insert_rows(self, table_key: str, rows: List[Dict[str, Any]], batch_size: int = 1000) -> int:
+        """
+        批量插入行（欄位鍵按 columns 配置映射為實際欄位名）
+        
+        Args:
+            table_key: 表鍵（如 'address_trades'）
+            rows: 行列表，每行為 欄位鍵 -> 值
+            batch_size: 每個事務插入的行數
+            
+        Returns:
+            插入的行數
+        """
+        if not rows:
+            return 0
+        
+        table = self.get_table_name(table_key)
+        keys = list(rows[0])
+        columns = ', '.join(self.get_column_name(table_key, key) for key in keys)
+        placeholders = ', '.join(['%s'] * len(keys))
+        sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+        
+        for start in range(0, len(rows), batch_size):
+            with self.transaction():
+                for row in rows[start:start + batch_size]:
+                    self.execute(sql, tuple(row[key] for key in keys))
+        
+        self.invalidate_cache(table_key)
+        return len(rows)
+    
+    def populate_synthetic_data(self, addresses: int = 1000, markets: int = 200,
+                                trades_per_address: int = 50, seed: int = 0) -> Dict[str, int]:
+        """
+        生成模擬的地址、市場和交易數據（用於離線測試和壓力測試）
+        
+        地址 ID 和市場 ID 接在現有數據之後，可以多次調用逐步擴大數據量。
+        
+        Args:
+            addresses: 地址數量
+            markets: 市場數量
+            trades_per_address: 每個地址的平均交易數
+            seed: 隨機種子（相同種子生成相同數據）
+            
+        Returns:
+            {'addresses': int, 'markets': int, 'trades': int}
+        """
+        rng = random.Random(seed)
+        now = datetime.now().replace(microsecond=0)
+        
+        topics = {
+            'Politics': ['Election', 'President', 'Governor', 'Senate Vote'],
+            'Sports': ['NFL', 'NBA', 'Premier League', 'Champions League', 'Soccer'],
+            'Crypto': ['Bitcoin', 'Ethereum', 'ETF'],
+            'Entertainment': ['Oscars', 'Box Office', 'Grammy'],
+            'Economics': ['Inflation', 'GDP', 'Interest Rate', 'Economy']
+        }
+        
+        first_market = self._next_id('markets', 'id')
+        market_rows = []
+        for market_id in range(first_market, first_market + markets):
+            category = rng.choice(list(topics))
+            created_at = now - timedelta(days=rng.randint(1, 720))
+            market_rows.append({
+                'id': market_id,
+                'title': f"Will the {rng.choice(topics[category])} market #{market_id} resolve YES?",
+                'category': category,
+                'created_at': created_at,
+                'end_date': created_at + timedelta(days=rng.randint(1, 180))
+            })
+        self.insert_rows('markets', market_rows)
+        market_ids = [row['id'] for row in market_rows]
+        market_by_id = {row['id']: row for row in market_rows}
+        
+        first_address = self._next_id('addresses', 'id')
+        trade_id = self._next_id('address_trades', self.get_column_name('address_trades', 'id'))
+        address_rows = []
+        trade_rows = []
+        for address_id in range(first_address, first_address + addresses):
+            count = max(1, int(rng.expovariate(1 / trades_per_address)))
+            wins = 0
+            volume = 0.0
+            for _ in range(count):
+                market = market_by_id[rng.choice(market_ids)]
+                span = max(1, int((market['end_date'] - market['created_at']).total_seconds()))
+                amount = round(rng.lognormvariate(4, 1.2), 2)
+                pnl = round(amount * rng.uniform(-1, 1), 2)
+                wins += pnl > 0
+                volume += amount
+                trade_rows.append({
+                    'id': trade_id,
+                    'address_id': address_id,
+                    'market_id': market['id'],
+                    'timestamp': min(now, market['created_at'] + timedelta(seconds=rng.randrange(span))),
+                    'amount': amount,
+                    'side': rng.choice(['buy', 'sell']),
+                    'price': round(rng.uniform(0.01, 0.99), 2),
+                    'pnl': pnl
+                })
+                trade_id += 1
+            
+            address_rows.append({
+                'id': address_id,
+                'address': f"0x{rng.getrandbits(160):040x}",
+                'win_rate': wins / count,
+                'total_trades': count,
+                'total_volume': round(volume, 2),
+                'avg_trade_size': round(volume / count, 2)
+            })
+        
+        # 交易按時間順序寫入，與真實數據中交易 ID 隨時間遞增一致
+        trade_rows.sort(key=lambda row: row['timestamp'])
+        first_trade = trade_id - len(trade_rows)
+        for offset, row in enumerate(trade_rows):
+            row['id'] = first_trade + offset
+        
+        self.insert_rows('addresses', address_rows)
+        self.insert_rows('address_trades', trade_rows)
+        
+        return {'addresses': len(address_rows), 'markets': len(market_rows), 'trades': len(trade_rows)}
+    
+    def _next_id(self, table_key: str, column: str) -> int:
+        """表中下一個可用的 ID"""
+        table = self.get_table_name(table_key)
+        result = self.execute(f"SELECT MAX({column}) as max_id FROM {table}")
+        return int(result[0]['max_id'] or 0) + 1 if result else 1
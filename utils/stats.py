@@ -0,0 +1,61 @@
+"""
+統計信息模組
+
+合併多個工作進程（分片）的運行統計
+"""
+
+from typing import List, Dict, Any
+from datetime import datetime
+
+
+def merge_stats(stats_list: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    合併多個分片的統計信息
+    
+    合併規則：
+    - 數值：相加
+    - 字典（如 tag_distribution）：按鍵遞歸合併
+    - start_time / end_time：取最早 / 最晚
+    - 其他值：取第一個非空值
+    
+    Args:
+        stats_list: 各分片的統計信息
+        
+    Returns:
+        合併後的統計信息，另外包含：
+        {
+            'workers': int,  # 分片數量
+            'worker_durations': List[float]  # 各分片處理時間（秒）
+        }
+    """
+    merged = _merge_dicts(stats_list)
+    merged['workers'] = len(stats_list)
+    merged['worker_durations'] = [
+        (stats['end_time'] - stats['start_time']).total_seconds()
+        for stats in stats_list
+        if stats.get('start_time') and stats.get('end_time')
+    ]
+    return merged
+
+
+def _merge_dicts(dicts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """按合併規則合併多個字典"""
+    merged = {}
+    
+    for d in dicts:
+        for key, value in d.items():
+            if key not in merged or merged[key] is None:
+                merged[key] = dict(value) if isinstance(value, dict) else value
+            elif isinstance(value, dict):
+                merged[key] = _merge_dicts([merged[key], value])
+            elif isinstance(value, bool) or value is None:
+                continue
+            elif isinstance(value, (int, float)):
+                merged[key] += value
+            elif isinstance(value, datetime):
+                if key == 'end_time':
+                    merged[key] = max(merged[key], value)
+                else:
+                    merged[key] = min(merged[key], value)
+    
+    return merged
@@ -0,0 +1,127 @@
+"""
+標籤寫入模組
+
+跨地址緩衝標籤，按行數或時間間隔批量寫入數據庫
+"""
+
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class TagWriter:
+    """
+    緩衝標籤寫入器
+    
+    標籤先累積在內存中，達到 max_rows 行或距離上次寫入超過 flush_interval 秒時，
+    在一個顯式事務內以多行 DELETE 和 INSERT ... ON DUPLICATE KEY UPDATE 寫入。
+    啟用標籤統計表時，同一事務內比較涉及地址寫入前後的標籤，把差值累加到統計表。
+    關閉（或離開 with 區塊）時寫入剩餘的標籤。
+    """
+    
+    def __init__(self, db, max_rows: int = 1000, flush_interval: float = 5.0, logger=None):
+        """
+        初始化寫入器
+        
+        Args:
+            db: 數據庫適配器
+            max_rows: 緩衝區行數上限（同時是每條 INSERT / DELETE 的最大行數）
+            flush_interval: 最長寫入間隔（秒）
+            logger: 日誌記錄器（可選）
+        """
+        self.db = db
+        self.max_rows = max(1, max_rows)
+        self.flush_interval = flush_interval
+        self.logger = logger
+        
+        self._upserts: List[Tuple[int, str, str, float]] = []
+        self._deletes: List[Tuple[int, str]] = []
+        self._state: Dict[str, Any] = {}
+        self._last_flush = time.monotonic()
+        
+        # 統計信息
+        self.flushes = 0
+        self.rows_written = 0
+    
+    def add(self, address_id: int, tags: List[Dict[str, Any]]):
+        """
+        加入一個地址要寫入（新增或更新）的標籤
+        
+        Args:
+            address_id: 地址 ID
+            tags: 標籤列表
+        """
+        self._upserts.extend(
+            (address_id, tag['category'], tag['tag_name'], tag['confidence_score'])
+            for tag in tags
+        )
+        self._maybe_flush()
+    
+    def remove(self, address_id: int, tag_names: List[str]):
+        """
+        加入一個地址要刪除的自動標籤（與寫入在同一事務內刪除）
+        
+        Args:
+            address_id: 地址 ID
+            tag_names: 標籤名稱列表
+        """
+        self._deletes.extend((address_id, tag_name) for tag_name in tag_names)
+        self._maybe_flush()
+    
+    def set_state(self, name: str, value: Any):
+        """
+        設置運行狀態（如增量更新水位），在下一次寫入時與標籤同一事務提交
+        
+        Args:
+            name: 狀態名稱
+            value: 狀態值
+        """
+        self._state[name] = value
+    
+    @property
+    def pending_rows(self) -> int:
+        """緩衝區中待寫入的行數"""
+        return len(self._upserts) + len(self._deletes)
+    
+    def _maybe_flush(self):
+        """達到行數上限或寫入間隔時寫入"""
+        if (self.pending_rows >= self.max_rows or
+            time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+    
+    def flush(self):
+        """把緩衝區的標籤寫入數據庫"""
+        self._last_flush = time.monotonic()
+        if not self.pending_rows and not self._state:
+            return
+        
+        with self.db.transaction():
+            if self.db.tag_stats:
+                address_ids = sorted({row[0] for row in self._upserts} | {row[0] for row in self._deletes})
+                before = self.db.get_existing_tags(address_ids, for_update=True)
+            for start in range(0, len(self._deletes), self.max_rows):
+                self.db.delete_tag_rows(self._deletes[start:start + self.max_rows])
+            for start in range(0, len(self._upserts), self.max_rows):
+                self.db.upsert_tags(self._upserts[start:start + self.max_rows])
+            if self.db.tag_stats:
+                self.db.update_tag_stats(before, self.db.get_existing_tags(address_ids))
+            for name, value in self._state.items():
+                self.db.set_state(name, value)
+        
+        self.flushes += 1
+        self.rows_written += self.pending_rows
+        if self.logger:
+            self.logger.debug(f"已寫入 {len(self._upserts)} 個標籤，刪除 {len(self._deletes)} 個標籤")
+        
+        self._upserts = []
+        self._deletes = []
+        self._state = {}
+    
+    def close(self):
+        """寫入剩餘的標籤"""
+        self.flush()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()